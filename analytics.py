@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Узкие места линии по длительностям шагов из базы результатов.
+
+Шаги: процентили длительности и доля в общем времени оператора. Проверяющие:
+ноутбуков в день и время на ноутбук. Модели: шаги, которые на модели идут заметно
+дольше обычного. Динамика: ноутбуки и время на ноутбук по неделям или месяцам.
+Все считается векторно (NumPy) по всем строкам сразу.
+
+    python analytics.py [--db test_results.db] [--from 2026-01-01] [--to 2027-01-01] [--period week]
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from results_db import DB_FILE, ResultsStore
+
+NO_CHECKER = "(не указан)"
+# Модель считается медленной на шаге, если ее медиана больше обычной во столько раз
+OUTLIER_RATIO = 1.5
+# ... и по ней есть хотя бы столько ноутбуков
+OUTLIER_MIN_COUNT = 5
+
+
+def group_percentiles(groups, values, n_groups, quantiles, value_order=None):
+    """Процентили values по группам (коды 0..n_groups-1) без цикла по группам.
+
+    Возвращает массив (n_groups, len(quantiles)); для пустых групп - NaN.
+    Интерполяция линейная, как у np.percentile. value_order - готовый np.argsort(values,
+    kind='stable'), если values сортируются не в первый раз.
+    """
+    if value_order is None:
+        value_order = np.argsort(values, kind='stable')
+    # Устойчивая сортировка по группе сохраняет порядок значений внутри группы;
+    # для кодов до 65535 NumPy сортирует их поразрядно, за линейное время
+    keys = groups[value_order].astype(np.uint16 if n_groups <= 0xFFFF else np.int64)
+    order = value_order[np.argsort(keys, kind='stable')]
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    present = counts > 0
+    for i, q in enumerate(quantiles):
+        position = q / 100 * (counts[present] - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        fraction = position - low
+        base = starts[present]
+        result[present, i] = (sorted_values[base + low] * (1 - fraction)
+                              + sorted_values[base + high] * fraction)
+    return result
+
+
+class Timings:
+    """Длительности шагов плоскими массивами + коды групп для векторных агрегатов"""
+
+    def __init__(self, columns):
+        # Список шагов разбирается один раз на каждый разный, длительности - одним вызовом NumPy
+        codes, signatures = {}, {}
+        for text in columns['steps']:
+            if text not in signatures:
+                steps = json.loads(text)
+                signatures[text] = (np.array([codes.setdefault(step, len(codes)) for step, _, _ in steps], dtype=np.int64),
+                                    np.array([bool(operator) for _, operator, _ in steps]))
+        per_laptop = [signatures[text] for text in columns['steps']]
+        counts = np.fromiter((len(step) for step, _ in per_laptop), dtype=np.int64, count=len(per_laptop))
+        numbers = ",".join(text[1:-1] for text in columns['step_durations'] if text != "[]")
+        self.duration = np.fromstring(numbers, sep=",") if numbers else np.zeros(0)
+        if len(self.duration) != counts.sum():
+            raise ValueError("число длительностей не совпадает с числом шагов")
+        self.step = np.concatenate([step for step, _ in per_laptop]) if per_laptop else np.zeros(0, np.int64)
+        self.operator = np.concatenate([operator for _, operator in per_laptop]) if per_laptop else np.zeros(0, bool)
+        self.steps = np.array(list(codes), dtype=str)
+        self.laptops = np.asarray(columns['serial_number'], dtype=str)
+        self.laptop = np.repeat(np.arange(len(per_laptop)), counts)
+
+        checker = [c.strip() if c and c.strip() else NO_CHECKER for c in columns['checker']]
+        self.checkers, self.laptop_checker = np.unique(np.asarray(checker, dtype=str), return_inverse=True)
+        self.models, self.laptop_model = np.unique(np.asarray([m or "" for m in columns['model']], dtype=str),
+                                                   return_inverse=True)
+        self.laptop_date = np.asarray([t[:10] if t else "NaT" for t in columns['tested_at']],
+                                      dtype='datetime64[D]')
+        # Время оператора на ноутбук: фоновые сборщики идут параллельно и его не занимают
+        self.laptop_time = np.bincount(self.laptop, weights=np.where(self.operator, self.duration, 0),
+                                       minlength=len(self.laptops))
+        self.duration_order = np.argsort(self.duration, kind='stable')
+
+    def __len__(self):
+        return len(self.duration)
+
+
+def step_table(t):
+    """[(шаг, оператор?, число, p50, p90, p99, среднее, доля времени оператора)] по убыванию суммы"""
+    n = len(t.steps)
+    counts = np.bincount(t.step, minlength=n)
+    totals = np.bincount(t.step, weights=t.duration, minlength=n)
+    operator = np.bincount(t.step, weights=t.operator, minlength=n) > counts / 2
+    operator_total = totals[operator].sum() or 1.0
+    p = group_percentiles(t.step, t.duration, n, (50, 90, 99), t.duration_order)
+    rows = []
+    for i in np.argsort(-totals):
+        share = totals[i] / operator_total if operator[i] else np.nan
+        rows.append((t.steps[i], bool(operator[i]), int(counts[i]), *p[i], totals[i] / counts[i], share))
+    return rows
+
+
+def checker_table(t):
+    """[(проверяющий, ноутбуков, рабочих дней, ноутбуков в день, p50 и p90 времени на ноутбук)]"""
+    n = len(t.checkers)
+    laptops = np.bincount(t.laptop_checker, minlength=n)
+    dated = ~np.isnat(t.laptop_date)
+    # Рабочий день = пара (проверяющий, дата) с хотя бы одним ноутбуком
+    days = np.unique(np.stack([t.laptop_checker[dated], t.laptop_date[dated].astype(np.int64)]), axis=1)
+    active_days = np.bincount(days[0], minlength=n)
+    p = group_percentiles(t.laptop_checker, t.laptop_time, n, (50, 90))
+    rows = []
+    for i in np.argsort(p[:, 0]):
+        per_day = laptops[i] / active_days[i] if active_days[i] else np.nan
+        rows.append((t.checkers[i], int(laptops[i]), int(active_days[i]), per_day, *p[i]))
+    return rows
+
+
+def model_outliers(t, ratio=OUTLIER_RATIO, min_count=OUTLIER_MIN_COUNT):
+    """[(модель, шаг, ноутбуков, медиана на модели, обычная медиана, во сколько раз)] по убыванию"""
+    n_steps = len(t.steps)
+    step_median = group_percentiles(t.step, t.duration, n_steps, (50,), t.duration_order)[:, 0]
+    pair = t.laptop_model[t.laptop] * n_steps + t.step
+    n_pairs = len(t.models) * n_steps
+    counts = np.bincount(pair, minlength=n_pairs)
+    pair_median = group_percentiles(pair, t.duration, n_pairs, (50,), t.duration_order)[:, 0]
+    baseline = np.tile(step_median, len(t.models))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        times = pair_median / baseline
+    slow = np.nonzero((counts >= min_count) & (times > ratio) & (baseline > 0))[0]
+    slow = slow[np.argsort(-times[slow])]
+    return [(t.models[i // n_steps] or "(без модели)", t.steps[i % n_steps], int(counts[i]),
+             pair_median[i], baseline[i], times[i]) for i in slow]
+
+
+def trend_table(t, period="week"):
+    """[(начало периода, ноутбуков, p50 и p90 времени на ноутбук, самый долгий шаг по медиане)]"""
+    dated = ~np.isnat(t.laptop_date)
+    if not dated.any():
+        return []
+    dates = t.laptop_date
+    if period == "month":
+        starts = dates.astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        # 1970-01-01 - четверг: сдвиг до понедельника
+        starts = dates - ((dates.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    periods, laptop_period = np.unique(starts[dated], return_inverse=True)
+    n = len(periods)
+    laptops = np.bincount(laptop_period, minlength=n)
+    p = group_percentiles(laptop_period, t.laptop_time[dated], n, (50, 90))
+
+    # Самый долгий шаг оператора за период - по медиане среди строк этого периода
+    period_of_laptop = np.full(len(t.laptops), -1)
+    period_of_laptop[dated] = laptop_period
+    rows_period = period_of_laptop[t.laptop]
+    keep = (rows_period >= 0) & t.operator
+    n_steps = len(t.steps)
+    pair = rows_period[keep] * n_steps + t.step[keep]
+    medians = group_percentiles(pair, t.duration[keep], n * n_steps, (50,))[:, 0].reshape(n, n_steps)
+    slowest = np.nanargmax(np.where(np.isnan(medians), -1, medians), axis=1)
+    return [(str(periods[i]), int(laptops[i]), *p[i], t.steps[slowest[i]]) for i in range(n)]
+
+
+def minutes(seconds):
+    return "-" if np.isnan(seconds) else f"{seconds / 60:.1f}"
+
+
+def print_report(t, period="week", top=10):
+    print("=" * 50)
+    print(f"ШАГИ (строк: {len(t)}, ноутбуков: {len(t.laptops)}; время в минутах)")
+    print("=" * 50)
+    print(f"{'шаг':<28} {'N':>6} {'p50':>6} {'p90':>6} {'p99':>6} {'доля':>6}")
+    for name, operator, count, p50, p90, p99, mean, share in step_table(t):
+        label = name if operator else f"{name} (фон)"
+        print(f"{label[:28]:<28} {count:>6} {minutes(p50):>6} {minutes(p90):>6} {minutes(p99):>6} "
+              f"{'' if np.isnan(share) else f'{share:.0%}':>6}")
+
+    print("\n" + "=" * 50)
+    print("ПРОВЕРЯЮЩИЕ (время оператора на ноутбук, мин)")
+    print("=" * 50)
+    print(f"{'проверяющий':<20} {'ноутб.':>7} {'дней':>5} {'в день':>7} {'p50':>6} {'p90':>6}")
+    for name, laptops, days, per_day, p50, p90 in checker_table(t):
+        print(f"{name[:20]:<20} {laptops:>7} {days:>5} {'-' if np.isnan(per_day) else f'{per_day:.1f}':>7} "
+              f"{minutes(p50):>6} {minutes(p90):>6}")
+
+    print("\n" + "=" * 50)
+    print(f"МОДЕЛИ: шаги дольше обычного в {OUTLIER_RATIO}+ раза (не меньше {OUTLIER_MIN_COUNT} ноутбуков)")
+    print("=" * 50)
+    outliers = model_outliers(t)
+    for model, step, count, median, baseline, times in outliers[:top]:
+        print(f"{model[:24]:<24} {step[:24]:<24} N={count:<5} {minutes(median)} мин против {minutes(baseline)} "
+              f"(x{times:.1f})")
+    if not outliers:
+        print("Нет")
+
+    print("\n" + "=" * 50)
+    print(f"ДИНАМИКА ПО {'МЕСЯЦАМ' if period == 'month' else 'НЕДЕЛЯМ'}")
+    print("=" * 50)
+    for start, laptops, p50, p90, slowest in trend_table(t, period):
+        print(f"{start}  ноутбуков {laptops:>5}  p50 {minutes(p50):>5}  p90 {minutes(p90):>5}  дольше всего: {slowest}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Узкие места линии по длительностям шагов")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--from", dest="date_from", metavar="ГГГГ-ММ-ДД")
+    parser.add_argument("--to", dest="date_to", metavar="ГГГГ-ММ-ДД")
+    parser.add_argument("--period", choices=("week", "month"), default="week")
+    parser.add_argument("--top", type=int, default=10, help="сколько медленных пар модель/шаг показать")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ResultsStore(args.db) as store:
+        columns = store.step_columns(args.date_from, args.date_to)
+    if not columns['steps']:
+        print("Нет сохраненных длительностей шагов")
+        return 1
+    timings = Timings(columns)
+    print_report(timings, args.period, args.top)
+    print(f"\nПосчитано за {time.perf_counter() - start:.2f} с")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Ответы на вопросы оператора: из файла ответов, флагов командной строки или с клавиатуры"""
+
+import json
+import queue
+import sys
+import threading
+
+# Ответы по умолчанию для работы без оператора.
+# Ключи результатов тестов совпадают с ключами LaptopTester.results.
+DEFAULT_ANSWERS = {
+    'hwinfo': '1',
+    'touchscreen': '1',
+    'accounts': '2',
+    'battery_open_report': 'n',
+    'keyboard_layout': '1',
+    'keyboard_labels': '1',
+    'keyboard_numpad': 'n',
+    'continue_after_error': 'y',
+    'resume': 'y',
+    'notebook_number': '',
+    'comment': 'автоматическая проверка',
+    'checker': 'auto',
+    # Результаты тестов: s - пропустить (оценку ставит человек)
+    'hardware_ok': 's',
+    'hwinfo_ran': 's',
+    'audio_test_ok': 's',
+    'audio_left_ok': 's',
+    'audio_right_ok': 's',
+    'audio_sweep_ok': 's',
+    'camera_ok': 's',
+    'ssd_tool_ok': 's',
+    'battery_ok': 's',
+    'screen_ok': 's',
+    'keyboard_ok': 's',
+    'mouse_test_ok': 's',
+    'microphone_ok': 's',
+    'devicemanager_ok': 's',
+    'touchscreen_ok': 's',
+    'touchpad_ok': 's',
+}
+
+
+def load_answers_file(path):
+    """Файл ответов - JSON-объект {ключ: ответ}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: ожидается JSON-объект {{ключ: ответ}}")
+    return {str(k): str(v) for k, v in data.items()}
+
+
+def parse_answer_flags(flags):
+    """['camera_ok=y', 'checker=Иванов'] -> {'camera_ok': 'y', 'checker': 'Иванов'}"""
+    answers = {}
+    for flag in flags or []:
+        key, sep, value = flag.partition('=')
+        if not sep:
+            raise ValueError(f"ожидается ключ=ответ, получено: {flag}")
+        answers[key.strip()] = value
+    return answers
+
+
+class Answers:
+    """Источник ответов для LaptopTester.prompt.
+
+    Порядок: явный ответ (файл/флаги) -> в режиме headless ответ по умолчанию ->
+    ввод оператора (с таймаутом, если он задан; по таймауту - ответ по умолчанию).
+    """
+
+    def __init__(self, answers=None, headless=False, timeout=None, defaults=None):
+        self.answers = dict(answers or {})
+        self.headless = headless
+        self.timeout = timeout
+        self.defaults = dict(DEFAULT_ANSWERS)
+        self.defaults.update(defaults or {})
+        self._lines = None
+
+    def ask(self, text, key=None, default=""):
+        """Возвращает ответ на вопрос text; key - имя вопроса в файле ответов"""
+        if key is not None and key in self.answers:
+            answer = self.answers[key]
+            print(f"{text}{answer}  [из файла ответов]")
+            return answer
+
+        fallback = self.defaults.get(key, default) if key is not None else default
+        if self.headless:
+            print(f"{text}{fallback}  [без оператора]")
+            return fallback
+
+        if not self.timeout:
+            return input(text)
+
+        answer = self._input_with_timeout(text, self.timeout)
+        if answer is None:
+            print(f"\nНет ответа за {self.timeout:g} с, используем: {fallback!r}")
+            return fallback
+        return answer
+
+    def _input_with_timeout(self, text, timeout):
+        # Один фоновый поток читает stdin: input() нельзя прервать по таймауту
+        if self._lines is None:
+            self._lines = queue.Queue()
+            threading.Thread(target=self._read_lines, daemon=True).start()
+        # Строки, набранные после прошлого таймаута, к этому вопросу не относятся
+        while not self._lines.empty():
+            self._lines.get_nowait()
+        print(text, end='', flush=True)
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if line is None:
+            raise EOFError
+        return line
+
+    def _read_lines(self):
+        for line in sys.stdin:
+            self._lines.put(line.rstrip('\n'))
+        self._lines.put(None)
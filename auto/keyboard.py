@@ -1,47 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Консольный тест клавиатуры: отмечает каждую нажатую клавишу полной раскладки.
+
+Клавиши читаются через ReadConsoleInputW (скан-код + признак расширенной клавиши),
+поэтому цифры над буквами, цифры NumPad и F1/F10/F11 не путаются между собой.
+На экране перерисовываются только изменившиеся клавиши.
+
+    python auto/keyboard.py --layout iso --labels ru --report keyboard_report.json
+"""
+
+import argparse
+import ctypes
 import os
-import msvcrt
-
-layout = [
-    "ESC  F1 F2 F3 F4 F5 F6 F7 F8 F9 F10 F11 F12",
-    "`  1 2 3 4 5 6 7 8 9 0 - =  BACK",
-    "TAB  Q W E R T Y U I O P [ ] \\",
-    "CAPS A S D F G H J K L ; ' ENTER",
-    "SHIFT Z X C V B N M , . / SHIFT",
-    "CTRL WIN ALT     SPACE     ALT MENU CTRL",
-    "INS DEL HOME END PGUP PGDN",
-    "      ↑      ",
-    "←     ↓     →",
-    "NUM / * -",
-    "7 8 9 +",
-    "4 5 6",
-    "1 2 3 ENTER",
-    "0 ."
-]
-
-def clear():
-    os.system('cls')
-
-def render_layout(last_key=None, error=False):
-    clear()
-    print("Press keys to test them. Ctrl+C to exit.\n")
-    for line in layout:
-        if last_key and last_key.upper() in line.upper():
-            hl = line.upper().replace(last_key.upper(), f"[{last_key.upper()}]")
-            print(hl)
+import sys
+from ctypes import wintypes
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from key_coverage import KeyCoverage, add_layout_arguments, format_untested, layout_from_args
+from session_journal import atomic_write_json
+
+KEY_EVENT = 0x0001
+ENHANCED_KEY = 0x0100
+ENABLE_PROCESSED_INPUT = 0x0001
+ENABLE_LINE_INPUT = 0x0002
+ENABLE_ECHO_INPUT = 0x0004
+ENABLE_VIRTUAL_TERMINAL_PROCESSING = 0x0004
+STD_INPUT_HANDLE = -10
+STD_OUTPUT_HANDLE = -11
+
+EXIT_PRESSES = 3    # столько Esc подряд - выход
+
+TOP = 4             # строка экрана, с которой рисуется раскладка
+UNTESTED = "\x1b[37;100m"
+TESTED = "\x1b[30;42m"
+CURRENT = "\x1b[30;43m"
+RESET = "\x1b[0m"
+
+
+class KEY_EVENT_RECORD(ctypes.Structure):
+    _fields_ = [
+        ("bKeyDown", wintypes.BOOL),
+        ("wRepeatCount", wintypes.WORD),
+        ("wVirtualKeyCode", wintypes.WORD),
+        ("wVirtualScanCode", wintypes.WORD),
+        ("uChar", wintypes.WCHAR),
+        ("dwControlKeyState", wintypes.DWORD),
+    ]
+
+
+class INPUT_RECORD(ctypes.Structure):
+    class _Event(ctypes.Union):
+        # Остальные виды событий (мышь, размер окна) не больше KEY_EVENT_RECORD
+        _fields_ = [("KeyEvent", KEY_EVENT_RECORD)]
+
+    _fields_ = [("EventType", wintypes.WORD), ("Event", _Event)]
+
+
+class Console:
+    """Ввод клавиш без обработки Ctrl+C/эха и вывод с escape-последовательностями"""
+
+    def __init__(self):
+        self.kernel32 = ctypes.windll.kernel32
+        self.stdin = self.kernel32.GetStdHandle(STD_INPUT_HANDLE)
+        self.stdout = self.kernel32.GetStdHandle(STD_OUTPUT_HANDLE)
+        self.in_mode = wintypes.DWORD()
+        self.out_mode = wintypes.DWORD()
+
+    def __enter__(self):
+        self.kernel32.GetConsoleMode(self.stdin, ctypes.byref(self.in_mode))
+        self.kernel32.GetConsoleMode(self.stdout, ctypes.byref(self.out_mode))
+        # Ctrl+C тоже клавиша, которую надо проверить
+        raw = self.in_mode.value & ~(ENABLE_PROCESSED_INPUT | ENABLE_LINE_INPUT | ENABLE_ECHO_INPUT)
+        self.kernel32.SetConsoleMode(self.stdin, raw)
+        self.kernel32.SetConsoleMode(self.stdout, self.out_mode.value | ENABLE_VIRTUAL_TERMINAL_PROCESSING)
+        return self
+
+    def __exit__(self, *exc):
+        self.kernel32.SetConsoleMode(self.stdin, self.in_mode.value)
+        self.kernel32.SetConsoleMode(self.stdout, self.out_mode.value)
+
+    def read_keys(self):
+        """Генератор (нажата, скан-код, расширенная, vk)"""
+        record = INPUT_RECORD()
+        count = wintypes.DWORD()
+        while True:
+            self.kernel32.ReadConsoleInputW(self.stdin, ctypes.byref(record), 1, ctypes.byref(count))
+            if record.EventType != KEY_EVENT:
+                continue
+            event = record.Event.KeyEvent
+            yield (bool(event.bKeyDown), event.wVirtualScanCode,
+                   bool(event.dwControlKeyState & ENHANCED_KEY), event.wVirtualKeyCode)
+
+
+class KeyboardScreen:
+    """Раскладка на экране: полная отрисовка один раз, дальше - только изменившиеся клавиши"""
+
+    def __init__(self, coverage, out=sys.stdout):
+        self.coverage = coverage
+        self.layout = coverage.layout
+        self.cells = self.layout.cells()
+        self.status_row = TOP + max(k.y for k in self.layout.keys) + 2
+        self.current = None
+        self.out = out
+
+    def draw_all(self):
+        self.out.write("\x1b[2J\x1b[H")
+        self.out.write(f"Нажмите каждую клавишу по очереди. Выход: Esc {EXIT_PRESSES} раза подряд.\n")
+        self.out.write("NumLock должен быть включен, иначе цифры NumPad совпадут с Home/End/стрелками.\n")
+        for index in range(len(self.cells)):
+            self._cell(index)
+        self.status()
+
+    def _cell(self, index):
+        row, col, width = self.cells[index]
+        if index == self.current:
+            style = CURRENT
+        elif self.coverage.is_tested(index):
+            style = TESTED
         else:
-            print(line)
-    if error:
-        print("\n[ERROR] Unrecognized key pressed!")
-
-try:
-    while True:
-        render_layout()
-        key = msvcrt.getch()
-        try:
-            decoded = key.decode('utf-8').upper()
-            render_layout(decoded)
-        except UnicodeDecodeError:
-            render_layout(last_key=None, error=True)
-except KeyboardInterrupt:
-    clear()
-    print("Exiting tester.")
\ No newline at end of file
+            style = UNTESTED
+        label = self.layout.keys[index].label
+        self.out.write(f"\x1b[{TOP + row};{col + 1}H{style}{label.center(width)}{RESET}")
+
+    def press(self, index):
+        previous, self.current = self.current, index
+        if previous is not None and previous != index:
+            self._cell(previous)
+        self._cell(index)
+
+    def status(self, message=""):
+        tested = self.coverage.tested_count
+        total = len(self.layout)
+        self.out.write(f"\x1b[{self.status_row};1H\x1b[2KПроверено: {tested} из {total}")
+        if message:
+            self.out.write(f"   {message}")
+        self.out.write(f"\x1b[{self.status_row + 1};1H")
+        self.out.flush()
+
+
+def run(coverage):
+    screen = KeyboardScreen(coverage)
+    esc_index = coverage.layout.find(0x01)
+    esc_in_row = 0
+    with Console() as console:
+        screen.draw_all()
+        for down, scan_code, extended, vk in console.read_keys():
+            index = coverage.layout.find(scan_code, extended, vk)
+            if index is None:
+                if down:
+                    screen.status(f"Клавиша вне раскладки: скан-код {scan_code:#04x}, vk {vk:#04x}")
+                continue
+            # PrtSc присылает только отпускание, поэтому засчитываем и его
+            first = coverage.press(index)
+            if not down:
+                if first:
+                    screen.press(index)
+                    screen.status(coverage.layout.keys[index].name)
+                continue
+            screen.press(index)
+            esc_in_row = esc_in_row + 1 if index == esc_index else 0
+            screen.status(coverage.layout.keys[index].name)
+            if esc_in_row >= EXIT_PRESSES or coverage.complete:
+                break
+    print(RESET)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Тест клавиатуры по полной раскладке")
+    add_layout_arguments(parser)
+    args = parser.parse_args()
+
+    layout = layout_from_args(args)
+    coverage = KeyCoverage(layout)
+    run(coverage)
+
+    report = coverage.report()
+    print(f"Проверено клавиш: {report['tested']} из {report['total']}")
+    print(f"Клавиатура: {format_untested(report['untested'])}")
+    if args.report:
+        atomic_write_json(args.report, report)
+
+
+if __name__ == "__main__":
+    main()
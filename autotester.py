@@ -3,9 +3,8 @@ import psutil
 import subprocess
 import shutil
 import csv
-import cv2
-from playsound import playsound
-from pynput import mouse, keyboard
+
+# cv2, playsound and pynput are heavy: each test imports what it needs on first use
 
 # ======================= CONFIG =======================
 CSV_PATH = 'test_results.csv'
@@ -28,10 +27,14 @@ def ask_run_exe(path):
         subprocess.Popen(path)
 
 def test_speaker():
+    from playsound import playsound
+
     print("Testing speakers...")
     playsound('speaker_test.wav')
 
 def test_camera():
+    import cv2
+
     print("Testing camera (press Q to quit)...")
     cap = cv2.VideoCapture(0)
     while True:
@@ -45,6 +48,8 @@ def test_camera():
     cv2.destroyAllWindows()
 
 def test_mouse_buttons():
+    from pynput import mouse
+
     result = {"left": False, "right": False}
     def on_click(x, y, button, pressed):
         if pressed:
@@ -64,6 +69,8 @@ def test_mouse_buttons():
     return result
 
 def test_keyboard():
+    from pynput import keyboard
+
     pressed_keys = set()
 
     def on_press(key):
@@ -130,10 +137,14 @@ def log_results(info, mouse_result, keys):
         ])
 
 # ======================= MAIN =======================
-print("=== HARDWARE TESTER START ===")
-hardware_info = get_hardware_info()
-mouse_buttons = test_mouse_buttons()
-keyboard_keys = test_keyboard()
-run_external_tools()
-log_results(hardware_info, mouse_buttons, keyboard_keys)
-print("=== TEST COMPLETE ===")
\ No newline at end of file
+def main():
+    print("=== HARDWARE TESTER START ===")
+    hardware_info = get_hardware_info()
+    mouse_buttons = test_mouse_buttons()
+    keyboard_keys = test_keyboard()
+    run_external_tools()
+    log_results(hardware_info, mouse_buttons, keyboard_keys)
+    print("=== TEST COMPLETE ===")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
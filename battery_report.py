@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Разбор отчета powercfg /batteryreport (XML, с HTML как запасным вариантом)"""
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional
+
+CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class Battery:
+    name: str = ""
+    manufacturer: str = ""
+    serial: str = ""
+    chemistry: str = ""
+    design_mwh: int = 0
+    full_charge_mwh: int = 0
+    cycle_count: Optional[int] = None
+
+    @property
+    def health(self):
+        """Остаточная емкость в процентах от паспортной"""
+        if not self.design_mwh:
+            return None
+        return round(self.full_charge_mwh / self.design_mwh * 100, 2)
+
+
+class CapacityEntry(NamedTuple):
+    start: str
+    end: str
+    full_charge_mwh: int
+    design_mwh: int
+
+
+class UsageEntry(NamedTuple):
+    start: str
+    end: str
+    battery_active_s: Optional[int]
+    battery_standby_s: Optional[int]
+    ac_active_s: Optional[int]
+    ac_standby_s: Optional[int]
+
+
+@dataclass
+class BatteryReport:
+    batteries: List[Battery] = field(default_factory=list)
+    capacity_history: List[CapacityEntry] = field(default_factory=list)
+    usage_history: List[UsageEntry] = field(default_factory=list)
+
+
+def parse_mwh(text):
+    """'56,018 mWh' / '56 018 mWh' / '56018' -> 56018"""
+    digits = re.sub(r"\D", "", (text or "").split("mWh")[0])
+    return int(digits) if digits else 0
+
+
+def parse_int(text):
+    digits = re.sub(r"\D", "", text or "")
+    return int(digits) if digits else None
+
+
+def parse_hms(text):
+    """'27:23:58' -> секунды, '-' -> None"""
+    parts = (text or "").strip().split(":")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts):
+        return None
+    hours, minutes, seconds = map(int, parts)
+    return hours * 3600 + minutes * 60 + seconds
+
+
+_ISO_DURATION = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$")
+
+
+def parse_iso_duration(text):
+    """'PT16H22M29S' -> секунды"""
+    match = _ISO_DURATION.match((text or "").strip())
+    if not match or not text.strip("P"):
+        return None
+    days, hours, minutes, seconds = (float(g) if g else 0 for g in match.groups())
+    return int(days * 86400 + hours * 3600 + minutes * 60 + seconds)
+
+
+def split_period(text):
+    """'2024-06-24 - 2024-12-02' -> ('2024-06-24', '2024-12-02')"""
+    start, _, end = " ".join((text or "").split()).partition(" - ")
+    return start, end
+
+
+# ======================= XML =======================
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+def parse_xml(path):
+    """Потоковый разбор XML-отчета (powercfg /batteryreport /xml)"""
+    report = BatteryReport()
+    battery = None
+
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            if tag == "Battery":
+                battery = Battery()
+            continue
+
+        if battery is not None:
+            text = (elem.text or "").strip()
+            if tag == "Id":
+                battery.name = text
+            elif tag == "Manufacturer":
+                battery.manufacturer = text
+            elif tag == "SerialNumber":
+                battery.serial = text
+            elif tag == "Chemistry":
+                battery.chemistry = text
+            elif tag == "DesignCapacity":
+                battery.design_mwh = parse_mwh(text)
+            elif tag == "FullChargeCapacity":
+                battery.full_charge_mwh = parse_mwh(text)
+            elif tag == "CycleCount":
+                battery.cycle_count = parse_int(text)
+            elif tag == "Battery":
+                report.batteries.append(battery)
+                battery = None
+        elif tag == "HistoryEntry":
+            attrs = elem.attrib
+            start = attrs.get("LocalStartDate", "")[:10]
+            end = attrs.get("LocalEndDate", "")[:10]
+            report.capacity_history.append(CapacityEntry(
+                start, end,
+                parse_mwh(attrs.get("FullChargeCapacity")),
+                parse_mwh(attrs.get("DesignCapacity")),
+            ))
+            report.usage_history.append(UsageEntry(
+                start, end,
+                parse_iso_duration(attrs.get("ActiveDcTime")),
+                parse_iso_duration(attrs.get("CsDcTime")),
+                parse_iso_duration(attrs.get("ActiveAcTime")),
+                parse_iso_duration(attrs.get("CsAcTime")),
+            ))
+        # Не держим в памяти уже разобранные элементы
+        if tag in ("Battery", "HistoryEntry") or battery is None:
+            elem.clear()
+
+    return report
+
+
+# ======================= HTML =======================
+
+# Порядок разделов h2 в отчете, на случай локализованных заголовков
+SECTION_ORDER = ["installed batteries", "recent usage", "battery usage", "usage history",
+                 "battery capacity history", "battery life estimates"]
+
+# Строки таблицы "Installed batteries" по порядку
+BATTERY_LABELS = ["NAME", "MANUFACTURER", "SERIAL NUMBER", "CHEMISTRY",
+                  "DESIGN CAPACITY", "FULL CHARGE CAPACITY", "CYCLE COUNT"]
+
+
+class _ReportHTMLParser(HTMLParser):
+    """Однопроходный разбор таблиц HTML-отчета"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.report = BatteryReport()
+        self.section = None
+        self.section_index = -1
+        self.in_h2 = False
+        self.h2_text = []
+        self.in_thead = False
+        self.row = None
+        self.cell = None
+        self.battery_row = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "h2":
+            self.in_h2 = True
+            self.h2_text = []
+        elif tag == "thead":
+            self.in_thead = True
+        elif tag == "tr":
+            self.row = []
+        elif tag in ("td", "th") and self.row is not None:
+            self.cell = []
+
+    def handle_endtag(self, tag):
+        if tag == "h2":
+            self.in_h2 = False
+            self.section_index += 1
+            title = " ".join("".join(self.h2_text).split()).lower()
+            if title in SECTION_ORDER:
+                self.section = title
+            elif self.section_index < len(SECTION_ORDER):
+                self.section = SECTION_ORDER[self.section_index]
+            else:
+                self.section = title
+            self.battery_row = 0
+        elif tag == "thead":
+            self.in_thead = False
+        elif tag in ("td", "th") and self.cell is not None:
+            self.row.append(" ".join("".join(self.cell).split()))
+            self.cell = None
+        elif tag == "tr" and self.row is not None:
+            if self.row:
+                self.handle_row(self.row)
+            self.row = None
+
+    def handle_data(self, data):
+        if self.in_h2:
+            self.h2_text.append(data)
+        elif self.cell is not None:
+            self.cell.append(data)
+
+    def handle_row(self, cells):
+        if self.section == "installed batteries":
+            if self.in_thead:
+                # Заголовок "BATTERY 1", "BATTERY 2"... - по столбцу на батарею
+                self.report.batteries = [Battery() for _ in cells[1:]]
+                return
+            label = cells[0].upper()
+            if label not in BATTERY_LABELS and self.battery_row < len(BATTERY_LABELS):
+                label = BATTERY_LABELS[self.battery_row]
+            self.battery_row += 1
+            for battery, value in zip(self.report.batteries, cells[1:]):
+                self._set_battery_field(battery, label, value)
+        elif self.in_thead:
+            return
+        elif self.section == "battery capacity history" and len(cells) >= 3:
+            start, end = split_period(cells[0])
+            self.report.capacity_history.append(
+                CapacityEntry(start, end, parse_mwh(cells[1]), parse_mwh(cells[2])))
+        elif self.section == "usage history" and len(cells) >= 6:
+            start, end = split_period(cells[0])
+            # cells[3] - пустой разделитель между батареей и сетью
+            self.report.usage_history.append(UsageEntry(
+                start, end, parse_hms(cells[1]), parse_hms(cells[2]),
+                parse_hms(cells[4]), parse_hms(cells[5])))
+
+    @staticmethod
+    def _set_battery_field(battery, label, value):
+        if label == "NAME":
+            battery.name = value
+        elif label == "MANUFACTURER":
+            battery.manufacturer = value
+        elif label == "SERIAL NUMBER":
+            battery.serial = value
+        elif label == "CHEMISTRY":
+            battery.chemistry = value
+        elif label == "DESIGN CAPACITY":
+            battery.design_mwh = parse_mwh(value)
+        elif label == "FULL CHARGE CAPACITY":
+            battery.full_charge_mwh = parse_mwh(value)
+        elif label == "CYCLE COUNT":
+            battery.cycle_count = parse_int(value)
+
+
+def parse_html(path):
+    """Потоковый разбор HTML-отчета: файл читается кусками, а не целиком"""
+    parser = _ReportHTMLParser()
+    with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.feed(chunk)
+    parser.close()
+    return parser.report
+
+
+def parse_battery_report(path):
+    """Разбирает отчет по расширению файла (.xml или .html)"""
+    if str(path).lower().endswith(".xml"):
+        return parse_xml(path)
+    return parse_html(path)
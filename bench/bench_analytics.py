@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер analytics.py на синтетическом годе работы линии.
+
+Заполняет временную базу: --laptops ноутбуков за год, шаги из test_registry.py и
+фоновые сборщики, несколько проверяющих (один медленный) и моделей (на одной из них
+медленно идет камера). Сверяет групповые процентили с np.percentile, проверяет,
+что медленные проверяющий и модель найдены, и печатает время загрузки и расчета.
+
+    python bench/bench_analytics.py --laptops 25000
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from analytics import Timings, checker_table, group_percentiles, model_outliers, print_report, trend_table
+from results_db import ResultsStore
+from test_registry import TESTS
+
+COLLECTORS = ('inventory', 'smart', 'battery_report', 'audio_devices', 'cameras', 'microphones',
+              'touch_devices', 'pointing_devices', 'device_errors')
+CHECKERS = ("Иванов", "Петров", "Сидорова", "Кузнецов", "Медленный")
+MODELS = ("HP EliteBook 840 G5", "Dell Latitude 7490", "Lenovo ThinkPad T480", "SlowCam X1")
+
+
+def fill(store, laptops, seed=1):
+    rng = np.random.default_rng(seed)
+    first_day = date(2025, 10, 1)
+    results, timings = [], []
+    base = {spec.name: rng.uniform(20, 240) for spec in TESTS}
+    for n in range(laptops):
+        serial = f"SN{n:07d}"
+        checker = CHECKERS[rng.integers(len(CHECKERS))]
+        model = MODELS[rng.integers(len(MODELS))]
+        day = first_day + timedelta(days=int(n * 365 / laptops))
+        slow = 1.8 if checker == "Медленный" else 1.0
+        steps = []
+        for spec in TESTS:
+            factor = slow * (3.0 if model == "SlowCam X1" and spec.name == "Камера" else 1.0)
+            steps.append({'step': spec.name, 'operator': True, 'status': 'ok',
+                          'duration': round(float(base[spec.name] * factor * rng.lognormal(0, 0.3)), 3)})
+        for name in COLLECTORS:
+            steps.append({'step': name, 'operator': False, 'status': 'ok', 'duration': round(float(rng.gamma(2, 1.5)), 3)})
+        results.append((serial, model, checker, day.isoformat() + "T12:00:00", "{}"))
+        timings.append((serial, steps))
+    with store.conn:
+        store.conn.executemany(
+            "INSERT INTO results (serial_number, model, checker, tested_at, updated_at, row_json) "
+            "VALUES (?, ?, ?, ?, '', ?)", results)
+        for serial, steps in timings:
+            store._save_steps(serial, steps)
+    return sum(len(steps) for _, steps in timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--laptops", type=int, default=25000)
+    args = parser.parse_args(argv)
+    failures = []
+
+    rng = np.random.default_rng(0)
+    groups = rng.integers(0, 50, 20000)
+    values = rng.exponential(60, 20000)
+    ours = group_percentiles(groups, values, 52, (50, 90, 99))
+    expected = np.array([np.percentile(values[groups == g], (50, 90, 99)) if (groups == g).any()
+                         else [np.nan] * 3 for g in range(52)])
+    if not np.allclose(ours, expected, equal_nan=True):
+        failures.append("group_percentiles не совпадает с np.percentile")
+
+    with tempfile.TemporaryDirectory() as root:
+        with ResultsStore(os.path.join(root, "bench.db")) as store:
+            rows = fill(store, args.laptops)
+            start = time.perf_counter()
+            columns = store.step_columns()
+            loaded = time.perf_counter()
+            timings = Timings(columns)
+            grouped = time.perf_counter()
+            with redirect_stdout(io.StringIO()) as report:
+                print_report(timings)
+            done = time.perf_counter()
+    print(f"Строк: {rows}, ноутбуков: {args.laptops}")
+    print(f"Загрузка {loaded - start:.2f} с, группировка {grouped - loaded:.2f} с, отчет {done - grouped:.2f} с")
+    print(f"Отчет: {len(report.getvalue().splitlines())} строк")
+
+    checkers = checker_table(timings)
+    if checkers[-1][0] != "Медленный":
+        failures.append(f"медленный проверяющий не последний: {checkers[-1][0]}")
+    outliers = model_outliers(timings)
+    if not outliers or outliers[0][:2] != ("SlowCam X1", "Камера"):
+        failures.append(f"не найдена медленная камера: {outliers[:1]}")
+    weeks = trend_table(timings)
+    if sum(row[1] for row in weeks) != args.laptops:
+        failures.append("ноутбуки по неделям не сходятся с общим числом")
+    if done - start > 5:
+        failures.append("расчет дольше 5 с")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер camera_check.py на синтетических видео (без камеры, подходит для Linux).
+
+Создает во временном каталоге ролики без потерь (FFV1): нормальная сцена, черный экран,
+застывшая картинка, заливка цветом, размытие, застрявший и мертвый пиксели. Для каждого
+проверяет, что найдена именно заложенная неисправность, и печатает скорость анализа.
+
+    python bench/bench_camera.py --size 640x480 --frames 90
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import cv2
+import numpy as np
+
+from camera_check import check_camera
+
+FPS = 30
+STUCK_AT = (37, 21)     # x, y
+DEAD_AT = (90, 60)
+# Ролики, снятые «с включения камеры»: первые кадры черные, их отбрасывает warmup
+WARMUP = {"warmup": 0.5}
+
+
+def scene(rng, width, height, frames, shift=True):
+    """Текстура со сдвигом и шумом сенсора - так выглядит обычная камера"""
+    texture = rng.integers(0, 256, (height // 8 + 2, width // 8 + 2, 3), dtype=np.uint8)
+    texture = cv2.resize(texture, (width + 16, height + 16), interpolation=cv2.INTER_NEAREST)
+    for i in range(frames):
+        dx = i % 8 if shift else 0
+        frame = texture[8:8 + height, dx:dx + width].astype(np.int16)
+        frame += rng.integers(-3, 4, frame.shape, dtype=np.int16)
+        yield np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def cases(width, height, frames, seed=1):
+    rng = np.random.default_rng(seed)
+    base = list(scene(rng, width, height, frames))
+    yield "ok", base, lambda r: r.ok
+
+    yield "black", [np.clip(rng.integers(0, 4, (height, width, 3)), 0, 255).astype(np.uint8)
+                    for _ in range(frames)], lambda r: r.black_frames == r.frames
+
+    # Пара черных кадров посреди нормального видео - не неисправность
+    glitch = [f if i not in (10, 11) else np.zeros_like(f) for i, f in enumerate(base)]
+    yield "glitch", glitch, lambda r: r.black_frames == 2 and r.ok
+
+    warming = [np.zeros_like(f) if i < FPS // 3 else f for i, f in enumerate(base)]
+    yield "warmup", warming, lambda r: r.black_frames == 0 and r.ok
+
+    yield "frozen", [base[0]] * frames, lambda r: r.frozen_frames == r.frames - 1
+
+    green = np.zeros((height, width, 3), np.uint8)
+    green[..., 1] = 200
+    yield "solid", [green] * frames, lambda r: r.solid_frames == r.frames
+
+    yield "blur", [cv2.GaussianBlur(f, (0, 0), 6) for f in base], \
+        lambda r: r.blur_score < 60 and "нет фокуса" in "; ".join(r.problems())
+
+    stuck = [f.copy() for f in base]
+    for f in stuck:
+        f[STUCK_AT[1], STUCK_AT[0]] = 255
+        f[DEAD_AT[1] - 1:DEAD_AT[1] + 2, DEAD_AT[0] - 1:DEAD_AT[0] + 2] = np.maximum(
+            f[DEAD_AT[1] - 1:DEAD_AT[1] + 2, DEAD_AT[0] - 1:DEAD_AT[0] + 2], 150)
+        f[DEAD_AT[1], DEAD_AT[0]] = 0
+    yield "pixels", stuck, lambda r: (list(STUCK_AT) in r.stuck_pixels and list(DEAD_AT) in r.dead_pixels)
+
+
+def write_clip(path, frames):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"FFV1"), FPS, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError("OpenCV не может записать FFV1")
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", default="320x240")
+    parser.add_argument("--frames", type=int, default=60)
+    args = parser.parse_args(argv)
+    width, height = (int(v) for v in args.size.split("x"))
+
+    failures = []
+    print(f"{'ролик':<10} {'кадров':>7} {'fps':>6} {'кадр/с анализа':>15}  итог")
+    with tempfile.TemporaryDirectory() as root:
+        for name, frames, expected in cases(width, height, args.frames):
+            path = os.path.join(root, f"{name}.avi")
+            write_clip(path, frames)
+            start = time.perf_counter()
+            report = check_camera(path, seconds=1e9, warmup=WARMUP.get(name))
+            elapsed = time.perf_counter() - start
+            status = "ok" if expected(report) else "ОШИБКА"
+            if status != "ok":
+                failures.append(name)
+            print(f"{name:<10} {report.frames:>7} {report.fps:>6.1f} {report.frames / elapsed:>15.0f}  {status}"
+                  f"  [{'; '.join(report.problems()) or 'проблем нет'}]")
+
+    if failures:
+        print(f"\nНе распознано: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
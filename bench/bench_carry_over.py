@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер переноса пройденных шагов при повторной проверке (carry_over.py).
+
+Четыре прохода тестера без оператора (во временном каталоге, на записанном выводе
+wmic и отчете powercfg): первая проверка, повторная с тем же железом (пройденные
+шаги переносятся), повторная после замены батареи и повторная после замены матрицы
+(шаг «Батарея» или «Экран» выполняется заново, остальные переносятся). Шаги без входов-сборщиков (клавиатура и т.п.)
+должны выполняться заново всегда. Проверка герметична: команды оболочки (wmic,
+powershell, net accounts, powercfg) не выполняются, а только записываются, камера
+не открывается, smartctl не вызывается. Печатает время каждого прохода.
+
+    python bench/bench_carry_over.py
+"""
+
+import io
+import os
+import sys
+import tempfile
+import subprocess
+import time
+from contextlib import redirect_stdout
+from unittest import mock
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from answers import Answers
+from battery_report import parse_battery_report
+from hardware_inventory import RecordedBackend
+from laptop_tester import LaptopTester
+from results_db import ResultsStore
+from test_registry import TESTS
+
+FIXTURES = os.path.join(BENCH_DIR, "fixtures")
+WMIC = os.path.join(FIXTURES, "wmic", "lenovo_thinkpad_t480_dual_disk.txt")
+BATTERIES = (os.path.join(FIXTURES, "powercfg", "thinkpad_t480_dual.xml"),
+             os.path.join(FIXTURES, "powercfg", "hp_elitebook_850_g5.html"))
+# EDID матриц (WmiMonitorID): производитель, код модели, серийник
+PANELS = ("LGD 0554 0", "AUO 403D 0")
+ANSWERS = {key: 'y' for key in ('hardware_ok', 'audio_test_ok', 'camera_ok', 'ssd_tool_ok', 'battery_ok',
+                                'screen_ok', 'keyboard_ok', 'mouse_test_ok', 'microphone_ok',
+                                'devicemanager_ok', 'touchpad_ok', 'carry_over', 'battery_open_report')}
+ANSWERS.update(checker="Стенд", comment="", notebook_number="1")
+
+
+class BenchTester(LaptopTester):
+    """Тестер на записанных данных: батарею можно «заменить» между проходами"""
+
+    battery = BATTERIES[0]
+    panel = PANELS[0]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    def run_command(self, command, capture_output=True, shell=True, encoding='cp866'):
+        """Команды оболочки только записываются: проверка не трогает настройки машины"""
+        self.commands.append(command)
+        return "" if capture_output else True
+
+    def collectors(self):
+        collectors = super().collectors()
+        collectors['smart'] = lambda: None
+        collectors['battery_report'] = lambda: parse_battery_report(self.battery)
+        for name in ('audio_devices', 'cameras', 'microphones', 'touch_devices', 'pointing_devices',
+                     'device_errors'):
+            collectors[name] = lambda name=name: f"{name}: устройство 1"
+        collectors['monitors'] = lambda: self.panel
+        return collectors
+
+
+def run(battery, panel=PANELS[0]):
+    BenchTester.battery = battery
+    BenchTester.panel = panel
+    tester = BenchTester(RecordedBackend(path=WMIC), answers=Answers(dict(ANSWERS), headless=True),
+                         deterministic=True)
+    start = time.perf_counter()
+    # Все, что прошло мимо run_command (subprocess напрямую), - ошибка проверки
+    forbidden = mock.Mock(side_effect=AssertionError("запуск процесса в проверке без оператора"))
+    with redirect_stdout(io.StringIO()), \
+            mock.patch.multiple(subprocess, run=forbidden, call=forbidden, Popen=forbidden):
+        tester.run_all_tests()
+    elapsed = time.perf_counter() - start
+    tester.spawned = [call.args for call in forbidden.call_args_list]
+    tester.store.close()
+    return tester, elapsed
+
+
+def main():
+    failures = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            first, first_time = run(BATTERIES[0])
+            same, same_time = run(BATTERIES[0])
+            swapped, swapped_time = run(BATTERIES[1])
+            # Батарея снова первая: отпечаток «Батареи» совпадает с сохраненным последним
+            run(BATTERIES[0])
+            new_panel, panel_time = run(BATTERIES[0], PANELS[1])
+            with ResultsStore(first.db_file) as store:
+                stored, _ = store.passed_steps(first.results.get('serial_number'))
+        finally:
+            os.chdir(cwd)
+
+    passed = sorted(first.results.get('passed_steps', {}))
+    print(f"Первая проверка: {first_time:.2f} с, пройдено шагов: {len(passed)}")
+    print(f"Повторная, то же железо: {same_time:.2f} с, перенесено: {len(same.carried)}")
+    print(f"Повторная, другая батарея: {swapped_time:.2f} с, перенесено: {len(swapped.carried)}")
+    print(f"Повторная, другая матрица: {panel_time:.2f} с, перенесено: {len(new_panel.carried)}")
+
+    if 'Батарея' not in passed or not stored:
+        failures.append("пройденные шаги не сохранились в базе")
+    if sorted(same.carried) != passed:
+        failures.append(f"перенесены не все пройденные шаги: {sorted(set(passed) - same.carried)}")
+    if 'Батарея' in swapped.carried or sorted(swapped.carried) != sorted(set(passed) - {'Батарея'}):
+        failures.append("после замены батареи шаг перенесен или перенесено лишнее")
+    if 'Экран' not in passed or sorted(new_panel.carried) != sorted(set(passed) - {'Экран'}):
+        failures.append("после замены матрицы шаг «Экран» перенесен или перенесено лишнее")
+    # В перенос шага попадают только его собственные результаты, не то, что записали фоновые задачи
+    owned = {spec.name: set(spec.results) for spec in TESTS}
+    foreign = {name: sorted(set(entry['results']) - owned[name]) for name, entry in stored.items()
+               if set(entry['results']) - owned[name]}
+    if foreign:
+        failures.append(f"в переносе шагов чужие результаты: {foreign}")
+    if same.results.get('battery_cycles') != first.results.get('battery_cycles'):
+        failures.append("результаты перенесенного шага не восстановлены")
+    if any(name in same.results.get('step_timings', {}) for name in same.carried):
+        failures.append("перенесенные шаги попали в длительности")
+
+    # Замену клавиатуры не видно ни одному сборщику - такой шаг проходится заново
+    if first.results.get('keyboard_ok') is not True:
+        failures.append("клавиатура не прошла в первой проверке, проверка переноса бессмысленна")
+    for spec in TESTS:
+        if not spec.inputs and (spec.name in same.carried or spec.name not in same.results.get('step_timings', {})):
+            failures.append(f"шаг без входов {spec.name!r} перенесен вместо повторного выполнения")
+
+    spawned = [args for tester in (first, same, swapped, new_panel) for args in tester.spawned]
+    if spawned:
+        failures.append(f"запущены процессы: {spawned}")
+    if any('camera_problems' in tester.results for tester in (first, same, swapped, new_panel)):
+        failures.append("без оператора выполнялась автоматическая проверка камеры")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Нагрузочный тест сервера сбора: много станций на одной машине.
+
+Поднимает collector.py на 127.0.0.1 во временном каталоге, каждой станции заполняет
+свой outbox/ и отправляет все очереди одновременно. Проверяет, что в базу попала
+каждая строка ровно один раз (в том числе после повторной отправки), что неверные
+сообщения (битый base64, SMART без обязательного поля) отклоняются по одному, не
+мешая остальным из той же пачки, и печатает строк/с и время отправки одной станции.
+
+    python bench/bench_collector.py --stations 200 --rows 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from collector import Collector
+from outbox import Outbox
+from results_db import CSV_HEADERS, ResultsStore
+
+
+def make_row(station, number):
+    row = {header: '+' for header in CSV_HEADERS}
+    row.update({'Номер': str(number), 'Бренд': 'Lenovo', 'Модель': 'ThinkPad T480',
+                'Серийный номер': f"SN-{station:04d}-{number:05d}", 'Комментарий': ''})
+    return row
+
+
+def fill_outboxes(root, stations, rows):
+    outboxes = []
+    for station in range(stations):
+        outbox = Outbox(os.path.join(root, "outbox", f"station{station}"))
+        for number in range(rows):
+            outbox.put(make_row(station, number), tested_at="2024-01-01T10:00:00", station=f"station{station}")
+        outboxes.append(outbox)
+    return outboxes
+
+
+def corrupt(path, **fields):
+    with open(path, 'r', encoding='utf-8') as f:
+        message = json.load(f)
+    message.update(fields)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(message, f, ensure_ascii=False)
+
+
+async def flush_timed(outbox, port):
+    start = time.perf_counter()
+    sent = await outbox.flush_async("127.0.0.1", port, timeout=60)
+    return sent, time.perf_counter() - start
+
+
+async def run(root, stations, rows, batch_size):
+    db_path = os.path.join(root, "central.db")
+    collector = Collector(db_path, os.path.join(root, "collected"), batch_size=batch_size)
+    _, port = await collector.start("127.0.0.1", 0)
+    try:
+        outboxes = fill_outboxes(root, stations, rows)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(flush_timed(outbox, port) for outbox in outboxes))
+        elapsed = time.perf_counter() - start
+
+        # Повтор: те же сообщения приходят второй раз (станция не дождалась подтверждения)
+        first = Outbox(os.path.join(root, "outbox", "resend"))
+        for number in range(rows):
+            first.put(make_row(0, number), station="station0")
+        again = Outbox(os.path.join(root, "outbox", "resend-again"))
+        shutil.copytree(first.directory, again.directory)
+        await first.flush_async("127.0.0.1", port)
+        await again.flush_async("127.0.0.1", port)
+        outboxes += [first, again]
+
+        # Пачка с двумя неверными сообщениями: подтверждаются все, кроме них
+        mixed = Outbox(os.path.join(root, "outbox", "mixed"))
+        for number in range(rows):
+            mixed.put(make_row(stations, number), tested_at="2024-01-01T10:00:00", station="mixed")
+        broken = mixed.pending()[:2]
+        corrupt(broken[0], artifacts={"battery_report.html": "не base64!"})
+        corrupt(broken[1], smart=[{"device": "/dev/sda"}])
+        mixed_sent = await mixed.flush_async("127.0.0.1", port)
+        mixed_left = mixed.pending()
+    finally:
+        await collector.stop()
+
+    sent = sum(count for count, _ in results)
+    durations = sorted(seconds for _, seconds in results)
+    with ResultsStore(db_path) as store:
+        stored = store.count()
+        messages = store.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    left = sum(len(outbox.pending()) for outbox in outboxes)
+    print(f"Пачка с неверными сообщениями: подтверждено {mixed_sent} из {rows}, "
+          f"отклонено {len(mixed_left)}")
+
+    total = stations * rows
+    print(f"Станций: {stations}, строк на станцию: {rows}, всего: {total}")
+    print(f"Подтверждено: {sent}, в базе строк: {stored}, сообщений: {messages}, осталось в outbox: {left}")
+    print(f"Пачек записи: {collector.batches}, в среднем строк в пачке: {collector.received / collector.batches:.1f}")
+    print(f"Время: {elapsed:.2f} с, {total / elapsed:.0f} строк/с")
+    print(f"Отправка одной станции: p50 {statistics.median(durations) * 1000:.0f} мс, "
+          f"p99 {durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000:.0f} мс")
+
+    # Сообщения повтора обновляют те же серийники, дубли не записываются
+    ok = (sent == total and stored == total + rows - 2 and messages == total + 2 * rows - 2 and left == 0
+          and mixed_sent == rows - 2 and mixed_left == broken)
+    print("ok" if ok else "ОШИБКА: потеряны или задвоены строки")
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stations", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as root:
+        return asyncio.run(run(root, args.stations, args.rows, args.batch_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
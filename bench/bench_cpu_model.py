@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер cpu_model.py: корпус названий из WMI и перенормализация базы.
+
+Проверяет, что метка каждого названия из bench/fixtures/cpu/ разбирается в ту же
+модель, что старый разбор i5-/i7- дает те же метки, и что ни одно название Intel/AMD
+не остается без линейки. Затем заполняет временную базу строками (часть - с исходным
+названием из WMI, часть - только со старой колонкой CPU), замеряет renormalize и
+проверяет, что повторный проход ничего не меняет.
+
+    python bench/bench_cpu_model.py --rows 200000
+"""
+
+import argparse
+import glob
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from cpu_model import classify, cpu_label, parse_cpu, renormalize
+from results_db import ResultsStore
+
+CORPUS = os.path.join(BENCH_DIR, "fixtures", "cpu", "*.txt")
+
+
+def corpus():
+    names = []
+    for path in sorted(glob.glob(CORPUS)):
+        with open(path, encoding='utf-8') as f:
+            names += [line.rstrip("\n") for line in f if line.strip()]
+    return names
+
+
+def legacy_label(name):
+    """Разбор, который был в save_results до cpu_model.py"""
+    if "i5-" in name:
+        return "i5-" + name.split("i5-")[1].split()[0]
+    if "i7-" in name:
+        return "i7-" + name.split("i7-")[1].split()[0]
+    return ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    args = parser.parse_args(argv)
+    failures = []
+
+    names = corpus()
+    start = time.perf_counter()
+    models = [classify(name) for name in names]
+    elapsed = time.perf_counter() - start
+    print(f"Корпус: {len(names)} названий, {elapsed / len(names) * 1e6:.1f} мкс на название без кэша")
+    for name, model in zip(names, models):
+        if model is None:
+            continue
+        if classify(model.label) != model:
+            failures.append(f"метка {model.label!r} разбирается иначе, чем {name!r}")
+        if legacy_label(name) and legacy_label(name) != model.label:
+            failures.append(f"{name!r}: {model.label!r} вместо прежнего {legacy_label(name)!r}")
+        if model.vendor in ("Intel", "AMD") and not model.brand:
+            failures.append(f"{name!r}: линейка не распознана")
+
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        with ResultsStore(os.path.join(tmp, "results.db")) as store:
+            tested_at = datetime(2026, 1, 1)
+            with store.conn:
+                for i in range(args.rows):
+                    name = rng.choice(names)
+                    # Старые строки: только колонка CPU от прежнего разбора
+                    keep_name = rng.random() < 0.5
+                    row = {'Серийный номер': f"SN{i:07d}", 'CPU': legacy_label(name)}
+                    store._upsert(row, tested_at, None, name if keep_name else None)
+            parse_cpu.cache_clear()
+            start = time.perf_counter()
+            total, changed = renormalize(store)
+            elapsed = time.perf_counter() - start
+            print(f"renormalize: {total} строк, изменено {changed} за {elapsed:.2f} с")
+            _, again = renormalize(store, dry_run=True)
+            serials, stored_names, labels = store.cpu_columns()
+    if again:
+        failures.append(f"повторный проход изменил бы еще {again} строк")
+    wrong = sum(1 for name, label in zip(stored_names, labels) if name and label != cpu_label(name))
+    if wrong:
+        failures.append(f"{wrong} строк с названием из WMI получили не ту метку")
+
+    if failures:
+        print("\nОШИБКИ:")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Бенчмарк индекса drivedb.py против разбора drivedb.h и перебора всех записей.
+
+Для каждой записи базы строится пример модели по ее регулярному выражению; поиск через
+индекс должен вернуть ту же запись, что и последовательный перебор (как в smartctl).
+Печатает время сборки индекса, «холодного» старта (открытие + первый поиск) и поиска,
+проверяет автоматическую пересборку при изменении drivedb.h.
+
+    python bench/bench_drivedb.py [--source smartmontools/bin/drivedb.h]
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+try:
+    from re import _constants as sre, _parser as sre_parse
+except ImportError:     # Python < 3.11
+    import sre_constants as sre
+    import sre_parse
+
+from drivedb import DRIVEDB_PATH, DriveDb, build_index, parse_drivedb
+
+LOOKUP_REPEAT = 20
+
+
+def example(pattern):
+    """Строка, подходящая под выражение: первая альтернатива, минимум повторов"""
+    def generate(parsed):
+        out = []
+        for op, av in parsed:
+            if op is sre.LITERAL:
+                out.append(chr(av))
+            elif op is sre.ANY:
+                out.append("X")
+            elif op is sre.IN:
+                kind, value = av[0]
+                out.append(chr(value[0] if kind is sre.RANGE else value) if kind in (sre.LITERAL, sre.RANGE) else "0")
+            elif op is sre.BRANCH:
+                out.append(generate(av[1][0]))
+            elif op is sre.SUBPATTERN:
+                out.append(generate(av[-1]))
+            elif op in (sre.MAX_REPEAT, sre.MIN_REPEAT):
+                out.append(generate(av[2]) * av[0])
+        return "".join(out)
+    return generate(sre_parse.parse(pattern))
+
+
+class LinearDb:
+    """Как без индекса: разобрать drivedb.h, скомпилировать все выражения, перебирать по порядку"""
+
+    def __init__(self, source):
+        with open(source, encoding='utf-8', errors='replace') as f:
+            self.entries = [(family, re.compile(model), re.compile(firmware) if firmware else None)
+                            for family, model, firmware, _, _ in parse_drivedb(f.read())
+                            if not family.startswith(("VERSION", "$", "USB:", "DEFAULT"))]
+
+    def lookup(self, model, firmware=""):
+        for family, model_re, firmware_re in self.entries:
+            if model_re.fullmatch(model) and (firmware_re is None or firmware_re.fullmatch(firmware)):
+                return family, model_re.pattern
+        return None
+
+
+def best(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=os.path.join(os.path.dirname(BENCH_DIR), DRIVEDB_PATH))
+    args = parser.parse_args(argv)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as root:
+        source = os.path.join(root, "drivedb.h")
+        shutil.copyfile(args.source, source)
+        index_path = source + ".idx"
+
+        build_s = best(lambda: build_index(source))
+        print(f"Сборка индекса: {build_s * 1000:.1f} мс, {os.path.getsize(index_path)} байт "
+              f"(drivedb.h {os.path.getsize(source)} байт)")
+
+        with open(source, encoding='utf-8', errors='replace') as f:
+            models = [example(model) for family, model, *_ in parse_drivedb(f.read())
+                      if not family.startswith(("VERSION", "$", "USB:", "DEFAULT"))]
+        models += ["KINGSTON SA400S37240G", "ST1000LM035-1RK172", "CT500MX500SSD1", "Unknown Model 123"]
+
+        def cold_index():
+            db = DriveDb(source)
+            db.lookup(models[0])
+            db.close()
+
+        linear_start = time.perf_counter()
+        linear = LinearDb(source)
+        linear.lookup(models[0])
+        linear_cold = time.perf_counter() - linear_start
+        print(f"Старт + первый поиск: индекс {best(cold_index) * 1e6:.0f} мкс, "
+              f"разбор drivedb.h {linear_cold * 1000:.1f} мс")
+
+        db = DriveDb(source)
+        mismatches = 0
+        for model in models:
+            entry = db.lookup(model)
+            found = (entry.family, entry.model_regex) if entry else None
+            if found != linear.lookup(model):
+                mismatches += 1
+                if mismatches <= 5:
+                    print(f"  РАСХОЖДЕНИЕ: {model!r}: индекс {found}, перебор {linear.lookup(model)}")
+        if mismatches:
+            failures.append(f"{mismatches} расхождений с перебором")
+        print(f"Проверено моделей: {len(models)}, расхождений: {mismatches}")
+
+        def timed(lookup):
+            samples = []
+            for model in models:
+                start = time.perf_counter()
+                for _ in range(LOOKUP_REPEAT):
+                    lookup(model)
+                samples.append((time.perf_counter() - start) / LOOKUP_REPEAT)
+            return statistics.median(samples), max(samples)
+
+        index_median, index_max = timed(db.lookup)
+        linear_median, linear_max = timed(linear.lookup)
+        print(f"Поиск: индекс медиана {index_median * 1e6:.1f} мкс (макс. {index_max * 1e6:.1f}), "
+              f"перебор медиана {linear_median * 1e6:.1f} мкс (макс. {linear_max * 1e6:.1f})")
+        db.close()
+
+        # Изменили drivedb.h - индекс должен пересобраться сам
+        with open(source, 'a', encoding='utf-8') as f:
+            f.write('  { "Bench Test Family", "BENCH-TEST-MODEL-[0-9]+", "", "", "-v 231,raw48,Bench_Life" },\n')
+        with DriveDb(source) as fresh:
+            entry = fresh.lookup("BENCH-TEST-MODEL-42")
+        rebuilt = entry is not None and entry.family == "Bench Test Family"
+        print(f"Пересборка после изменения drivedb.h: {'ok' if rebuilt else 'НЕТ'}")
+        if not rebuilt:
+            failures.append("индекс не пересобрался")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер выгрузки базы в xlsx (convert_table.py).
+
+Во временном каталоге заполняет базу, выгружает ее целиком, добавляет строки и
+дописывает их (--append). Проверяет, что дописанный лист совпадает байт в байт с
+листом, собранным заново, что без новых строк ничего не дописывается и что после
+повторной проверки уже выгруженного ноутбука таблица собирается заново. Печатает
+время полной выгрузки и дописывания.
+
+    python bench/bench_export.py --rows 20000 --new 200
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+import zipfile
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from convert_table import SHEET_PATH, export_db
+from results_db import CSV_HEADERS, ResultsStore
+
+
+def make_row(number):
+    row = {header: '+' for header in CSV_HEADERS}
+    row.update({'Номер': str(number), 'Бренд': 'Lenovo', 'Модель': 'ThinkPad T480',
+                'Серийный номер': f"SN-{number:07d}", 'CPU': 'i5-8350U',
+                'Комментарий': 'царапина на крышке' if number % 7 == 0 else ''})
+    return row
+
+
+def fill(store, start, count):
+    with store.conn:
+        for number in range(start, start + count):
+            store._upsert(make_row(number), "2024-01-01T10:00:00", "bench")
+
+
+def sheet(path):
+    with zipfile.ZipFile(path) as book:
+        return book.read(SHEET_PATH)
+
+
+def timed_export(store, path, append):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        count, appended = export_db(store, path, append)
+    return count, appended, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--new", type=int, default=200)
+    args = parser.parse_args(argv)
+    failures = []
+
+    with tempfile.TemporaryDirectory() as root:
+        xlsx_file = os.path.join(root, "test_results.xlsx")
+        rebuilt_file = os.path.join(root, "rebuilt.xlsx")
+        with ResultsStore(os.path.join(root, "test_results.db")) as store:
+            fill(store, 0, args.rows)
+            count, _, full_time = timed_export(store, xlsx_file, append=True)
+            print(f"Полная выгрузка: {count} строк за {full_time:.2f} с")
+
+            fill(store, args.rows, args.new)
+            added, appended, append_time = timed_export(store, xlsx_file, append=True)
+            print(f"Дописывание: {added} строк за {append_time:.2f} с")
+            if not appended or added != args.new:
+                failures.append(f"дописано {added} строк вместо {args.new}")
+            timed_export(store, rebuilt_file, append=False)
+            if sheet(xlsx_file) != sheet(rebuilt_file):
+                failures.append("дописанный лист отличается от собранного заново")
+
+            added, appended, _ = timed_export(store, xlsx_file, append=True)
+            if not appended or added:
+                failures.append(f"без новых строк дописано {added}")
+
+            # Повторная проверка уже выгруженного ноутбука меняет его строку
+            row = make_row(1)
+            row['Комментарий'] = 'повторная проверка'
+            store.upsert(row, "2024-02-01T10:00:00", "bench")
+            count, appended, rebuild_time = timed_export(store, xlsx_file, append=True)
+            print(f"После повторной проверки: собрано заново {count} строк за {rebuild_time:.2f} с")
+            timed_export(store, rebuilt_file, append=False)
+            if appended or sheet(xlsx_file) != sheet(rebuilt_file):
+                failures.append("замененная строка не попала в таблицу")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
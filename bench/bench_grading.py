@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер grading.py на синтетическом парке дисков.
+
+Генерирует снимки SMART (SSD и HDD, часть показателей неизвестна, часть дисков
+неисправна), сравнивает grade_batch() с grade() по каждому снимку, печатает время
+пакетной и поштучной оценки и прогоняет regrade по временной базе с измененными
+правилами.
+
+    python bench/bench_grading.py --drives 20000
+"""
+
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from grading import DEFAULT_RULES, METRICS, SSD_COLUMN, format_drive, grade, grade_batch, regrade, rules_id
+from results_db import ResultsStore
+
+
+def fleet(count, seed=1):
+    """Список снимков: хвосты распределений задевают все категории"""
+    rng = np.random.default_rng(seed)
+    snaps = []
+    for i in range(count):
+        ssd = rng.random() < 0.7
+        hours = int(rng.gamma(2.0, 6000))
+        snap = {
+            'wear_percent': int(min(100, rng.gamma(1.5, 12))) if ssd and rng.random() < 0.9 else None,
+            'power_on_hours': hours if rng.random() < 0.97 else None,
+            'power_cycles': int(hours / rng.uniform(2, 12)),
+            'reallocated_sectors': int(rng.geometric(0.2) - 1) * int(rng.random() < 0.15),
+            'pending_sectors': None if ssd else int(rng.random() < 0.03) * int(rng.integers(1, 40)),
+            'uncorrectable_sectors': None if ssd else int(rng.random() < 0.02),
+            'media_errors': int(rng.random() < 0.05) * int(rng.integers(1, 30)) if ssd else None,
+            'failed': bool(rng.random() < 0.01),
+        }
+        snaps.append(snap)
+    return snaps
+
+
+def columns_of(snaps):
+    columns = {metric: [snap[metric] for snap in snaps] for metric in METRICS}
+    columns['failed'] = [snap['failed'] for snap in snaps]
+    return columns
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drives", type=int, default=20000)
+    args = parser.parse_args(argv)
+    failures = []
+
+    snaps = fleet(args.drives)
+    columns = columns_of(snaps)
+
+    start = time.perf_counter()
+    live = [grade(snap) for snap in snaps]
+    live_s = time.perf_counter() - start
+    start = time.perf_counter()
+    batch = grade_batch(columns)
+    batch_s = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(live, batch))
+    if mismatches:
+        failures.append(f"{mismatches} расхождений grade/grade_batch")
+    counts = {str(letter): int((batch == letter).sum()) for letter in sorted(set(batch))}
+    print(f"Дисков: {args.drives}, категории: {counts}, расхождений: {mismatches}")
+    print(f"grade() по одному: {live_s * 1000:.1f} мс, grade_batch(): {batch_s * 1000:.1f} мс")
+
+    # Пересчет по базе: правила стали строже для A
+    stricter = copy.deepcopy(DEFAULT_RULES)
+    stricter['grades'][0]['max']['power_on_hours'] = 5000
+    with tempfile.TemporaryDirectory() as root:
+        with ResultsStore(os.path.join(root, "bench.db")) as store:
+            laptops = args.drives // 2
+            with store.conn:
+                for n in range(laptops):
+                    serial = f"SN{n:06d}"
+                    column = "; ".join(format_drive(live[i], snaps[i]) for i in (2 * n, 2 * n + 1))
+                    store._upsert({'Серийный номер': serial, SSD_COLUMN: column}, None, None)
+                    pair = [dict(snaps[2 * n], device=f"/dev/sd{k}", grade=live[2 * n + k],
+                                 rules=rules_id(DEFAULT_RULES)) for k in range(2)]
+                    pair[1].update(snaps[2 * n + 1])
+                    store._save_smart(serial, pair, None)
+            start = time.perf_counter()
+            total, changed, rows = regrade(store, stricter)
+            regrade_s = time.perf_counter() - start
+            print(f"regrade: снимков {total}, изменено категорий {changed}, строк {rows} за {regrade_s:.2f} с")
+
+            expected = [grade(snap, stricter) for snap in snaps[:2 * laptops]]
+            _, _, _, stored = store.smart_columns()
+            if stored != expected:
+                failures.append("категории в базе не совпадают с grade()")
+            for n in range(laptops):
+                row = store.find_by_serial(f"SN{n:06d}")
+                if [cell.split("/")[0] for cell in row[SSD_COLUMN].split("; ")] != expected[2 * n:2 * n + 2]:
+                    failures.append(f"колонка SSD SN{n:06d} не обновлена: {row[SSD_COLUMN]!r}")
+                    break
+            if regrade(store, stricter)[1]:
+                failures.append("повторный regrade что-то изменил")
+            if regrade_s > 5:
+                failures.append("regrade медленнее 5 с")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
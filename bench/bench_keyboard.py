@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Бенчмарк отрисовки keyboard.py без экрана (SDL dummy video driver).
+
+Прогоняет нажатия по всем клавишам раскладки и замеряет время кадра: новая отрисовка
+(кэш плиток + только изменившиеся клавиши) против старой (шрифт на каждую клавишу
+и полная перерисовка каждый кадр).
+
+    python bench/bench_keyboard.py --layout iso --presses 2000 --max-ms 2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import pygame
+
+from key_coverage import USB_TO_SCAN, KeyCoverage, add_layout_arguments, layout_from_args
+from keyboard import BLUE, GRAY, WHITE, BLACK, KeyboardVisualizer
+
+
+def usages_for(layout):
+    """USB-коды клавиш раскладки в порядке раскладки"""
+    by_index = {}
+    for usage in USB_TO_SCAN:
+        index = layout.find_usb(usage)
+        if index is not None:
+            by_index.setdefault(index, usage)
+    return [by_index[i] for i in sorted(by_index)]
+
+
+def legacy_frame(screen, visualizer, pressed):
+    """Кадр так, как его рисовала прежняя версия keyboard.py"""
+    screen.fill(BLACK)
+    for index, rect in enumerate(visualizer.rects):
+        color = BLUE if index in pressed else GRAY
+        pygame.draw.rect(screen, color, rect)
+        pygame.draw.rect(screen, WHITE, rect, 2)
+        font = pygame.font.Font(None, 36)
+        text = font.render(visualizer.layout.keys[index].label, True, WHITE)
+        screen.blit(text, text.get_rect(center=rect.center))
+    pygame.display.flip()
+
+
+def summary(name, times):
+    times = sorted(times)
+    p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+    print(f"{name:<28} кадров {len(times):>6}  среднее {statistics.mean(times) * 1000:7.3f} мс  "
+          f"p50 {statistics.median(times) * 1000:7.3f} мс  p99 {p99 * 1000:7.3f} мс")
+    return p99
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_layout_arguments(parser)
+    parser.add_argument("--presses", type=int, default=2000)
+    parser.add_argument("--legacy-frames", type=int, default=100)
+    parser.add_argument("--max-ms", type=float, help="ошибка, если p99 кадра больше этого")
+    args = parser.parse_args(argv)
+
+    visualizer = KeyboardVisualizer(KeyCoverage(layout_from_args(args)))
+    visualizer.open()
+    try:
+        usages = usages_for(visualizer.layout)
+        start = time.perf_counter()
+        visualizer.draw_all()
+        print(f"Первый кадр (вся раскладка, {len(visualizer.rects)} клавиш): "
+              f"{(time.perf_counter() - start) * 1000:.2f} мс")
+
+        frames = []
+        for press in range(args.presses):
+            usage = usages[press % len(usages)]
+            for down in (True, False):
+                start = time.perf_counter()
+                visualizer.key_event(usage, down)
+                visualizer.render()
+                frames.append(time.perf_counter() - start)
+        p99 = summary("кэш + измененные клавиши", frames)
+        print(f"  надписей в кэше: {len(visualizer.glyphs)}, плиток: {len(visualizer.tiles)}, "
+              f"проверено клавиш: {visualizer.coverage.tested_count} из {len(visualizer.layout)}")
+
+        legacy = []
+        for frame in range(args.legacy_frames):
+            start = time.perf_counter()
+            legacy_frame(visualizer.screen, visualizer, {frame % len(visualizer.rects)})
+            legacy.append(time.perf_counter() - start)
+        summary("старая полная перерисовка", legacy)
+    finally:
+        pygame.quit()
+
+    if args.max_ms is not None and p99 * 1000 > args.max_ms:
+        print(f"ОШИБКА: p99 кадра {p99 * 1000:.3f} мс больше {args.max_ms} мс")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
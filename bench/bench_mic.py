@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер mic_meter.py на синтетических WAV (без звуковой карты).
+
+Создает во временном каталоге записи: речь (слоги с паузами на фоне шума), тишина
+(нули), постоянный сдвиг, только фон, перегрузка. Для каждой проверяет вердикт,
+печатает скорость обработки и убеждается, что цикл по блокам не выделяет память.
+
+    python bench/bench_mic.py --seconds 5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from mic_meter import BLOCK_SIZE, LevelMeter, analyze_wav
+from tones import write_wav
+
+SAMPLE_RATE = 48000
+
+
+def speech(rng, seconds, level=0.2):
+    """Слоги: гармоники 150 Гц с формантой, 0.2 с звука и 0.15 с паузы, поверх тихого шума"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    voice = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 20) if 150 * k < 4000)
+    voice *= 1 + np.sin(2 * np.pi * 700 * t)
+    envelope = ((t % 0.35) < 0.2).astype(float)
+    noise = rng.normal(0, 0.002, len(t))
+    signal = voice * envelope
+    return signal / np.abs(signal).max() * level + noise
+
+
+def cases(seconds, seed=1):
+    rng = np.random.default_rng(seed)
+    n = int(seconds * SAMPLE_RATE)
+    yield "speech", speech(rng, seconds), lambda r: r.ok
+    yield "quiet", speech(rng, seconds, level=0.02), lambda r: r.ok
+    yield "silent", np.zeros(n), lambda r: "не работает" in "; ".join(r.problems())
+    yield "dc", np.full(n, 0.3), lambda r: "не работает" in "; ".join(r.problems())
+    yield "noise", rng.normal(0, 0.01, n), lambda r: "нет сигнала" in "; ".join(r.problems())
+    yield "hum", 0.05 * np.sin(2 * np.pi * 50 * np.arange(n) / SAMPLE_RATE) + rng.normal(0, 0.002, n), \
+        lambda r: "нет сигнала" in "; ".join(r.problems())
+    yield "clipped", np.clip(speech(rng, seconds, level=3.0), -1, 1), \
+        lambda r: "перегрузка" in "; ".join(r.problems())
+
+
+def to_int16(signal):
+    return np.clip(np.round(signal * 32767), -32768, 32767).astype(np.int16)[:, None]
+
+
+def loop_allocations(seconds):
+    """Сколько байт выделяет process() на всех блоках после первого"""
+    samples = np.random.default_rng(0).normal(0, 0.1, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    meter = LevelMeter(SAMPLE_RATE, BLOCK_SIZE, seconds)
+    meter.process(samples[:BLOCK_SIZE])
+    blocks = [samples[i:i + BLOCK_SIZE] for i in range(BLOCK_SIZE, len(samples) - BLOCK_SIZE, BLOCK_SIZE)]
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for block in blocks:
+        meter.process(block)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    return len(blocks), grown, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    failures = []
+    print(f"{'запись':<8} {'громк.':>7} {'фон':>7} {'пик':>7} {'речь':>5} {'x реального':>12}  итог")
+    with tempfile.TemporaryDirectory() as root:
+        for name, signal, expected in cases(args.seconds):
+            path = os.path.join(root, f"{name}.wav")
+            write_wav(path, to_int16(signal), SAMPLE_RATE)
+            start = time.perf_counter()
+            report = analyze_wav(path)
+            elapsed = time.perf_counter() - start
+            status = "ok" if expected(report) else "ОШИБКА"
+            if status != "ok":
+                failures.append(name)
+            print(f"{name:<8} {report.loud_dbfs:>7.1f} {report.noise_dbfs:>7.1f} {report.peak_dbfs:>7.1f} "
+                  f"{report.speech_share:>5.2f} {args.seconds / elapsed:>12.0f}  {status}"
+                  f"  [{'; '.join(report.problems()) or 'проблем нет'}]")
+
+    blocks, grown, peak = loop_allocations(args.seconds)
+    print(f"\nЦикл по {blocks} блокам: прирост памяти {grown} байт, пик временных выделений {peak} байт")
+    if grown > 4096:
+        failures.append("allocations")
+
+    if failures:
+        print(f"\nНе прошли: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Бенчмарк разборщиков вывода wmic/smartctl/powercfg и названий процессоров на записанных примерах.
+
+Для каждого примера из bench/fixtures/<разборщик>/ проверяет, что результат совпадает
+с эталоном из bench/expected/, и замеряет время, пропускную способность и пик памяти.
+Падает (код 1), если результат изменился или разборщик стал медленнее базовой линии.
+
+    python bench/bench_parsers.py                   # проверить и замерить
+    python bench/bench_parsers.py --save-baseline   # запомнить время на этой машине
+    python bench/bench_parsers.py --update-expected # принять новые результаты как эталон
+"""
+
+import argparse
+import dataclasses
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from battery_report import parse_battery_report
+from cpu_model import classify
+from hardware_inventory import build_inventory, parse_value_output
+from smart_info import parse_scan, parse_smartctl
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+EXPECTED_DIR = os.path.join(BENCH_DIR, "expected")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def read_text(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def keep_path(path):
+    return path
+
+
+# имя -> (шаблон примеров, загрузка входа, разбор)
+PARSERS = {
+    'wmic': ("wmic/*.txt", read_text, lambda text: build_inventory(parse_value_output(text))),
+    'smartctl_scan': ("smartctl_scan/*.txt", read_text, parse_scan),
+    'smartctl': ("smartctl/*.txt", read_text, parse_smartctl),
+    'smartctl_json': ("smartctl_json/*.json", read_text, parse_smartctl),
+    'powercfg': ("powercfg/*", keep_path, parse_battery_report),
+    # по названию процессора на строку; classify без кэша, чтобы замер был честным
+    'cpu': ("cpu/*.txt", read_text, lambda text: [classify(line) for line in text.splitlines() if line.strip()]),
+}
+
+
+def to_jsonable(value):
+    """Приводит dataclass/NamedTuple/списки к виду, который можно сравнить с JSON-эталоном"""
+    if dataclasses.is_dataclass(value):
+        return {f.name: to_jsonable(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if hasattr(value, '_asdict'):
+        return {k: to_jsonable(v) for k, v in value._asdict().items()}
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+def time_call(func, arg, min_time=0.05, repeat=5):
+    """Лучшее время одного вызова, в секундах"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def peak_memory(func, arg):
+    tracemalloc.start()
+    try:
+        func(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def iter_cases(only=None):
+    for name, (pattern, load, parse) in PARSERS.items():
+        if only and name not in only:
+            continue
+        for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, pattern))):
+            case = os.path.splitext(os.path.basename(path))[0]
+            if pattern.endswith("/*"):
+                case = os.path.basename(path)
+            yield name, case, path, load, parse
+
+
+def expected_path(name, case):
+    return os.path.join(EXPECTED_DIR, name, case + ".json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("parsers", nargs="*", help=f"какие разборщики: {', '.join(PARSERS)}")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="во сколько раз можно быть медленнее базовой линии (по умолчанию 1.5)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--update-expected", action="store_true")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    failures = []
+    timings = {}
+    print(f"{'разборщик/пример':<50} {'мкс/вызов':>10} {'МБ/с':>8} {'пик КБ':>8}  итог")
+
+    for name, case, path, load, parse in iter_cases(args.parsers):
+        key = f"{name}/{case}"
+        data = load(path)
+        size = os.path.getsize(path)
+
+        result = to_jsonable(parse(data))
+        exp_path = expected_path(name, case)
+        if args.update_expected:
+            os.makedirs(os.path.dirname(exp_path), exist_ok=True)
+            with open(exp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=1)
+                f.write("\n")
+            status = "эталон обновлен"
+        elif not os.path.exists(exp_path):
+            status = "НЕТ ЭТАЛОНА"
+            failures.append(f"{key}: нет {os.path.relpath(exp_path)}")
+        else:
+            with open(exp_path, encoding='utf-8') as f:
+                expected = json.load(f)
+            # Сравниваем через JSON, чтобы кортежи и списки считались одинаковыми
+            if json.loads(json.dumps(result)) != expected:
+                status = "РЕЗУЛЬТАТ ИЗМЕНИЛСЯ"
+                failures.append(f"{key}: результат не совпадает с эталоном")
+            else:
+                status = "ok"
+
+        seconds = time_call(parse, data)
+        peak = peak_memory(parse, data)
+        timings[key] = seconds
+
+        if status == "ok" and key in baseline and seconds > baseline[key] * args.tolerance:
+            status = f"МЕДЛЕННЕЕ x{seconds / baseline[key]:.2f}"
+            failures.append(f"{key}: {seconds * 1e6:.1f} мкс против {baseline[key] * 1e6:.1f} мкс")
+
+        print(f"{key:<50} {seconds * 1e6:>10.1f} {size / seconds / 1e6:>8.1f} {peak / 1024:>8.1f}  {status}")
+
+    if args.save_baseline:
+        baseline.update(timings)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"\nБазовая линия сохранена в {os.path.relpath(BASELINE_FILE)}")
+
+    if failures:
+        print("\nОШИБКИ:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка и замер scheduler.py на синтетических задачах (sleep вместо wmic и оператора).
+
+Сборщики работают по --collect секунд, оператор тратит на шаг по --operator секунд.
+Сравнивает полное время прохода с последовательным выполнением, проверяет, что
+оператор не ждет фоновых задач, пока есть готовые шаги, что ошибка и таймаут
+одной задачи не мешают остальным и что детерминированный режим дает тот же
+порядок при каждом запуске.
+
+    python bench/bench_scheduler.py [--collect 0.4] [--operator 0.1]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from scheduler import Scheduler, Task
+
+
+def build(collect, operator, log, deterministic=False):
+    """Как в тестере: сборщики без оператора и шаги оператора с входами"""
+    def work(name, seconds, fail=False):
+        def run():
+            time.sleep(seconds)
+            log.append(name)
+            if fail:
+                raise OSError("wmic не найден")
+            return name
+        return run
+
+    scheduler = Scheduler(deterministic=deterministic)
+    scheduler.add(Task('inventory', work('inventory', collect)))
+    scheduler.add(Task('smart', work('smart', collect * 2)))
+    scheduler.add(Task('battery_report', work('battery_report', collect)))
+    scheduler.add(Task('device_errors', work('device_errors', collect / 2, fail=True)))
+    scheduler.add(Task('hung', work('hung', collect * 10), timeout=collect * 3))
+    scheduler.add(Task('grading', work('grading', collect / 4), inputs=('smart',)))
+    steps = [("Железо", ('inventory',)), ("HWiNFO", ()), ("Аудио", ()), ("SSD", ('smart', 'grading')),
+             ("Батарея", ('battery_report',)), ("Диспетчер", ('device_errors',)), ("Зависший", ('hung',)),
+             ("Клавиатура", ())]
+    for name, inputs in steps:
+        scheduler.add(Task(name, work(name, operator), inputs=inputs, operator=True))
+    return scheduler, sum(collect * k for k in (1, 2, 1, 0.5, 10, 0.25)) + operator * len(steps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collect", type=float, default=0.4)
+    parser.add_argument("--operator", type=float, default=0.1)
+    args = parser.parse_args(argv)
+    failures = []
+
+    log = []
+    scheduler, sequential = build(args.collect, args.operator, log)
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        results = scheduler.run()
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown()
+    operator_order = [name for name in log if scheduler.tasks[name].operator]
+    print(f"Параллельно: {elapsed:.2f} с, последовательно было бы {sequential:.2f} с")
+    print(f"Порядок шагов оператора: {', '.join(operator_order)}")
+    statuses = {name: result.status for name, result in results.items()}
+    print(f"Статусы: {statuses}")
+
+    if operator_order[:2] != ["HWiNFO", "Аудио"]:
+        failures.append("оператор начал не с шагов без входов")
+    if statuses['device_errors'] != 'error' or statuses['Диспетчер'] != 'ok':
+        failures.append("ошибка сборщика не изолирована")
+    if statuses['hung'] != 'timeout' or statuses['Зависший'] != 'ok':
+        failures.append("таймаут сборщика не изолирован")
+    if statuses['grading'] != 'ok' or log.index('grading') < log.index('smart'):
+        failures.append("зависимая фоновая задача запущена раньше входа")
+    if elapsed > sequential * 0.6:
+        failures.append("нет выигрыша от параллельности")
+
+    orders = []
+    for _ in range(2):
+        log = []
+        scheduler, _ = build(args.collect / 10, 0, log, deterministic=True)
+        with redirect_stdout(io.StringIO()):
+            scheduler.run(skip={"Аудио"})
+        orders.append(log)
+    print(f"Детерминированный порядок: {', '.join(orders[0])}")
+    if orders[0] != orders[1] or "Аудио" in orders[0]:
+        failures.append("детерминированный режим непостоянен")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
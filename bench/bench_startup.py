@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Время до первого вопроса оператору и что к этому моменту импортировано.
+
+Запускает laptop_tester.py (во временном каталоге, с -X importtime) и ждет строку
+«Нажмите Enter»; печатает время, самые дорогие импорты и падает, если превышен
+бюджет или до вопроса загрузилась тяжелая библиотека, нужная только отдельным
+шагам (OpenCV, NumPy, PortAudio, asyncio...). Заодно проверяет, что autotester.py
+импортируется без cv2/playsound/pynput.
+
+    python bench/bench_startup.py [--runs 5] [--budget-ms 500]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+from test_registry import registry
+
+PROMPT = "Нажмите Enter"
+
+# Модули сборщиков, отправки и выгрузки: их нет в requires ни одного шага,
+# но до первого вопроса они тоже не нужны
+INFRASTRUCTURE = ("pygame", "playsound", "pynput", "asyncio", "ssl", "psutil", "xlsxwriter", "html.parser",
+                  "outbox", "battery_report")
+
+
+def heavy_modules():
+    """Что не должно загружаться до первого вопроса: requires всех шагов реестра и INFRASTRUCTURE"""
+    heavy = dict.fromkeys(INFRASTRUCTURE)
+    for spec in registry():
+        heavy.update(dict.fromkeys(spec.requires))
+    return tuple(heavy)
+
+
+def parse_importtime(stderr):
+    """{модуль: накопленное время, мкс} из вывода -X importtime"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def first_prompt(workdir):
+    """(секунды до вопроса, модули) для одного запуска тестера"""
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-u", os.path.join(ROOT, "laptop_tester.py")],
+        cwd=workdir, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    seen = b""
+    try:
+        while PROMPT.encode("utf-8") not in seen:
+            chunk = process.stdout.read1(4096)
+            if not chunk:
+                raise RuntimeError(f"тестер завершился до вопроса: {seen.decode('utf-8', 'replace')[-300:]}")
+            seen += chunk
+        elapsed = time.perf_counter() - start
+    finally:
+        process.kill()
+        _, stderr = process.communicate()
+    return elapsed, parse_importtime(stderr.decode("utf-8", "replace"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=500,
+                        help="предельная медиана времени до первого вопроса")
+    args = parser.parse_args(argv)
+    failures = []
+
+    times = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(args.runs):
+            elapsed, modules = first_prompt(workdir)
+            times.append(elapsed)
+    median = statistics.median(times)
+    print(f"До первого вопроса: медиана {median * 1000:.0f} мс, мин. {min(times) * 1000:.0f} мс "
+          f"({args.runs} запусков), импортов: {len(modules)}")
+    top = sorted(((us, name) for name, us in modules.items() if not name.startswith(("encodings", "_"))),
+                 reverse=True)[:8]
+    for us, name in top:
+        print(f"  {us / 1000:7.1f} мс  {name}")
+    if median * 1000 > args.budget_ms:
+        failures.append(f"медиана {median * 1000:.0f} мс больше бюджета {args.budget_ms:.0f} мс")
+    loaded = [name for name in heavy_modules() if name in modules]
+    if loaded:
+        failures.append(f"до первого вопроса загружены: {', '.join(loaded)}")
+
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import autotester"],
+                            cwd=ROOT, capture_output=True, text=True)
+    modules = parse_importtime(result.stderr)
+    loaded = [name for name in ("cv2", "playsound", "pynput") if name in modules]
+    print(f"import autotester: {'ok' if result.returncode == 0 and not loaded else 'ОШИБКА'}")
+    if result.returncode or loaded:
+        failures.append(f"autotester: {result.stderr.strip().splitlines()[-1] if result.returncode else loaded}")
+
+    if failures:
+        print(f"\nОШИБКИ: {'; '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка сигналов tones.py через WAV-файлы (без звуковой карты) и замер кэша.
+
+Записывает каждый сигнал в WAV, читает обратно и проверяет раскладку каналов
+(левый сигнал - только в левом канале и т.д.) и частоты по спектру. Затем сравнивает
+время генерации, загрузки из кэша на диске и из памяти.
+
+    python bench/bench_tones.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import numpy as np
+
+from tones import SIGNALS, ToneEngine, read_wav, write_wav
+
+
+def dominant_frequency(samples, sample_rate):
+    spectrum = np.abs(np.fft.rfft(samples.astype(np.float64)))
+    return np.fft.rfftfreq(len(samples), 1 / sample_rate)[spectrum.argmax()]
+
+
+def rms(samples):
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+def check(name, frames, sample_rate):
+    """Список ошибок раскладки/частоты для сигнала"""
+    _, params, gains = SIGNALS[name]
+    errors = []
+    for channel, gain in enumerate(gains):
+        level = rms(frames[:, channel])
+        side = "левый" if channel == 0 else "правый"
+        if gain and level < 1000:
+            errors.append(f"{side} канал почти тихий (RMS {level:.0f})")
+        if not gain and level:
+            errors.append(f"в {side} канал просочился сигнал (RMS {level:.0f})")
+    if 'frequency' in params:
+        channel = gains.index(max(gains))
+        found = dominant_frequency(frames[:, channel], sample_rate)
+        if abs(found - params['frequency']) > 5:
+            errors.append(f"частота {found:.0f} Гц вместо {params['frequency']:.0f} Гц")
+    if name == 'sweep':
+        tenth = len(frames) // 10
+        low = dominant_frequency(frames[:tenth, 0], sample_rate)
+        high = dominant_frequency(frames[-tenth:, 0], sample_rate)
+        if not low < 300 < 5000 < high:
+            errors.append(f"свип не проходит диапазон: начало {low:.0f} Гц, конец {high:.0f} Гц")
+    return errors
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args(argv)
+
+    failures = []
+    print(f"{'сигнал':<8} {'сек':>5} {'генерация мс':>13} {'кэш диск мс':>12} {'память мс':>10}  итог")
+    with tempfile.TemporaryDirectory() as root:
+        for name in SIGNALS:
+            cache = os.path.join(root, "cache")
+            engine = ToneEngine(cache_dir=cache)
+            generated = timed(lambda: engine.buffer(name))
+            from_disk = timed(lambda: ToneEngine(cache_dir=cache).buffer(name))
+            from_memory = timed(lambda: engine.buffer(name))
+
+            path = os.path.join(root, f"{name}.wav")
+            write_wav(path, engine.buffer(name), engine.sample_rate)
+            frames, sample_rate = read_wav(path)
+            errors = check(name, frames, sample_rate)
+            if not np.array_equal(frames, engine.buffer(name)):
+                errors.append("WAV отличается от буфера в памяти")
+            failures += [f"{name}: {e}" for e in errors]
+            print(f"{name:<8} {len(frames) / sample_rate:>5.2f} {generated:>13.2f} {from_disk:>12.2f} "
+                  f"{from_memory:>10.3f}  {'ok' if not errors else 'ОШИБКА'}")
+
+    if failures:
+        print("\nОШИБКИ:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
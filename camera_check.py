@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Автоматическая проверка веб-камеры по кадрам за несколько секунд.
+
+Считает реальный fps, черные, залитые одним цветом и застывшие кадры, резкость
+(дисперсия лапласиана) и ищет битые пиксели: застрявшие (светлые на каждом кадре)
+и мертвые (темные на каждом кадре). Первые кадры живой камеры (пока она
+выставляет экспозицию и баланс белого) пропускаются, а отдельные черные и залитые
+кадры считаются проблемой, только если их больше BAD_FRAME_SHARE. Последние кадры хранятся в кольцевом буфере
+фиксированного размера, все расчеты - векторные на NumPy.
+
+    python camera_check.py                 # камера 0, 5 секунд
+    python camera_check.py --source clip.mp4
+"""
+
+import argparse
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+BLACK_LEVEL = 12        # средняя яркость ниже - кадр черный
+SOLID_STD = 3.0         # разброс яркости по кадру ниже - кадр залит одним цветом
+FROZEN_DIFF = 0.3       # средняя разница с прошлым кадром ниже - кадр застыл
+BLUR_THRESHOLD = 60.0   # дисперсия лапласиана ниже - изображение не в фокусе
+PIXEL_DELTA = 60        # насколько пиксель ярче/темнее соседей, чтобы считаться битым
+MAX_PIXELS = 20         # сколько битых пикселей перечислять в отчете
+WARMUP_S = 1.0          # столько секунд с начала съемки кадры камеры не анализируются
+BAD_FRAME_SHARE = 0.1   # доля черных/залитых кадров, начиная с которой это проблема
+
+
+@dataclass
+class CameraReport:
+    frames: int
+    duration_s: float
+    fps: float
+    nominal_fps: float
+    resolution: tuple
+    black_frames: int
+    solid_frames: int
+    frozen_frames: int
+    blur_score: float
+    stuck_pixels: list = field(default_factory=list)
+    dead_pixels: list = field(default_factory=list)
+    stuck_count: int = 0
+    dead_count: int = 0
+
+    def problems(self, min_fps=10):
+        """Найденные неисправности по-русски; пустой список - камера в порядке"""
+        problems = []
+        if not self.frames:
+            return ["нет кадров"]
+        if self.fps and self.fps < min_fps:
+            problems.append(f"низкий fps ({self.fps:.1f})")
+        if self.black_frames == self.frames:
+            return problems + ["черное изображение"]
+        if self.solid_frames == self.frames:
+            return problems + ["изображение залито одним цветом"]
+        # Единичный черный кадр (переключение режима, вспышка) - не неисправность
+        if self.black_frames > self.frames * BAD_FRAME_SHARE:
+            problems.append(f"черные кадры: {self.black_frames}")
+        if self.solid_frames > self.frames * BAD_FRAME_SHARE:
+            problems.append(f"кадры одного цвета: {self.solid_frames}")
+        if self.frames > 1 and self.frozen_frames >= self.frames - 1:
+            problems.append("изображение застыло")
+        elif self.frozen_frames > self.frames // 4:
+            problems.append(f"застывшие кадры: {self.frozen_frames}")
+        if self.blur_score < BLUR_THRESHOLD:
+            problems.append(f"нет фокуса (резкость {self.blur_score:.0f})")
+        if self.stuck_count:
+            problems.append(f"застрявшие пиксели: {self.stuck_count}")
+        if self.dead_count:
+            problems.append(f"мертвые пиксели: {self.dead_count}")
+        return problems
+
+    @property
+    def ok(self):
+        return not self.problems()
+
+
+class FrameRing:
+    """Последние capacity кадров в оттенках серого в заранее выделенном массиве"""
+
+    def __init__(self, capacity, shape):
+        self.frames = np.empty((capacity,) + shape, dtype=np.uint8)
+        self.capacity = capacity
+        self.count = 0
+        self.next = 0
+
+    def push(self, gray):
+        self.frames[self.next] = gray
+        self.next = (self.next + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def view(self):
+        """Заполненная часть буфера (порядок кадров для статистики по пикселям не важен)"""
+        return self.frames[:self.count]
+
+
+def to_gray(frame):
+    """BGR (как отдает OpenCV) или уже серый кадр -> uint8 яркость"""
+    if frame.ndim == 2:
+        return frame
+    # Веса BT.601 в целых числах (29 + 150 + 77 = 256)
+    b, g, r = (frame[..., i].astype(np.uint16) for i in range(3))
+    return ((29 * b + 150 * g + 77 * r) >> 8).astype(np.uint8)
+
+
+def laplacian_variance(gray):
+    """Мера резкости: дисперсия дискретного лапласиана"""
+    f = gray.astype(np.float32)
+    lap = f[:-2, 1:-1] + f[2:, 1:-1] + f[1:-1, :-2] + f[1:-1, 2:] - 4 * f[1:-1, 1:-1]
+    return float(lap.var())
+
+
+class CameraAnalyzer:
+    """Принимает кадры по одному, в конце выдает CameraReport"""
+
+    def __init__(self, capacity=48):
+        self.capacity = capacity
+        self.ring = None
+        self.timestamps = []
+        self.means = []
+        self.stds = []
+        self.diffs = []
+        self.sharpness = []
+        self.previous = None
+
+    def push(self, frame, timestamp):
+        gray = to_gray(frame)
+        if self.ring is None:
+            self.ring = FrameRing(self.capacity, gray.shape)
+        self.ring.push(gray)
+        self.timestamps.append(timestamp)
+        self.means.append(float(gray.mean()))
+        self.stds.append(float(gray.std()))
+        self.sharpness.append(laplacian_variance(gray))
+        # Для сравнения кадров хватает каждого 4-го пикселя
+        small = gray[::4, ::4].astype(np.int16)
+        if self.previous is not None:
+            self.diffs.append(float(np.abs(small - self.previous).mean()))
+        self.previous = small
+
+    def bad_pixels(self, share=0.9):
+        """Координаты (x, y) застрявших и мертвых пикселей по кадрам в буфере.
+
+        Битый пиксель - ярче (темнее) всех четырех соседей на PIXEL_DELTA и больше
+        почти на каждом кадре. Край предмета в кадре так себя не ведет: у него
+        всегда есть сосед того же цвета.
+        """
+        frames = self.ring.view().astype(np.int16)
+        center = frames[:, 1:-1, 1:-1]
+        up, down = frames[:, :-2, 1:-1], frames[:, 2:, 1:-1]
+        left, right = frames[:, 1:-1, :-2], frames[:, 1:-1, 2:]
+        brightest = np.maximum(np.maximum(up, down), np.maximum(left, right))
+        darkest = np.minimum(np.minimum(up, down), np.minimum(left, right))
+        stuck = (center - brightest > PIXEL_DELTA).mean(axis=0) >= share
+        dead = (darkest - center > PIXEL_DELTA).mean(axis=0) >= share
+        # +1: координаты внутри кадра без рамки в один пиксель
+        return np.argwhere(stuck)[:, ::-1] + 1, np.argwhere(dead)[:, ::-1] + 1
+
+    def report(self, nominal_fps=0.0):
+        frames = len(self.timestamps)
+        if not frames:
+            return CameraReport(0, 0.0, 0.0, nominal_fps, (0, 0), 0, 0, 0, 0.0)
+        means = np.array(self.means)
+        stds = np.array(self.stds)
+        black = means < BLACK_LEVEL
+        solid = (stds < SOLID_STD) & ~black
+        picture = ~(black | solid)
+        duration = self.timestamps[-1] - self.timestamps[0]
+        stuck, dead = self.bad_pixels()
+        height, width = self.ring.frames.shape[1:]
+        return CameraReport(
+            frames=frames,
+            duration_s=round(duration, 3),
+            fps=round((frames - 1) / duration, 2) if duration > 0 else 0.0,
+            nominal_fps=nominal_fps,
+            resolution=(width, height),
+            black_frames=int(black.sum()),
+            solid_frames=int(solid.sum()),
+            frozen_frames=int((np.array(self.diffs) < FROZEN_DIFF).sum()),
+            blur_score=round(float(np.median(np.array(self.sharpness)[picture])), 1) if picture.any() else 0.0,
+            stuck_pixels=stuck[:MAX_PIXELS].tolist(),
+            dead_pixels=dead[:MAX_PIXELS].tolist(),
+            stuck_count=len(stuck),
+            dead_count=len(dead),
+        )
+
+
+def check_camera(source=0, seconds=5.0, capacity=48, max_frames=None, warmup=None):
+    """Снимает кадры с камеры (номер) или из видеофайла (путь) и анализирует их.
+
+    Для файла время кадров берется из самого видео, поэтому fps - это fps записи.
+    Кадры первых warmup секунд отбрасываются (по умолчанию WARMUP_S для камеры и 0
+    для файла), seconds отсчитываются после них.
+    """
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise RuntimeError(f"не удалось открыть камеру/видео: {source}")
+    from_file = isinstance(source, str)
+    analyzer = CameraAnalyzer(capacity)
+    try:
+        nominal_fps = float(capture.get(cv2.CAP_PROP_FPS) or 0.0)
+        if warmup is None:
+            warmup = 0.0 if from_file else WARMUP_S
+        start = time.perf_counter()
+        while max_frames is None or len(analyzer.timestamps) < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            if from_file:
+                timestamp = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+            else:
+                timestamp = time.perf_counter() - start
+            if timestamp < warmup:
+                continue
+            if timestamp - warmup > seconds:
+                break
+            analyzer.push(frame, timestamp)
+    finally:
+        capture.release()
+    return analyzer.report(nominal_fps)
+
+
+def print_report(report):
+    width, height = report.resolution
+    print(f"Кадров: {report.frames} за {report.duration_s:.1f} с, fps: {report.fps} "
+          f"(заявлено {report.nominal_fps:g}), разрешение: {width}x{height}")
+    print(f"Черные: {report.black_frames}, одного цвета: {report.solid_frames}, "
+          f"застывшие: {report.frozen_frames}, резкость: {report.blur_score}")
+    if report.stuck_pixels:
+        print(f"Застрявшие пиксели (x, y): {report.stuck_pixels}")
+    if report.dead_pixels:
+        print(f"Мертвые пиксели (x, y): {report.dead_pixels}")
+    problems = report.problems()
+    print("Проблем не найдено" if not problems else "Проблемы: " + "; ".join(problems))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Автоматическая проверка веб-камеры")
+    parser.add_argument("--source", default="0", help="номер камеры или путь к видеофайлу")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    source = int(args.source) if args.source.isdigit() else args.source
+    print_report(check_camera(source, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
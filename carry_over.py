@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Перенос пройденных шагов с прошлой проверки того же ноутбука.
+
+Ноутбуки возвращаются на стенд после замены детали, неудачного ОТК или возврата
+заказа. Для каждого шага, который прошел успешно, в базе хранится время
+прохождения, отпечаток связанного железа и результаты шага (его ключи
+TestSpec.results). При повторной проверке шаг, прошедший не раньше окна (по
+умолчанию 14 дней) и с тем же отпечатком, не выполняется заново, а переносится.
+Отпечаток строится по входам шага (сборщикам): для SSD/HDD - модели и серийники
+дисков, для батареи - модель, производитель, серийник и паспортная емкость, для
+экрана - EDID матрицы (производитель, модель, серийник), для остальных - состав
+устройств. Изменчивые показатели (часы работы, циклы, текущая емкость) в отпечаток
+не входят. Шаг без входов-сборщиков (клавиатура, кнопки тачпада, HWiNFO, учетные
+записи) не переносится никогда: замену его железа не по чему заметить. Так же и
+шаг, сборщик которого ничего не вернул.
+"""
+
+import dataclasses
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from session_journal import _json_default
+
+WINDOW_DAYS = 14
+
+
+def _as_dict(value):
+    return dataclasses.asdict(value) if dataclasses.is_dataclass(value) else dict(value or {})
+
+
+def identity(name, value):
+    """Неизменная часть результата сборщика: по ней видно, что железо заменили"""
+    if value is None:
+        return None
+    if name == 'inventory':
+        inventory = _as_dict(value)
+        return {'serial': inventory.get('serial'), 'model': inventory.get('model'), 'cpu': inventory.get('cpu'),
+                'gpus': sorted(gpu.get('name', '') for gpu in inventory.get('gpus', [])),
+                'disks': sorted((d.get('model', ''), d.get('serial', '')) for d in inventory.get('disks', []))}
+    if name == 'smart':
+        drives = []
+        for device, info in value.items():
+            record = info.get('record')
+            if record is None:
+                drives.append((device, ''))
+            else:
+                record = _as_dict(record)
+                drives.append((record.get('model', ''), record.get('serial', '')))
+        return sorted(drives)
+    if name == 'battery_report':
+        return sorted((b.get('name', ''), b.get('manufacturer', ''), b.get('serial', ''), b.get('design_mwh', 0))
+                      for b in map(_as_dict, _as_dict(value).get('batteries', [])))
+    if isinstance(value, str):
+        # Списки устройств из wmic/PowerShell: порядок строк и пробелы не важны
+        return sorted(line.strip() for line in value.splitlines() if line.strip())
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def fingerprint(values):
+    """Отпечаток железа шага по {сборщик: результат}; без входов - None (шаг не переносится)"""
+    if not values:
+        return None
+    parts = {name: identity(name, value) for name, value in sorted(values.items())}
+    text = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=_json_default)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def step_results(results, keys):
+    """Результаты шага (его ключи TestSpec.results) в виде JSON-совместимого словаря.
+
+    Берутся только ключи самого шага: пока оператор проходит шаг, фоновые задачи
+    пишут в те же результаты, и их значения не должны попасть в перенос этого шага.
+    """
+    owned = {key: results[key] for key in keys if key in results}
+    return json.loads(json.dumps(owned, ensure_ascii=False, default=_json_default))
+
+
+def record(fingerprint_value, results, passed_at=None):
+    """Запись о пройденном шаге для базы"""
+    passed_at = passed_at or datetime.now()
+    return {'passed_at': passed_at.isoformat(timespec='seconds'), 'fingerprint': fingerprint_value,
+            'results': results}
+
+
+def candidates(passed, window_days=WINDOW_DAYS, now=None, exclude=()):
+    """Шаги прошлой проверки, пройденные не раньше окна: {шаг: запись}"""
+    if not passed or window_days <= 0:
+        return {}
+    since = (now or datetime.now()) - timedelta(days=window_days)
+    fresh = {}
+    for name, entry in passed.items():
+        try:
+            passed_at = datetime.fromisoformat(entry['passed_at'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if name not in exclude and passed_at >= since:
+            fresh[name] = entry
+    return fresh
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Сервер сбора результатов со всех станций в одну базу.
+
+Станции (outbox.py) присылают по TCP строки JSON, по одному сообщению на строку:
+    {"id": "...", "station": "...", "tested_at": "...", "row": {...}, "artifacts": {"имя": "base64"}}
+Сервер складывает их пачками в одну транзакцию и отвечает {"ack": id, "ok": true}
+только после записи на диск, так что неподтвержденное сообщение станция пришлет снова.
+Каждое сообщение проверяется отдельно: неверное (битый base64, строка не словарь,
+база отвергла запись) получает {"ok": false}, остальные из той же пачки записываются.
+
+    python collector.py --host 0.0.0.0 --port 8765 --db central.db
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import binascii
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from results_db import ResultsStore
+
+DEFAULT_PORT = 8765
+COLLECTED_DIR = "collected"
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+def safe_name(value):
+    return re.sub(r'[^\w.-]', '_', str(value or "unknown"))[:100]
+
+
+class Collector:
+    """Принимает сообщения станций и пишет их в базу пачками"""
+
+    def __init__(self, db_path, artifacts_dir=COLLECTED_DIR, batch_size=500, batch_delay=0.02):
+        self.db_path = db_path
+        self.artifacts_dir = artifacts_dir
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.store = None
+        # Один поток записи: sqlite-соединение нельзя передавать между потоками
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="collector-db")
+        self.queue = None
+        self.server = None
+        self.writer_task = None
+        self.received = 0
+        self.batches = 0
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        loop = asyncio.get_running_loop()
+        self.store = await loop.run_in_executor(self.executor, ResultsStore, self.db_path)
+        self.queue = asyncio.Queue()
+        self.writer_task = asyncio.create_task(self._writer_loop())
+        self.server = await asyncio.start_server(self._handle_station, host, port, limit=MAX_MESSAGE_SIZE)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None:
+            await self.queue.put(None)
+            await self.writer_task
+        if self.store is not None:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.store.close)
+        self.executor.shutdown()
+
+    async def _handle_station(self, reader, writer):
+        pending = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    message_id = str(message['id'])
+                except (ValueError, KeyError, TypeError) as e:
+                    # Молча пропустить нельзя: станция ждала бы подтверждения до таймаута.
+                    # Отвечаем ошибкой и закрываем соединение (уже принятые подтвердятся)
+                    writer.write((json.dumps({'ack': None, 'ok': False, 'error': f"неверное сообщение: {e}"},
+                                             ensure_ascii=False) + "\n").encode())
+                    break
+                done = asyncio.get_running_loop().create_future()
+                await self.queue.put((message, done))
+                # Подтверждаем по мере записи; следующее сообщение читаем не дожидаясь
+                task = asyncio.create_task(self._ack(writer, message_id, done))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _ack(self, writer, message_id, done):
+        try:
+            await done
+            reply = {'ack': message_id, 'ok': True}
+        except Exception as e:
+            reply = {'ack': message_id, 'ok': False, 'error': str(e)}
+        writer.write((json.dumps(reply) + "\n").encode())
+        await writer.drain()
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Собираем пачку: все, что пришло за batch_delay, но не больше batch_size
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            messages = [message for message, _ in batch]
+            try:
+                errors = await loop.run_in_executor(self.executor, self._write_batch, messages)
+            except Exception as e:
+                errors = [e] * len(batch)
+            self.batches += 1
+            for (_, done), error in zip(batch, errors):
+                if error is None:
+                    self.received += 1
+                    done.set_result(True)
+                else:
+                    done.set_exception(error)
+
+    def _write_batch(self, messages):
+        """Пишет пачку; возвращает для каждого сообщения None или исключение-причину отказа.
+
+        Сообщения разбираются по одному, годные пишутся одной транзакцией. Если база
+        отвергла пачку целиком, годные пишутся по одному, чтобы отказ получило только
+        виновное сообщение, а не вся пачка.
+        """
+        errors = [None] * len(messages)
+        prepared = []
+        for index, message in enumerate(messages):
+            try:
+                prepared.append((index, message, self._prepare(message)))
+            except (ValueError, TypeError, binascii.Error) as e:
+                errors[index] = ValueError(f"неверное сообщение: {e}")
+        try:
+            self.store.upsert_batch([item for _, _, (item, _) in prepared])
+        except Exception:
+            for index, _, (item, _) in prepared:
+                try:
+                    self.store.upsert_batch([item])
+                except Exception as e:
+                    errors[index] = e
+        for index, message, (_, artifacts) in prepared:
+            if errors[index] is None:
+                # Файлы - после записи в базу: при повторной отправке сообщения
+                # строка пропускается как дубль, а файлы перезаписываются
+                try:
+                    self._save_artifacts(message, artifacts)
+                except OSError as e:
+                    errors[index] = e
+        return errors
+
+    @staticmethod
+    def _prepare(message):
+        """(запись для upsert_batch, {имя: байты}) или ValueError/TypeError для неверного сообщения"""
+        row = message.get('row') or {}
+        if not isinstance(row, dict):
+            raise TypeError("row должен быть объектом")
+        tested_at = message.get('tested_at')
+        if tested_at is not None:
+            datetime.fromisoformat(tested_at)
+        for key in ('smart', 'steps'):
+            if message.get(key) is not None and not isinstance(message[key], list):
+                raise TypeError(f"{key} должен быть списком")
+        artifacts = message.get('artifacts') or {}
+        if not isinstance(artifacts, dict):
+            raise TypeError("artifacts должен быть объектом")
+        decoded = {name: base64.b64decode(data, validate=True) for name, data in artifacts.items()}
+        item = (str(message['id']), message.get('station'), row, tested_at, message.get('smart'),
+                message.get('steps'), message.get('cpu_name'))
+        return item, decoded
+
+    def _save_artifacts(self, message, artifacts):
+        if not artifacts:
+            return
+        row = message.get('row') or {}
+        directory = os.path.join(self.artifacts_dir, safe_name(message.get('station')),
+                                 safe_name(row.get('Серийный номер') or message['id']))
+        os.makedirs(directory, exist_ok=True)
+        for name, data in artifacts.items():
+            with open(os.path.join(directory, safe_name(name)), 'wb') as f:
+                f.write(data)
+
+
+async def serve(host, port, db_path, artifacts_dir):
+    collector = Collector(db_path, artifacts_dir)
+    address = await collector.start(host, port)
+    print(f"Сервер сбора результатов слушает {address[0]}:{address[1]}, база: {db_path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await collector.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер сбора результатов со станций")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default="central_results.db")
+    parser.add_argument("--artifacts", default=COLLECTED_DIR)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.artifacts))
+    except KeyboardInterrupt:
+        print("Сервер остановлен")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,248 @@
-import pandas as pd
+import csv
+import json
 import os
+import re
+import shutil
+import sys
+import zipfile
+from xml.sax.saxutils import escape
 
-def convert_csv_to_xlsx():
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+from results_db import CSV_HEADERS, DB_FILE, ResultsStore
+from session_journal import atomic_write_json
+
+# Лист, который пишет xlsxwriter для единственного листа 'Results'
+SHEET_PATH = 'xl/worksheets/sheet1.xml'
+CHUNK_SIZE = 1 << 20
+
+
+def update_widths(widths, row):
+    """Ширина столбцов считается по ходу записи, без второго прохода по данным"""
+    for idx, value in enumerate(row):
+        if idx >= len(widths):
+            widths.append(0)
+        widths[idx] = max(widths[idx], len(str(value)))
+
+
+def write_xlsx(header, rows, xlsx_file):
+    """Пишет строки в новый xlsx в режиме constant_memory; возвращает (число строк, ширины столбцов).
+
+    rows - любой итератор списков: строки не собираются в памяти ни здесь, ни в xlsxwriter.
+    """
+    workbook = xlsxwriter.Workbook(xlsx_file, {'constant_memory': True})
+    worksheet = workbook.add_worksheet('Results')
+    widths = []
+    worksheet.write_row(0, 0, header)
+    update_widths(widths, header)
+    count = 0
+    for row in rows:
+        count += 1
+        worksheet.write_row(count, 0, row)
+        update_widths(widths, row)
+
+    # Автоподбор ширины столбцов
+    for idx, width in enumerate(widths):
+        worksheet.set_column(idx, idx, width + 2)
+
+    workbook.close()
+    return count, widths
+
+
+def state_path(xlsx_file):
+    return xlsx_file + '.state.json'
+
+
+def save_state(xlsx_file, last_id, revision, rows, widths):
+    """Что уже выгружено в xlsx (ResultsStore.export_marks): по этому --append находит новые строки"""
+    stat = os.stat(xlsx_file)
+    atomic_write_json(state_path(xlsx_file), {
+        'last_id': last_id, 'revision': revision, 'rows': rows, 'widths': widths,
+        'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+
+
+def load_state(xlsx_file):
+    """Состояние последней выгрузки; None - дописывать нельзя (нет файла, его сохранили в Excel и т.п.)"""
+    try:
+        with open(state_path(xlsx_file), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        stat = os.stat(xlsx_file)
+    except (OSError, ValueError):
+        return None
+    if (stat.st_size, stat.st_mtime_ns) != (state.get('size'), state.get('mtime_ns')):
+        return None
+    if any(key not in state for key in ('last_id', 'revision', 'rows', 'widths')):
+        return None
+    return state
+
+
+def excel_width(width):
+    """Ширина столбца в единицах Excel, как ее пишет xlsxwriter для шрифта Calibri 11"""
+    return int((int(width * 7 + 0.5) + 5) / 7.0 * 256.0) / 256.0
+
+
+def cols_xml(widths):
+    """<col> для ширин столбцов; соседние столбцы одной ширины - одним элементом, как у xlsxwriter"""
+    cols = []
+    start = 0
+    for idx in range(1, len(widths) + 1):
+        if idx == len(widths) or widths[idx] != widths[start]:
+            cols.append(f'<col min="{start + 1}" max="{idx}" width="{excel_width(widths[start] + 2):.16g}" '
+                        f'customWidth="1"/>')
+            start = idx
+    return ''.join(cols)
+
+
+def _text(value):
+    # Управляющие символы в XML недопустимы - Excel хранит их как _xHHHH_
+    return re.sub(r'[\x00-\x08\x0b-\x1f]', lambda m: f"_x{ord(m.group()):04X}_", str(value))
+
+
+def row_xml(row, index):
+    """Строка листа в том же виде, что пишет xlsxwriter в режиме constant_memory (inlineStr)"""
+    cells = []
+    for col, value in enumerate(row):
+        if value is None or value == '':
+            continue
+        ref = f"{xl_col_to_name(col)}{index + 1}"
+        if isinstance(value, bool):
+            cells.append(f'<c r="{ref}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(_text(value))
+            space = ' xml:space="preserve"' if text != text.strip() else ''
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t{space}>{text}</t></is></c>')
+    return f'<row r="{index + 1}">{"".join(cells)}</row>'
+
+
+def append_xlsx(xlsx_file, rows, start, widths):
+    """Дописывает rows в лист xlsx после строки start (без заголовка), не загружая книгу.
+
+    Файл xlsx - zip: все части копируются как есть, а XML листа копируется потоком,
+    новые строки вставляются перед </sheetData>, ширины столбцов и размер листа
+    в начале XML обновляются. Возвращает (число добавленных строк, ширины столбцов).
+    """
+    widths = list(widths)
+    tmp_file = xlsx_file + '.tmp'
+    try:
+        count = _append_parts(xlsx_file, tmp_file, rows, start, widths)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    os.replace(tmp_file, xlsx_file)
+    return count, widths
+
+
+def _append_parts(xlsx_file, tmp_file, rows, start, widths):
+    count = 0
+    with zipfile.ZipFile(xlsx_file) as src, zipfile.ZipFile(tmp_file, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            if info.filename != SHEET_PATH:
+                with src.open(info) as part, dst.open(info, 'w') as out:
+                    shutil.copyfileobj(part, out, CHUNK_SIZE)
+                continue
+            with src.open(info) as sheet, dst.open(SHEET_PATH, 'w') as out:
+                # Начало листа (до <sheetData>) небольшое - читаем его целиком
+                head = b''
+                while not re.search(rb'<sheetData/?>', head):
+                    chunk = sheet.read(CHUNK_SIZE)
+                    if not chunk:
+                        raise ValueError(f"в {xlsx_file} нет данных листа")
+                    head += chunk
+                match = re.search(rb'<sheetData/?>', head)
+                head, rest = head[:match.start()], head[match.end():]
+                empty = match.group() == b'<sheetData/>'
+
+                # Новые строки (их немного - только добавленные после прошлой выгрузки)
+                # собираются заранее: ширины столбцов пишутся в начале листа
+                new_rows = []
+                for row in rows:
+                    count += 1
+                    new_rows.append(row_xml(row, start + count).encode('utf-8'))
+                    update_widths(widths, row)
+                last = xl_col_to_name(max(len(widths), 1) - 1)
+                head = re.sub(rb'<dimension ref="[^"]*"/>', f'<dimension ref="A1:{last}{start + count + 1}"/>'.encode(),
+                              head)
+                cols = cols_xml(widths)
+                head = re.sub(rb'<cols>.*?</cols>', f'<cols>{cols}</cols>'.encode(), head, flags=re.S)
+                out.write(head + b'<sheetData>')
+                if empty:
+                    out.write(b''.join(new_rows) + b'</sheetData>' + rest)
+                    out.write(sheet.read())
+                    continue
+
+                # Остаток листа копируется потоком до </sheetData>
+                marker = b'</sheetData>'
+                buffer = rest
+                while marker not in buffer:
+                    chunk = sheet.read(CHUNK_SIZE)
+                    if not chunk:
+                        raise ValueError(f"в {xlsx_file} не закрыт sheetData")
+                    keep = len(marker) - 1
+                    out.write(buffer[:-keep])
+                    buffer = buffer[-keep:] + chunk
+                position = buffer.index(marker)
+                out.write(buffer[:position] + b''.join(new_rows) + buffer[position:])
+                shutil.copyfileobj(sheet, out, CHUNK_SIZE)
+    return count
+
+
+def db_rows(store, after_id=0, up_to_id=None):
+    """Строки базы по CSV_HEADERS в порядке добавления, по одной"""
+    for row in store.iter_rows(after_id, up_to_id):
+        yield [row.get(h, '') for h in CSV_HEADERS]
+
+
+def export_db(store, xlsx_file, append=False):
+    """Выгружает базу в xlsx; с append дописывает только новые строки. Возвращает (строк, дописано ли)"""
+    # Отметка берется до чтения строк: строка, измененная во время выгрузки,
+    # при следующем --append пересоберет таблицу
+    last_id, revision = store.export_marks()
+    state = load_state(xlsx_file) if append else None
+    # Уже выгруженную строку заменила повторная проверка (или пересчет колонки) -
+    # дописать нельзя, таблица собирается заново
+    if state is not None and not store.changed_since(state['revision'], state['last_id']):
+        count, widths = append_xlsx(xlsx_file, db_rows(store, state['last_id'], last_id), state['rows'],
+                                    state['widths'])
+        save_state(xlsx_file, last_id, revision, state['rows'] + count, widths)
+        return count, True
+    count, widths = write_xlsx(CSV_HEADERS, db_rows(store, 0, last_id), xlsx_file)
+    save_state(xlsx_file, last_id, revision, count, widths)
+    return count, False
+
+
+def convert_csv_to_xlsx(append=False, export_csv=False):
     # Путь к файлам
     csv_file = 'test_results.csv'
     xlsx_file = 'test_results.xlsx'
-    
+
     try:
-        # Читаем CSV с правильной кодировкой
-        df = pd.read_csv(csv_file, encoding='utf-8')
-        
-        # Создаем writer для Excel
-        writer = pd.ExcelWriter(xlsx_file, engine='xlsxwriter')
-        
-        # Записываем данные
-        df.to_excel(writer, index=False, sheet_name='Results')
-        
-        # Получаем объект workbook и worksheet
-        workbook = writer.book
-        worksheet = writer.sheets['Results']
-        
-        # Автоподбор ширины столбцов
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).apply(len).max(),
-                len(col)
-            ) + 2
-            worksheet.set_column(idx, idx, max_length)
-        
-        # Сохраняем результат
-        writer.close()
-        print(f"Файл успешно сконвертирован в {xlsx_file}")
-        
+        if os.path.exists(DB_FILE):
+            with ResultsStore(DB_FILE) as store:
+                if export_csv:
+                    store.export_csv(csv_file)
+                    print(f"База выгружена в {csv_file}")
+                count, appended = export_db(store, xlsx_file, append)
+            if appended:
+                print(f"Добавлено строк в {xlsx_file}: {count}")
+            else:
+                print(f"Файл успешно сконвертирован в {xlsx_file} (строк: {count})")
+        else:
+            # Базы еще нет (тестер не запускался) - конвертируем старый CSV как есть;
+            # ключа для дописывания у CSV нет, поэтому таблица всегда пишется заново
+            with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+                reader = csv.reader(f)
+                count, _ = write_xlsx(next(reader, []), reader, xlsx_file)
+            print(f"Файл успешно сконвертирован в {xlsx_file} (строк: {count})")
+
     except Exception as e:
         print(f"Ошибка при конвертации: {e}")
 
 if __name__ == "__main__":
-    convert_csv_to_xlsx()
\ No newline at end of file
+    # --append - дописать только строки, добавленные после прошлой выгрузки (если уже
+    # выгруженная строка изменилась, таблица собирается заново);
+    # --csv - заодно перезаписать test_results.csv из базы (ручные правки в CSV теряются)
+    convert_csv_to_xlsx(append='--append' in sys.argv[1:], export_csv='--csv' in sys.argv[1:])
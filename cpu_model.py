@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Модель процессора по названию из WMI (Win32_Processor.Name).
+
+Название очищается от (R)/(TM), частоты и встроенной графики, затем сверяется с
+таблицей заранее скомпилированных шаблонов (Intel Core/Core Ultra/Celeron/Pentium/
+Xeon/Atom, AMD Ryzen/Athlon/A-серия, Qualcomm Snapdragon, Apple M). Результат -
+производитель, линейка, семейство, номер модели, поколение и суффикс; колонка CPU
+таблицы - короткая метка вида «i5-8250U», «Ryzen 5 3500U», «Celeron N4020». Метка
+разбирается в ту же модель, поэтому уже сохраненные строки можно перенормализовать.
+По поколению из GENERATIONS берутся кодовое имя и год выпуска (для цены).
+
+Все строки базы пересчитываются одним проходом:
+
+    python cpu_model.py renormalize --db test_results.db [--dry-run]
+"""
+
+import argparse
+import re
+import sys
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+CPU_COLUMN = 'CPU'
+
+# (линейка, поколение) -> (кодовое имя, год выпуска первых моделей)
+GENERATIONS = {
+    ('Core', 1): ("Westmere", 2010),
+    ('Core', 2): ("Sandy Bridge", 2011),
+    ('Core', 3): ("Ivy Bridge", 2012),
+    ('Core', 4): ("Haswell", 2013),
+    ('Core', 5): ("Broadwell", 2015),
+    ('Core', 6): ("Skylake", 2015),
+    ('Core', 7): ("Kaby Lake", 2016),
+    ('Core', 8): ("Kaby Lake R / Coffee Lake / Whiskey Lake", 2017),
+    ('Core', 9): ("Coffee Lake Refresh", 2019),
+    ('Core', 10): ("Comet Lake / Ice Lake", 2019),
+    ('Core', 11): ("Tiger Lake", 2020),
+    ('Core', 12): ("Alder Lake", 2022),
+    ('Core', 13): ("Raptor Lake", 2023),
+    ('Core', 14): ("Raptor Lake Refresh", 2024),
+    ('Core Ultra', 1): ("Meteor Lake", 2023),
+    ('Core Ultra', 2): ("Lunar Lake / Arrow Lake", 2024),
+    ('Ryzen', 1): ("Summit Ridge", 2017),
+    ('Ryzen', 2): ("Raven Ridge", 2018),
+    ('Ryzen', 3): ("Picasso", 2019),
+    ('Ryzen', 4): ("Renoir", 2020),
+    ('Ryzen', 5): ("Cezanne / Lucienne", 2021),
+    ('Ryzen', 6): ("Rembrandt", 2022),
+    ('Ryzen', 7): ("Mendocino / Barcelo-R / Phoenix", 2023),
+    ('Ryzen', 8): ("Hawk Point", 2024),
+    ('Ryzen AI', 3): ("Strix Point", 2024),
+    ('A', 7): ("Bristol Ridge", 2016),
+    ('A', 9): ("Stoney Ridge", 2016),
+    ('Snapdragon X', 1): ("Oryon", 2024),
+    ('Apple M', 1): ("M1", 2020),
+    ('Apple M', 2): ("M2", 2022),
+    ('Apple M', 3): ("M3", 2023),
+}
+
+VENDORS = (("GenuineIntel", "Intel"), ("Intel", "Intel"), ("AuthenticAMD", "AMD"), ("AMD", "AMD"),
+           ("Qualcomm", "Qualcomm"), ("Snapdragon", "Qualcomm"), ("Apple", "Apple"), ("VIA", "VIA"),
+           ("MediaTek", "MediaTek"))
+
+
+@dataclass(frozen=True)
+class CpuModel:
+    vendor: str                  # Intel, AMD, Qualcomm...
+    brand: str                   # линейка: Core, Core Ultra, Ryzen, Celeron...
+    family: str                  # i5, Ultra 7, Ryzen 7 PRO, Celeron, Pentium Gold...
+    model: str                   # номер модели с суффиксом: 8250U, 155H, N4020
+    generation: Optional[int]    # поколение внутри линейки, если его видно по номеру
+    suffix: str                  # U, H, HX, G7, Y...
+    label: str                   # значение колонки CPU
+
+    @property
+    def codename(self):
+        info = GENERATIONS.get((self.brand, self.generation))
+        return info[0] if info else None
+
+    @property
+    def year(self):
+        info = GENERATIONS.get((self.brand, self.generation))
+        return info[1] if info else None
+
+
+# Мусор в названиях WMI: торговые знаки, частота, встроенная графика, число ядер
+_NOISE = re.compile(r"\((?:R|TM|C)\)|®|™|\bCPU\b|\bProcessor\b|@.*$|\s(?:with|w/)\s.*$|\d+-Core"
+                    r"|\bMobile\b|,.*$", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+_SUFFIX = re.compile(r"[A-Z]+\d?$")
+
+
+def _suffix(model):
+    found = _SUFFIX.search(model)
+    return found.group() if found else ""
+
+
+def _core(m):
+    tier, number, suffix = m.group(1), m.group(2), (m.group(3) or "").upper()
+    digits = number.lstrip("N")
+    if number.startswith("N"):
+        generation = None
+    elif len(digits) == 3:
+        generation = 1
+    elif len(digits) == 5 or digits.startswith("1"):
+        generation = int(digits[:2])
+    else:
+        generation = int(digits[0])
+    model = number + suffix
+    return CpuModel("Intel", "Core", f"i{tier}", model, generation, suffix, f"i{tier}-{model}")
+
+
+def _core_first(m):
+    # Первое поколение: «Core i5 CPU M 520» - буква серии перед номером
+    tier, letter, number = m.group(1), m.group(2).upper(), m.group(3)
+    model = number + letter
+    return CpuModel("Intel", "Core", f"i{tier}", model, 1, letter, f"i{tier}-{model}")
+
+
+def _core_ultra(m):
+    tier, number, suffix = m.group(1), m.group(2), (m.group(3) or "").upper()
+    model = number + suffix
+    return CpuModel("Intel", "Core Ultra", f"Ultra {tier}", model, int(number[0]), suffix,
+                    f"Ultra {tier} {model}")
+
+
+def _core_m(m):
+    tier, generation, rest = m.group(1) or "", m.group(2), m.group(3)
+    family = f"m{tier}" if tier else "M"
+    model = generation + rest
+    return CpuModel("Intel", "Core", family, model, int(generation), "Y", f"{family}-{model}")
+
+
+def _core2(m):
+    kind, model = m.group(1).title(), m.group(2).upper()
+    return CpuModel("Intel", "Core 2", f"Core 2 {kind}", model, None, "", f"Core 2 {kind} {model}")
+
+
+def _celeron_pentium(m):
+    brand, tier, model = m.group(1).title(), (m.group(2) or "").title(), m.group(3).upper()
+    family = f"{brand} {tier}" if tier else brand
+    return CpuModel("Intel", brand, family, model, None, _suffix(model), f"{family} {model}")
+
+
+def _intel_n(m):
+    model = m.group(1).upper()
+    return CpuModel("Intel", "Intel N", "N", model, None, "", model)
+
+
+def _xeon(m):
+    model = m.group(1).upper() + (f" {m.group(2).lower()}" if m.group(2) else "")
+    return CpuModel("Intel", "Xeon", "Xeon", model, None, _suffix(m.group(1).upper()), f"Xeon {model}")
+
+
+def _atom(m):
+    model = m.group(1)
+    return CpuModel("Intel", "Atom", "Atom", model, None, "", f"Atom {model}")
+
+
+def _ryzen(m):
+    ai, tier, pro, hx, number, suffix = m.groups()
+    suffix = (suffix or "").upper()
+    brand = "Ryzen AI" if ai else "Ryzen"
+    family = f"{brand} {tier}" + (" PRO" if pro else "")
+    model = f"HX {number}" if hx else number + suffix
+    return CpuModel("AMD", brand, family, model, int(number[0]), "HX" if hx else suffix, f"{family} {model}")
+
+
+def _athlon(m):
+    tier, model = (m.group(1) or "").title(), m.group(2).upper()
+    family = f"Athlon {tier}" if tier else "Athlon"
+    return CpuModel("AMD", "Athlon", family, model, None, _suffix(model), f"{family} {model}")
+
+
+def _amd_a(m):
+    family, number = m.group(1).upper(), m.group(2)
+    # A6-9220e: строчная e (маломощная версия) - часть номера
+    model = number[:-1].upper() + "e" if number.endswith("e") else number.upper()
+    generation = int(model[0]) if len(model.rstrip("e")) >= 4 else None
+    suffix = "e" if model.endswith("e") else _suffix(model)
+    return CpuModel("AMD", family[0], family, model, generation, suffix, f"{family}-{model}")
+
+
+def _snapdragon_x(m):
+    tier, model = m.group(1).title(), m.group(2).upper()
+    return CpuModel("Qualcomm", "Snapdragon X", f"Snapdragon X {tier}", model, 1, "",
+                    f"Snapdragon X {tier} {model}")
+
+
+def _snapdragon(m):
+    model = m.group(1) + (f" Gen {m.group(2)}" if m.group(2) else "")
+    return CpuModel("Qualcomm", "Snapdragon", "Snapdragon", model, None, "", f"Snapdragon {model}")
+
+
+def _apple(m):
+    generation, tier = m.group(1), (m.group(2) or "").title()
+    model = f"M{generation}" + (f" {tier}" if tier else "")
+    return CpuModel("Apple", "Apple M", "M", model, int(generation), tier, f"Apple {model}")
+
+
+# (подстрока для быстрого отсева, шаблон, сборка модели); первый совпавший выигрывает
+PATTERNS = [(key, re.compile(pattern, re.IGNORECASE), build) for key, pattern, build in (
+    ("ultra", r"\bUltra (\d) (\d{3})([A-Z]{0,2}\d?)\b", _core_ultra),
+    ("i", r"\bi([3579])-(N?\d{3,5})([A-Z]{0,2}\d?)\b", _core),
+    ("i", r"\bi([3579]) ([A-Z]) (\d{3})\b", _core_first),
+    ("m", r"\bm(?:([357])-| ?-)(\d)(Y\d\d\w*|\d{3}Y)\b", _core_m),
+    ("core", r"\bCore ?2 (Duo|Quad|Extreme|Solo) ([A-Z]{0,2}\d{3,4}\w*)", _core2),
+    ("celeron", r"\b(Celeron)(?: (Dual-Core|Silver|Gold))? ([A-Z]{0,2}\d{3,4}[A-Z]?\w*)", _celeron_pentium),
+    ("pentium", r"\b(Pentium)(?: (Silver|Gold|Dual-Core))? ([A-Z]{0,2}\d{3,4}[A-Z]?\w*)", _celeron_pentium),
+    ("xeon", r"\bXeon ((?:[EW]\d?-)?\d{4,5}[A-Z]{0,2}\d?)(?: (v\d))?", _xeon),
+    ("atom", r"\bAtom ([xXzZnN]\d?-?[A-Z]?\d{3,4}\w*)", _atom),
+    ("n", r"^(?:Intel )?(N\d{2,3})$", _intel_n),
+    ("ryzen", r"\bRyzen (?:(AI) )?(\d)(?: (PRO))?(?: (HX))? (\d{3,4})([A-Z]{0,2})\b", _ryzen),
+    ("athlon", r"\bAthlon(?: (Silver|Gold|Pro))? (\d{3,4}[A-Z]{0,2}\w*)", _athlon),
+    ("-", r"\b(A\d{1,2}|E\d?)-(\d{3,4}[A-Z]?e?)\b", _amd_a),
+    ("snapdragon", r"\bSnapdragon X (Elite|Plus)\b.*?\b(X1[A-Z]\d{5}|X1[A-Z]-?\d{2}-?\d{3})", _snapdragon_x),
+    ("snapdragon", r"\bSnapdragon (\d\w*)(?: Gen (\d))?", _snapdragon),
+    ("apple", r"\bApple M(\d)(?: (Pro|Max|Ultra))?\b", _apple),
+)]
+
+
+def clean(name):
+    """Название без торговых знаков, частоты и описания графики"""
+    return _SPACES.sub(" ", _NOISE.sub(" ", name or "")).strip()
+
+
+def vendor_of(name):
+    lowered = name.lower()
+    for key, vendor in VENDORS:
+        if key.lower() in lowered:
+            return vendor
+    return ""
+
+
+def classify(name):
+    """CpuModel по названию процессора или уже сохраненной метке; None - пустое название"""
+    text = clean(name)
+    if not text or text.lower() == "unknown":
+        return None
+    lowered = text.lower()
+    for key, pattern, build in PATTERNS:
+        if key in lowered:
+            m = pattern.search(text)
+            if m:
+                return build(m)
+    # Неизвестная модель: в колонку идет очищенное название целиком
+    return CpuModel(vendor_of(text), "", "", text, None, "", text)
+
+
+@lru_cache(maxsize=4096)
+def parse_cpu(name):
+    """classify() с кэшем: в базе тысячи строк с одними и теми же процессорами"""
+    return classify(name)
+
+
+def cpu_label(name):
+    """Значение колонки CPU для названия из WMI"""
+    model = parse_cpu(name)
+    return model.label if model else ''
+
+
+def renormalize(store, dry_run=False):
+    """Пересчитывает колонку CPU всех строк: по исходному названию из WMI, где оно сохранено,
+    иначе по текущей метке. Возвращает (строк, изменилось)."""
+    serials, names, labels = store.cpu_columns()
+    values = {}
+    for serial, name, label in zip(serials, names, labels):
+        new = cpu_label(name or label)
+        if new and new != label:
+            values[serial] = new
+    if not dry_run:
+        store.update_field(CPU_COLUMN, values)
+    return len(serials), len(values)
+
+
+def main():
+    from results_db import DB_FILE, ResultsStore
+
+    parser = argparse.ArgumentParser(description="Модель процессора по названию из WMI")
+    parser.add_argument("--db", default=DB_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("renormalize", help="пересчитать колонку CPU всех сохраненных ноутбуков").add_argument(
+        "--dry-run", action="store_true", help="только показать, сколько изменится")
+    show = sub.add_parser("parse", help="разобрать названия процессоров")
+    show.add_argument("names", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "parse":
+        for name in args.names:
+            model = parse_cpu(name)
+            print(f"{name!r}: {model}" + (f", {model.codename} ({model.year})" if model and model.year else ""))
+        return 0
+    with ResultsStore(args.db) as store:
+        start = time.perf_counter()
+        total, changed = renormalize(store, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - start
+    prefix = "Изменилось бы" if args.dry_run else "Изменено"
+    print(f"Строк: {total}. {prefix} значений CPU: {changed} ({elapsed:.2f} с)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Индекс базы дисков smartmontools (drivedb.h): семейство, предупреждения и атрибуты по модели.
+
+drivedb.h (~260 КБ, ~800 записей с регулярными выражениями) один раз компилируется
+в двоичный индекс рядом с ним: записи сгруппированы по буквальному началу регулярного
+выражения модели. Индекс открывается через mmap, поэтому поиск читает только каталог
+групп и несколько кандидатов - без разбора заголовка. Если drivedb.h изменился (размер
+или время изменения), индекс пересобирается при открытии.
+
+    python drivedb.py build
+    python drivedb.py lookup "KINGSTON SA400S37240G" [--firmware SBFKB1D2]
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+DRIVEDB_PATH = os.path.join("smartmontools", "bin", "drivedb.h")
+INDEX_SUFFIX = ".idx"
+MAGIC = b"DDBI"
+FORMAT_VERSION = 1
+KEY_SIZE = 4            # длина ключа группы: буквальное начало регулярного выражения, до 4 байт
+
+# заголовок: магия, версия формата, длина ключа, размер и mtime исходника,
+# число записей, групп и длина списков кандидатов
+_HEADER = struct.Struct("<4sHHQqIII")
+_BUCKET = struct.Struct(f"<{KEY_SIZE}sII")      # ключ, начало в списке кандидатов, сколько
+_ENTRY = struct.Struct("<10I")                  # 5 строк: (смещение, длина)
+_INDEX = struct.Struct("<I")
+_REGEX_META = set(".[]()*+?{}|^$\\")
+
+
+@dataclass
+class DriveEntry:
+    """Запись drivedb.h, подошедшая к диску"""
+    family: str
+    model_regex: str
+    firmware_regex: str
+    warning: str
+    presets: str
+    # id атрибута -> (формат, имя, тип диска HDD/SSD или "")
+    attributes: Dict[int, Tuple[str, str, str]] = field(default_factory=dict)
+
+
+def _c_strings(text):
+    """Записи { "строка" "строка", ... } из drivedb.h: список записей из списков полей"""
+    entries = []
+    fields = None
+    current = None
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if c == '/' and text.startswith('//', i):
+            i = text.find('\n', i)
+            i = n if i < 0 else i
+        elif c == '/' and text.startswith('/*', i):
+            i = text.find('*/', i + 2)
+            i = n if i < 0 else i + 2
+        elif c == '"':
+            j = i + 1
+            chunk = []
+            while text[j] != '"':
+                if text[j] == '\\':
+                    nxt = text[j + 1]
+                    chunk.append({'n': '\n', 't': '\t'}.get(nxt, nxt))
+                    j += 2
+                else:
+                    chunk.append(text[j])
+                    j += 1
+            current = (current or "") + "".join(chunk)
+            i = j + 1
+        elif c == '{':
+            fields, current = [], None
+            i += 1
+        elif c in ',}' and fields is not None:
+            if current is not None:
+                fields.append(current)
+            current = None
+            if c == '}':
+                entries.append(fields)
+                fields = None
+            i += 1
+        else:
+            i += 1
+    return entries
+
+
+def parse_drivedb(text):
+    """drivedb.h -> список (семейство, модель, прошивка, предупреждение, пресеты) в порядке файла"""
+    return [tuple(fields) for fields in _c_strings(text) if len(fields) == 5]
+
+
+def parse_presets(presets):
+    """'-v 9,raw24(raw8),Power_On_Hours,HDD ...' -> {9: ('raw24(raw8)', 'Power_On_Hours', 'HDD')}"""
+    attributes = {}
+    for match in re.finditer(r"-v\s+(\d+),([^,\s]+)(?:,([^,\s]+))?(?:,(HDD|SSD))?", presets):
+        attributes[int(match.group(1))] = (match.group(2), match.group(3) or "", match.group(4) or "")
+    return attributes
+
+
+def _split_alternatives(regex):
+    """Разбивает выражение по '|' вне скобок"""
+    parts, depth, start = [], 0, 0
+    for i, c in enumerate(regex):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == '|' and depth == 0:
+            parts.append(regex[start:i])
+            start = i + 1
+    parts.append(regex[start:])
+    return parts
+
+
+def _closing_paren(regex, start):
+    depth = 0
+    for i in range(start, len(regex)):
+        depth += regex[i] == '('
+        depth -= regex[i] == ')'
+        if depth == 0:
+            return i
+    return -1
+
+
+def _class_chars(content, limit=16):
+    """Символы класса '[GHTV]' / '[0-3]'; None для отрицания или слишком большого класса"""
+    if not content or content.startswith("^") or "[" in content:
+        return None
+    chars = set()
+    i = 0
+    while i < len(content):
+        if i + 2 < len(content) and content[i + 1] == '-':
+            chars.update(chr(code) for code in range(ord(content[i]), ord(content[i + 2]) + 1))
+            i += 3
+        else:
+            chars.add(content[i])
+            i += 1
+    return chars if len(chars) <= limit else None
+
+
+def _prefixes(regex, limit):
+    if limit <= 0 or not regex:
+        return {""}
+    c = regex[0]
+    if c == '(':
+        close = _closing_paren(regex, 0)
+        quantifier = regex[close + 1:close + 2]
+        if close < 0 or quantifier in ("*", "+", "{"):
+            return {""}
+        rest = regex[close + 2:] if quantifier == "?" else regex[close + 1:]
+        # Каждая альтернатива группы вместе с хвостом - обычное выражение без '|' на верхнем уровне
+        result = set().union(*(_prefixes(inner + rest, limit) for inner in _split_alternatives(regex[1:close])))
+        if quantifier == "?":
+            result |= _prefixes(rest, limit)
+        return result
+    if c == '[':
+        close = regex.find(']', 2)
+        chars = _class_chars(regex[1:close]) if close > 0 else None
+        if chars is None or regex[close + 1:close + 2] in ("?", "*", "{"):
+            return {""}
+        return {ch + tail for tail in _prefixes(regex[close + 1:], limit - 1) for ch in chars}
+    if c in _REGEX_META or regex[1:2] in ("?", "*", "{"):
+        return {""}
+    return {c + tail for tail in _prefixes(regex[1:], limit - 1)}
+
+
+def literal_prefixes(regex, limit=KEY_SIZE):
+    """Все возможные буквальные начала совпадений выражения (не длиннее limit символов).
+
+    'KINGSTON SA400S37(120|240)G' -> {'KING'}, '(SAMSUNG |)MZ7..' -> {'SAMS', 'MZ7'}.
+    Пустая строка в результате - начало неизвестно, запись проверяется для любой модели.
+    """
+    return set().union(*(_prefixes(a.lstrip("^"), limit) for a in _split_alternatives(regex)))
+
+
+def bucket_key(prefix):
+    return prefix.encode('utf-8')[:KEY_SIZE]
+
+
+def build_index(source=DRIVEDB_PATH, index_path=None):
+    """Компилирует drivedb.h в индекс; возвращает путь к индексу"""
+    index_path = index_path or source + INDEX_SUFFIX
+    with open(source, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    stat = os.stat(source)
+
+    blob = bytearray()
+    offsets = {}
+
+    def put(value):
+        data = value.encode('utf-8')
+        if data not in offsets:
+            offsets[data] = len(blob)
+            blob.extend(data)
+        return offsets[data], len(data)
+
+    entries = []
+    buckets = {}
+    for family, model, firmware, warning, presets in parse_drivedb(text):
+        # Служебные записи: версия, отключенные ($...) и USB-мосты - не модели дисков
+        if family.startswith(("VERSION", "$", "USB:")):
+            continue
+        index = len(entries)
+        entries.append(b"".join(struct.pack("<II", *put(v)) for v in (family, model, firmware, warning, presets)))
+        if family == "DEFAULT":
+            continue
+        for prefix in literal_prefixes(model):
+            buckets.setdefault(bucket_key(prefix), []).append(index)
+
+    keys = sorted(buckets)
+    directory = bytearray()
+    candidates = bytearray()
+    for key in keys:
+        directory += _BUCKET.pack(key, len(candidates) // _INDEX.size, len(buckets[key]))
+        for index in buckets[key]:
+            candidates += _INDEX.pack(index)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, KEY_SIZE, stat.st_size, stat.st_mtime_ns,
+                          len(entries), len(keys), len(candidates) // _INDEX.size)
+    tmp = index_path + ".tmp"
+    with open(tmp, 'wb') as f:
+        f.write(header + directory + candidates + b"".join(entries) + blob)
+    os.replace(tmp, index_path)
+    return index_path
+
+
+class DriveDb:
+    """Поиск по индексу drivedb.h через mmap; индекс собирается/пересобирается сам"""
+
+    def __init__(self, source=DRIVEDB_PATH, index_path=None):
+        self.source = source
+        self.index_path = index_path or source + INDEX_SUFFIX
+        self._map = None
+        self._regex = {}
+        self._models = {}
+        self._default = None
+        self._lock = threading.Lock()
+
+    def _fresh(self, stat):
+        try:
+            with open(self.index_path, 'rb') as f:
+                head = f.read(_HEADER.size)
+        except OSError:
+            return False
+        if len(head) < _HEADER.size:
+            return False
+        magic, version, key_size, size, mtime, *_ = _HEADER.unpack(head)
+        return ((magic, version, key_size) == (MAGIC, FORMAT_VERSION, KEY_SIZE)
+                and size == stat.st_size and mtime == stat.st_mtime_ns)
+
+    def open(self):
+        """Открывает индекс (при первом поиске это делается само)"""
+        with self._lock:
+            if self._map is None:
+                self._map = self._load()
+        return self
+
+    def _load(self):
+        if not self._fresh(os.stat(self.source)):
+            build_index(self.source, self.index_path)
+        with open(self.index_path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._entries, self._buckets, self._candidates = _HEADER.unpack_from(data, 0)[-3:]
+        self._directory_at = _HEADER.size
+        self._candidates_at = self._directory_at + self._buckets * _BUCKET.size
+        self._entries_at = self._candidates_at + self._candidates * _INDEX.size
+        self._blob_at = self._entries_at + self._entries * _ENTRY.size
+        # Каталог групп - несколько КБ, читаем его целиком; записи и строки остаются в mmap
+        self._directory = {key.rstrip(b"\0"): (first, count) for key, first, count
+                           in _BUCKET.iter_unpack(data[self._directory_at:self._candidates_at])}
+        return data
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _string(self, offset, length):
+        start = self._blob_at + offset
+        return self._map[start:start + length].decode('utf-8')
+
+    def _fields(self, index):
+        raw = _ENTRY.unpack_from(self._map, self._entries_at + index * _ENTRY.size)
+        return [self._string(raw[i], raw[i + 1]) for i in range(0, 10, 2)]
+
+    def _bucket(self, key):
+        found = self._directory.get(key)
+        if found is None:
+            return ()
+        first, count = found
+        return struct.unpack_from(f"<{count}I", self._map, self._candidates_at + first * _INDEX.size)
+
+    def _model_regex(self, index):
+        regex = self._models.get(index)
+        if regex is None:
+            offset, length = _ENTRY.unpack_from(self._map, self._entries_at + index * _ENTRY.size)[2:4]
+            regex = self._compile(self._string(offset, length))
+            self._models[index] = regex
+        return regex
+
+    def _compile(self, pattern):
+        regex = self._regex.get(pattern)
+        if regex is None:
+            try:
+                regex = re.compile(pattern)
+            except re.error:
+                regex = False
+            self._regex[pattern] = regex
+        return regex
+
+    def lookup(self, model, firmware=""):
+        """Первая подходящая запись (как в smartctl - по порядку файла) или None"""
+        self.open()
+        data = model.encode('utf-8')
+        candidates = set()
+        for length in range(KEY_SIZE + 1):
+            candidates.update(self._bucket(data[:length]))
+        for index in sorted(candidates):
+            regex = self._model_regex(index)
+            if not regex or regex.fullmatch(model) is None:
+                continue
+            # Остальные поля читаем, только если модель подошла
+            family, model_regex, firmware_regex, warning, presets = self._fields(index)
+            if firmware_regex:
+                regex = self._compile(firmware_regex)
+                if not regex or regex.fullmatch(firmware) is None:
+                    continue
+            return DriveEntry(family, model_regex, firmware_regex, warning, presets, parse_presets(presets))
+        return None
+
+    def default_attributes(self):
+        """Имена атрибутов из записи DEFAULT"""
+        if self._default is None:
+            self.open()
+            self._default = {}
+            for index in range(self._entries):
+                fields = self._fields(index)
+                if fields[0] == "DEFAULT":
+                    self._default = parse_presets(fields[4])
+                    break
+        return self._default
+
+    def attribute_names(self, entry=None):
+        """id -> имя атрибута: DEFAULT, поверх него - пресеты найденной записи модели"""
+        names = {id_: preset[1] for id_, preset in self.default_attributes().items() if preset[1]}
+        if entry:
+            names.update({id_: preset[1] for id_, preset in entry.attributes.items() if preset[1]})
+        return names
+
+
+_shared = None
+
+
+def shared_drivedb(source=DRIVEDB_PATH):
+    """Общий экземпляр для процесса; None, если drivedb.h нет"""
+    global _shared
+    if _shared is None or _shared.source != source:
+        if not os.path.exists(source):
+            return None
+        _shared = DriveDb(source)
+    return _shared
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Индекс базы дисков smartmontools")
+    parser.add_argument("--source", default=DRIVEDB_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="собрать индекс заново")
+    lookup = sub.add_parser("lookup", help="найти запись для модели")
+    lookup.add_argument("model")
+    lookup.add_argument("--firmware", default="")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        path = build_index(args.source)
+        print(f"Индекс записан: {path} ({os.path.getsize(path)} байт)")
+        return 0
+    with DriveDb(args.source) as db:
+        entry = db.lookup(args.model, args.firmware)
+    if entry is None:
+        print("Модель не найдена в базе")
+        return 1
+    print(f"Семейство: {entry.family}")
+    if entry.warning:
+        print(f"Предупреждение: {entry.warning}")
+    for id_, (fmt, name, kind) in sorted(entry.attributes.items()):
+        print(f"  {id_:>3} {name or '-':<28} {fmt} {kind}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Категория диска (A/B/C/D) по SMART: износ, часы, циклы, переназначенные секторы, ошибки.
+
+Правила - упорядоченный список категорий с предельными значениями показателей; диск
+получает первую категорию, во все пределы которой укладывается. Неизвестный показатель
+(например, износ у HDD) категорию не ограничивает. Диск, который сам сообщает о
+неисправности, получает запасную категорию. Правила по умолчанию можно заменить
+файлом grading_rules.json.
+
+grade() - для одного ноутбука во время теста (без NumPy). grade_batch() - векторно
+для всех сохраненных снимков SMART, когда правила изменились:
+
+    python grading.py regrade --db test_results.db [--rules grading_rules.json] [--dry-run]
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+
+RULES_FILE = "grading_rules.json"
+SSD_COLUMN = 'SSD (категория/часы наработки/циклы включения):'
+
+# Показатели снимка SMART, по которым можно ставить пределы
+METRICS = ('wear_percent', 'power_on_hours', 'power_cycles', 'reallocated_sectors',
+           'pending_sectors', 'uncorrectable_sectors', 'media_errors')
+
+DEFAULT_RULES = {
+    'grades': [
+        {'grade': 'A', 'max': {'wear_percent': 10, 'power_on_hours': 10000, 'power_cycles': 3000,
+                               'reallocated_sectors': 0, 'pending_sectors': 0,
+                               'uncorrectable_sectors': 0, 'media_errors': 0}},
+        {'grade': 'B', 'max': {'wear_percent': 30, 'power_on_hours': 20000, 'power_cycles': 6000,
+                               'reallocated_sectors': 10, 'pending_sectors': 0,
+                               'uncorrectable_sectors': 0, 'media_errors': 0}},
+        {'grade': 'C', 'max': {'wear_percent': 70, 'power_on_hours': 35000,
+                               'reallocated_sectors': 100, 'pending_sectors': 10, 'media_errors': 10}},
+    ],
+    # не подошла ни одна категория или диск сам сообщает о неисправности
+    'fallback': 'D',
+}
+
+
+def validate_rules(rules):
+    """Проверяет правила и возвращает их; ValueError с понятным текстом, если что-то не так"""
+    grades = rules.get('grades')
+    if not isinstance(grades, list) or not grades:
+        raise ValueError("в правилах нет списка 'grades'")
+    for item in grades:
+        if not item.get('grade'):
+            raise ValueError(f"у категории нет имени: {item}")
+        unknown = set(item.get('max', {})) - set(METRICS)
+        if unknown:
+            raise ValueError(f"категория {item['grade']}: неизвестные показатели {', '.join(sorted(unknown))}")
+    if not rules.get('fallback'):
+        raise ValueError("в правилах нет запасной категории 'fallback'")
+    return rules
+
+
+def load_rules(path=RULES_FILE):
+    """Правила из файла, если он есть, иначе правила по умолчанию"""
+    if path and os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return validate_rules(json.load(f))
+    return copy.deepcopy(DEFAULT_RULES)
+
+
+def rules_id(rules):
+    """Короткий отпечаток правил: по нему видно, какими правилами поставлена категория"""
+    data = json.dumps(rules, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:10]
+
+
+def snapshot(record):
+    """Снимок для оценки и хранения из SmartRecord (или любого объекта с теми же полями)"""
+    values = {metric: getattr(record, metric, None) for metric in METRICS}
+    values['failed'] = bool(getattr(record, 'failed', False))
+    return values
+
+
+def _value(snap, metric):
+    value = snap.get(metric)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def grade(snap, rules=None):
+    """Категория одного диска по снимку (словарь METRICS + 'failed')"""
+    rules = rules or DEFAULT_RULES
+    if snap.get('failed'):
+        return rules['fallback']
+    for item in rules['grades']:
+        if all(_value(snap, metric) is None or _value(snap, metric) <= limit
+               for metric, limit in item.get('max', {}).items()):
+            return item['grade']
+    return rules['fallback']
+
+
+def grade_batch(columns, rules=None):
+    """Категории для многих снимков сразу.
+
+    columns - {показатель: последовательность чисел или None, 'failed': последовательность bool}.
+    Возвращает массив NumPy строк той же длины.
+    """
+    import numpy as np
+
+    rules = rules or DEFAULT_RULES
+    failed = np.asarray(columns['failed'], dtype=bool)
+    letters = np.array([item['grade'] for item in rules['grades']] + [rules['fallback']])
+    result = np.full(len(failed), len(letters) - 1, dtype=np.intp)
+    undecided = ~failed
+    arrays = {}
+    for i, item in enumerate(rules['grades']):
+        fits = undecided.copy()
+        for metric, limit in item.get('max', {}).items():
+            if metric not in arrays:
+                # None -> NaN; NaN > limit ложно, то есть неизвестное значение не ограничивает
+                arrays[metric] = np.asarray(columns[metric], dtype=float)
+            fits &= ~(arrays[metric] > limit)
+        result[fits] = i
+        undecided &= ~fits
+    return letters[result]
+
+
+def format_drive(grade_letter, snap):
+    """'A/5979/2165' - как в колонке SSD таблицы"""
+    def number(metric):
+        value = _value(snap, metric)
+        return "" if value is None else str(int(value))
+    return f"{grade_letter}/{number('power_on_hours')}/{number('power_cycles')}"
+
+
+def regrade(store, rules, dry_run=False):
+    """Пересчитывает категории всех сохраненных снимков и колонку SSD в строках ноутбуков.
+
+    Возвращает (снимков, изменилось категорий, обновлено строк).
+    """
+    import numpy as np
+
+    ids, serials, columns, old = store.smart_columns(METRICS)
+    if not ids:
+        return 0, 0, 0
+    grades = grade_batch(columns, rules)
+    changed = (grades != np.asarray(old, dtype=object)).nonzero()[0].tolist()
+    changed_serials = {serials[i] for i in changed}
+
+    # Колонка SSD собирается заново по всем дискам ноутбука в порядке снимков
+    drives = {}
+    for i, serial in enumerate(serials):
+        if serial in changed_serials:
+            snap = {metric: columns[metric][i] for metric in ('power_on_hours', 'power_cycles')}
+            drives.setdefault(serial, []).append(format_drive(str(grades[i]), snap))
+    values = {serial: "; ".join(cells) for serial, cells in drives.items()}
+    if not dry_run:
+        store.set_smart_grades([(str(grades[i]), ids[i]) for i in changed], rules_id(rules))
+        store.update_field(SSD_COLUMN, values)
+    return len(ids), len(changed), len(values)
+
+
+def main():
+    from results_db import DB_FILE, ResultsStore
+
+    parser = argparse.ArgumentParser(description="Категории дисков по SMART")
+    parser.add_argument("--db", default=DB_FILE)
+    parser.add_argument("--rules", default=RULES_FILE, help="файл правил (по умолчанию - встроенные)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("regrade", help="пересчитать категории всех сохраненных дисков").add_argument(
+        "--dry-run", action="store_true", help="только показать, сколько изменится")
+    sub.add_parser("rules", help="показать действующие правила")
+    args = parser.parse_args()
+
+    try:
+        rules = load_rules(args.rules)
+    except ValueError as e:
+        print(f"Ошибка в правилах {args.rules}: {e}")
+        return 1
+    if args.command == "rules":
+        print(json.dumps(rules, ensure_ascii=False, indent=1))
+        return 0
+    with ResultsStore(args.db) as store:
+        start = time.perf_counter()
+        total, changed, rows = regrade(store, rules, dry_run=args.dry_run)
+        elapsed = time.perf_counter() - start
+    prefix = "Изменилось бы" if args.dry_run else "Изменено"
+    print(f"Снимков SMART: {total}, правила {rules_id(rules)}. {prefix} категорий: {changed}, "
+          f"строк таблицы: {rows} ({elapsed:.2f} с)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
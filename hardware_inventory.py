@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Сбор информации о железе одним пакетным запросом к WMI"""
+
+import subprocess
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Классы WMI и поля, которые нам нужны. Порядок важен только для вывода.
+WMI_QUERIES = [
+    ("csproduct", "csproduct", ["IdentifyingNumber", "Name", "Vendor"]),
+    ("cpu", "cpu", ["Name", "NumberOfCores", "NumberOfLogicalProcessors"]),
+    ("videocontroller", "path Win32_VideoController",
+     ["Name", "CurrentHorizontalResolution", "CurrentVerticalResolution", "VideoModeDescription"]),
+    ("diskdrive", "diskdrive", ["Model", "SerialNumber", "Size", "InterfaceType"]),
+]
+
+SECTION_MARKER = "###"
+
+
+@dataclass
+class VideoController:
+    name: str = "Unknown"
+    width: str = ""
+    height: str = ""
+    mode: str = ""
+
+    @property
+    def resolution(self):
+        if self.width and self.height:
+            return f"{self.width}x{self.height}"
+        return "Unknown"
+
+
+@dataclass
+class DiskDrive:
+    model: str = ""
+    serial: str = ""
+    size_bytes: int = 0
+    interface: str = ""
+
+    @property
+    def size_gb(self):
+        return self.size_bytes // (1000 ** 3)
+
+
+@dataclass
+class HardwareInventory:
+    serial: str = "Unknown"
+    model: str = "Unknown"
+    vendor: str = ""
+    cpu: str = "Unknown"
+    cpu_cores: str = ""
+    cpu_threads: str = ""
+    gpus: List[VideoController] = field(default_factory=list)
+    disks: List[DiskDrive] = field(default_factory=list)
+    # Заполняется из psutil в LaptopTester.get_hardware_info
+    ram_gb: float = 0.0
+    disk_info: str = ""
+
+    @property
+    def gpu(self):
+        """Первая видеокарта с непустым именем"""
+        for gpu in self.gpus:
+            if gpu.name and gpu.name != "Unknown":
+                return gpu.name
+        return "Unknown"
+
+    @property
+    def resolution(self):
+        """Разрешение активного видеоадаптера"""
+        for gpu in self.gpus:
+            if gpu.resolution != "Unknown":
+                return gpu.resolution
+        return "Unknown"
+
+
+class WmicBackend:
+    """Выполняет все запросы wmic одним вызовом cmd.exe"""
+
+    def __init__(self, encoding='cp866', timeout=60):
+        self.encoding = encoding
+        self.timeout = timeout
+
+    def build_command(self, queries=WMI_QUERIES):
+        parts = []
+        for section, alias, fields in queries:
+            parts.append(f"echo {SECTION_MARKER}{section}")
+            parts.append(f"wmic {alias} get {','.join(fields)} /value")
+        return " & ".join(parts)
+
+    def fetch(self, queries=WMI_QUERIES):
+        result = subprocess.run(self.build_command(queries), shell=True, capture_output=True,
+                                text=True, encoding=self.encoding, errors='replace',
+                                timeout=self.timeout)
+        return result.stdout
+
+
+class RecordedBackend:
+    """Отдает заранее записанный вывод (для проверки разбора без Windows)"""
+
+    def __init__(self, text=None, path=None, encoding='utf-8'):
+        if text is None:
+            text = Path(path).read_text(encoding=encoding)
+        self.text = text
+
+    def fetch(self, queries=WMI_QUERIES):
+        return self.text
+
+
+def parse_value_output(text):
+    """Разбирает вывод 'wmic ... /value' с маркерами секций.
+
+    Возвращает {секция: [{поле: значение}, ...]} - по записи на каждый экземпляр класса.
+    """
+    sections: Dict[str, List[Dict[str, str]]] = {}
+    records = None
+    current: Optional[Dict[str, str]] = None
+
+    # wmic завершает строки как \r\r\n - убираем \r, иначе каждая строка станет "пустой"
+    for raw_line in text.replace('\r', '').split('\n'):
+        line = raw_line.strip()
+        if line.startswith(SECTION_MARKER):
+            records = sections.setdefault(line[len(SECTION_MARKER):].strip(), [])
+            current = None
+            continue
+        if records is None:
+            continue
+        if not line:
+            # Пустые строки разделяют экземпляры класса
+            current = None
+            continue
+        if '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        if current is None or key in current:
+            current = {}
+            records.append(current)
+        current[key] = value.strip()
+
+    return sections
+
+
+def _first(records, key, default="Unknown"):
+    for record in records:
+        value = record.get(key, "")
+        if value:
+            return value
+    return default
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def build_inventory(sections):
+    """Собирает HardwareInventory из разобранных секций"""
+    product = sections.get("csproduct", [])
+    cpu = sections.get("cpu", [])
+
+    inventory = HardwareInventory(
+        serial=_first(product, "IdentifyingNumber"),
+        model=_first(product, "Name"),
+        vendor=_first(product, "Vendor", ""),
+        cpu=_first(cpu, "Name"),
+        cpu_cores=_first(cpu, "NumberOfCores", ""),
+        cpu_threads=_first(cpu, "NumberOfLogicalProcessors", ""),
+    )
+
+    for record in sections.get("videocontroller", []):
+        inventory.gpus.append(VideoController(
+            name=record.get("Name", "") or "Unknown",
+            width=record.get("CurrentHorizontalResolution", ""),
+            height=record.get("CurrentVerticalResolution", ""),
+            mode=record.get("VideoModeDescription", ""),
+        ))
+
+    for record in sections.get("diskdrive", []):
+        inventory.disks.append(DiskDrive(
+            model=record.get("Model", ""),
+            serial=record.get("SerialNumber", ""),
+            size_bytes=_to_int(record.get("Size")),
+            interface=record.get("InterfaceType", ""),
+        ))
+
+    return inventory
+
+
+class InventoryCollector:
+    """Собирает инвентарь через выбранный бэкенд (по умолчанию wmic)"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or WmicBackend()
+
+    def collect(self):
+        return build_inventory(parse_value_output(self.backend.fetch(WMI_QUERIES)))
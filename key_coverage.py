@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Раскладки клавиатуры и учет проверенных клавиш.
+
+Клавиша определяется по скан-коду (набор 1, у расширенных клавиш префикс 0xE0),
+он привязан к физическому месту клавиши и не зависит от языка ввода. Поэтому
+ANSI/ISO/JIS отличаются только набором и размером клавиш, а EN/RU - надписями.
+"""
+
+from dataclasses import dataclass
+
+EXTENDED = 0xE000
+
+# Клавиши, у которых скан-код неоднозначен (Pause шлет 0x45, как NumLock),
+# ищутся по коду виртуальной клавиши Windows
+VK_PAUSE = 0x13
+VK_SNAPSHOT = 0x2C
+VK_NUMLOCK = 0x90
+
+
+@dataclass(frozen=True)
+class Key:
+    name: str       # уникальное имя для отчета
+    label: str      # надпись на экране
+    code: int       # скан-код | EXTENDED
+    x: float        # положение и ширина в размерах обычной клавиши
+    y: int
+    width: float = 1.0
+    section: str = "main"   # main / nav / numpad
+    vk: int = 0
+
+
+def _row(y, x, keys, section="main"):
+    """keys: (имя, скан-код[, ширина[, надпись]]) или число - пропуск такой ширины"""
+    result = []
+    for spec in keys:
+        if isinstance(spec, (int, float)):
+            x += spec
+            continue
+        name, code = spec[0], spec[1]
+        width = spec[2] if len(spec) > 2 else 1.0
+        label = spec[3] if len(spec) > 3 else name
+        result.append(Key(name, label, code, x, y, width, section))
+        x += width
+    return result
+
+
+def _letters(names, first_code):
+    return [(name, first_code + i) for i, name in enumerate(names)]
+
+
+def _ansi_main():
+    keys = _row(0, 0, [("Esc", 0x01), 1] + _letters(["F1", "F2", "F3", "F4"], 0x3B) + [0.5]
+                + _letters(["F5", "F6", "F7", "F8"], 0x3F) + [0.5]
+                + _letters(["F9", "F10"], 0x43) + [("F11", 0x57), ("F12", 0x58)])
+    keys += _row(1, 0, [("`", 0x29)] + _letters(list("1234567890-="), 0x02) + [("Backspace", 0x0E, 2, "Back")])
+    keys += _row(2, 0, [("Tab", 0x0F, 1.5)] + _letters(list("QWERTYUIOP[]"), 0x10) + [("\\", 0x2B, 1.5)])
+    keys += _row(3, 0, [("CapsLock", 0x3A, 1.75, "Caps")] + _letters(list("ASDFGHJKL;'"), 0x1E)
+                 + [("Enter", 0x1C, 2.25)])
+    keys += _row(4, 0, [("LShift", 0x2A, 2.25, "Shift")] + _letters(list("ZXCVBNM,./"), 0x2C)
+                 + [("RShift", 0x36, 2.75, "Shift")])
+    keys += _row(5, 0, [("LCtrl", 0x1D, 1.25, "Ctrl"), ("LWin", EXTENDED | 0x5B, 1.25, "Win"),
+                        ("LAlt", 0x38, 1.25, "Alt"), ("Space", 0x39, 6.25),
+                        ("RAlt", EXTENDED | 0x38, 1.25, "Alt"), ("RWin", EXTENDED | 0x5C, 1.25, "Win"),
+                        ("Menu", EXTENDED | 0x5D, 1.25), ("RCtrl", EXTENDED | 0x1D, 1.25, "Ctrl")])
+    return keys
+
+
+def _iso_main():
+    keys = [k for k in _ansi_main() if k.name not in ("\\", "Enter", "LShift")]
+    keys += _row(2, 13.5, [("Enter", 0x1C, 1.5)])
+    keys += _row(3, 12.75, [("#", 0x2B)])
+    keys += _row(4, 0, [("LShift", 0x2A, 1.25, "Shift"), ("\\", 0x56)])
+    return keys
+
+
+def _jis_main():
+    keys = [k for k in _iso_main()
+            if k.name not in ("`", "Backspace", "LShift", "\\", "RShift", "Space", "RAlt")]
+    keys += _row(1, 0, [("Hankaku", 0x29, 1, "Hnk")])
+    keys += _row(1, 13, [("Yen", 0x7D), ("Backspace", 0x0E, 1, "Bk")])
+    keys += _row(4, 0, [("LShift", 0x2A, 2.25, "Shift")])
+    keys += _row(4, 12.25, [("Ro", 0x73), ("RShift", 0x36, 1.75, "Shift")])
+    keys += _row(5, 3.75, [("Muhenkan", 0x7B, 1.25, "Muh"), ("Space", 0x39, 2.5),
+                           ("Henkan", 0x79, 1.25, "Hen"), ("Kana", 0x70, 1.25),
+                           ("RAlt", EXTENDED | 0x38, 1.25, "Alt")])
+    return keys
+
+
+def _nav():
+    keys = _row(0, 15.25, [("PrtSc", EXTENDED | 0x37, 1, "Prt"), ("ScrollLock", 0x46, 1, "Scr"),
+                           ("Pause", 0x45, 1, "Pau")], "nav")
+    keys += _row(1, 15.25, [("Insert", EXTENDED | 0x52, 1, "Ins"), ("Home", EXTENDED | 0x47, 1, "Hom"),
+                            ("PgUp", EXTENDED | 0x49, 1, "PgU")], "nav")
+    keys += _row(2, 15.25, [("Delete", EXTENDED | 0x53, 1, "Del"), ("End", EXTENDED | 0x4F),
+                            ("PgDn", EXTENDED | 0x51, 1, "PgD")], "nav")
+    keys += _row(4, 16.25, [("Up", EXTENDED | 0x48, 1, "^")], "nav")
+    keys += _row(5, 15.25, [("Left", EXTENDED | 0x4B, 1, "<"), ("Down", EXTENDED | 0x50, 1, "v"),
+                            ("Right", EXTENDED | 0x4D, 1, ">")], "nav")
+    vks = {"PrtSc": VK_SNAPSHOT, "Pause": VK_PAUSE}
+    return [Key(k.name, k.label, k.code, k.x, k.y, k.width, k.section, vks.get(k.name, 0)) for k in keys]
+
+
+def _numpad():
+    keys = _row(1, 18.5, [("NumLock", EXTENDED | 0x45, 1, "Num"), ("Num/", EXTENDED | 0x35, 1, "/"),
+                          ("Num*", 0x37, 1, "*"), ("Num-", 0x4A, 1, "-")], "numpad")
+    keys += _row(2, 18.5, [("Num7", 0x47, 1, "7"), ("Num8", 0x48, 1, "8"), ("Num9", 0x49, 1, "9"),
+                           ("Num+", 0x4E, 1, "+")], "numpad")
+    keys += _row(3, 18.5, [("Num4", 0x4B, 1, "4"), ("Num5", 0x4C, 1, "5"), ("Num6", 0x4D, 1, "6")], "numpad")
+    keys += _row(4, 18.5, [("Num1", 0x4F, 1, "1"), ("Num2", 0x50, 1, "2"), ("Num3", 0x51, 1, "3"),
+                           ("NumEnter", EXTENDED | 0x1C, 1, "Ent")], "numpad")
+    keys += _row(5, 18.5, [("Num0", 0x52, 2, "0"), ("Num.", 0x53, 1, ".")], "numpad")
+    return [Key(k.name, k.label, k.code, k.x, k.y, k.width, k.section, VK_NUMLOCK if k.name == "NumLock" else 0)
+            for k in keys]
+
+
+PHYSICAL_LAYOUTS = {
+    'ansi': _ansi_main,
+    'iso': _iso_main,
+    'jis': _jis_main,
+}
+
+# Надписи на буквенных клавишах по скан-коду
+LABELS = {
+    'en': {},
+    'ru': dict(zip(
+        [0x29] + list(range(0x10, 0x1C)) + list(range(0x1E, 0x29)) + list(range(0x2C, 0x36)),
+        "ЁЙЦУКЕНГШЩЗХЪФЫВАПРОЛДЖЭЯЧСМИТЬБЮ.")),
+}
+
+
+# USB HID usage (его же SDL/pygame отдают как event.scancode) -> скан-код набора 1
+USB_TO_SCAN = {
+    **dict(zip(range(4, 30), [0x1E, 0x30, 0x2E, 0x20, 0x12, 0x21, 0x22, 0x23, 0x17, 0x24, 0x25, 0x26, 0x32,
+                              0x31, 0x18, 0x19, 0x10, 0x13, 0x1F, 0x14, 0x16, 0x2F, 0x11, 0x2D, 0x15, 0x2C])),
+    **dict(zip(range(30, 40), range(0x02, 0x0C))),
+    **dict(zip(range(40, 58), [0x1C, 0x01, 0x0E, 0x0F, 0x39, 0x0C, 0x0D, 0x1A, 0x1B, 0x2B, 0x2B, 0x27, 0x28,
+                               0x29, 0x33, 0x34, 0x35, 0x3A])),
+    **dict(zip(range(58, 68), range(0x3B, 0x45))),
+    68: 0x57, 69: 0x58, 70: EXTENDED | 0x37, 71: 0x46, 72: 0x45,
+    **dict(zip(range(73, 83), [EXTENDED | c for c in (0x52, 0x47, 0x49, 0x53, 0x4F, 0x51, 0x4D, 0x4B, 0x50, 0x48)])),
+    83: EXTENDED | 0x45, 84: EXTENDED | 0x35, 85: 0x37, 86: 0x4A, 87: 0x4E, 88: EXTENDED | 0x1C,
+    **dict(zip(range(89, 100), [0x4F, 0x50, 0x51, 0x4B, 0x4C, 0x4D, 0x47, 0x48, 0x49, 0x52, 0x53])),
+    100: 0x56, 101: EXTENDED | 0x5D,
+    135: 0x73, 136: 0x70, 137: 0x7D, 138: 0x79, 139: 0x7B,
+    224: 0x1D, 225: 0x2A, 226: 0x38, 227: EXTENDED | 0x5B,
+    228: EXTENDED | 0x1D, 229: 0x36, 230: EXTENDED | 0x38, 231: EXTENDED | 0x5C,
+}
+
+
+class KeyboardLayout:
+    """Клавиши раскладки и готовые индексы: скан-код -> номер клавиши, место на экране"""
+
+    def __init__(self, physical='ansi', labels='en', numpad=True, nav=True):
+        if physical not in PHYSICAL_LAYOUTS:
+            raise ValueError(f"неизвестная раскладка {physical!r}, есть: {', '.join(PHYSICAL_LAYOUTS)}")
+        if labels not in LABELS:
+            raise ValueError(f"неизвестные надписи {labels!r}, есть: {', '.join(LABELS)}")
+        self.physical = physical
+        self.labels = labels
+        keys = PHYSICAL_LAYOUTS[physical]()
+        if nav:
+            keys += _nav()
+        if numpad:
+            keys += _numpad()
+        names = LABELS[labels]
+        self.keys = sorted(
+            (Key(names[k.code], names[k.code], k.code, k.x, k.y, k.width, k.section, k.vk)
+             if k.code in names else k for k in keys),
+            key=lambda k: (k.y, k.x))
+        self.by_code = {k.code: i for i, k in enumerate(self.keys)}
+        self.by_vk = {k.vk: i for i, k in enumerate(self.keys) if k.vk}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def find(self, scan_code, extended=False, vk=0):
+        """Номер клавиши по событию клавиатуры или None"""
+        if vk in self.by_vk:
+            return self.by_vk[vk]
+        return self.by_code.get(scan_code | (EXTENDED if extended else 0))
+
+    def find_usb(self, usage):
+        """Номер клавиши по USB HID usage (pygame event.scancode) или None"""
+        code = USB_TO_SCAN.get(usage)
+        if code == 0x45:
+            return self.by_vk.get(VK_PAUSE)
+        return None if code is None else self.by_code.get(code)
+
+    def cells(self, unit=4):
+        """Номер клавиши -> (строка, столбец, ширина) на текстовом экране, unit символов на клавишу"""
+        return [(k.y, round(k.x * unit), max(round(k.width * unit) - 1, len(k.label)))
+                for k in self.keys]
+
+
+class KeyCoverage:
+    """Какие клавиши раскладки уже нажимались: битовая маска по номерам клавиш"""
+
+    def __init__(self, layout):
+        self.layout = layout
+        self.all_mask = (1 << len(layout)) - 1
+        self.tested = 0
+
+    def press(self, index):
+        """Отмечает клавишу; True, если она нажата впервые"""
+        bit = 1 << index
+        if self.tested & bit:
+            return False
+        self.tested |= bit
+        return True
+
+    def is_tested(self, index):
+        return bool(self.tested >> index & 1)
+
+    @property
+    def tested_count(self):
+        return bin(self.tested).count('1')
+
+    @property
+    def complete(self):
+        return self.tested == self.all_mask
+
+    def untested(self):
+        """Имена непроверенных клавиш в порядке раскладки"""
+        missing = self.all_mask & ~self.tested
+        return [k.name for i, k in enumerate(self.layout.keys) if missing >> i & 1]
+
+    def report(self):
+        return {
+            'layout': self.layout.physical,
+            'labels': self.layout.labels,
+            'total': len(self.layout),
+            'tested': self.tested_count,
+            'untested': self.untested(),
+        }
+
+
+def add_layout_arguments(parser):
+    parser.add_argument("--layout", choices=list(PHYSICAL_LAYOUTS), default="ansi",
+                        help="физическая раскладка (по умолчанию ansi)")
+    parser.add_argument("--labels", choices=list(LABELS), default="en", help="надписи на клавишах")
+    parser.add_argument("--no-numpad", action="store_true", help="клавиатура без цифрового блока")
+    parser.add_argument("--no-nav", action="store_true", help="без отдельного блока Ins/Home/PgUp и стрелок")
+    parser.add_argument("--report", metavar="FILE", help="сохранить непроверенные клавиши в JSON")
+
+
+def layout_from_args(args):
+    return KeyboardLayout(args.layout, args.labels, numpad=not args.no_numpad, nav=not args.no_nav)
+
+
+def format_untested(untested, limit=20):
+    """Строка для колонки 'Клавиатура:'"""
+    if not untested:
+        return "+"
+    names = ", ".join(untested[:limit])
+    if len(untested) > limit:
+        names += f" и еще {len(untested) - limit}"
+    return f"не проверены: {names}"
@@ -1,72 +1,193 @@
-import pygame
-from pynput import keyboard
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Окно с раскладкой клавиатуры: нажатые клавиши подсвечиваются, проверенные остаются зелеными.
+
+Надписи и плитки клавиш рисуются один раз и берутся из кэша; на экран выводятся
+только клавиши, у которых изменилось состояние. Цикл ждет событий и не грузит
+процессор, пока клавиши не нажимают.
+
+    python keyboard.py --layout iso --report keyboard_report.json
+"""
 
-# Initialize pygame
-pygame.init()
+import argparse
 
-# Screen dimensions
-WIDTH, HEIGHT = 800, 400
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Keyboard Layout")
+import pygame
+
+from key_coverage import KeyCoverage, add_layout_arguments, format_untested, layout_from_args
+from session_journal import atomic_write_json
 
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
-GRAY = (200, 200, 200)
+GRAY = (90, 90, 90)
+GREEN = (40, 160, 60)
 BLUE = (0, 0, 255)
 
-# Key layout (simplified example)
-keys = [
-    {"key": "Q", "rect": pygame.Rect(50, 50, 50, 50)},
-    {"key": "W", "rect": pygame.Rect(110, 50, 50, 50)},
-    {"key": "E", "rect": pygame.Rect(170, 50, 50, 50)},
-    {"key": "A", "rect": pygame.Rect(50, 110, 50, 50)},
-    {"key": "S", "rect": pygame.Rect(110, 110, 50, 50)},
-    {"key": "D", "rect": pygame.Rect(170, 110, 50, 50)},
-]
-
-# Track pressed keys
-pressed_keys = set()
-
-# Function to draw the keyboard layout
-def draw_keyboard():
-    screen.fill(BLACK)
-    for key in keys:
-        color = BLUE if key["key"] in pressed_keys else GRAY
-        pygame.draw.rect(screen, color, key["rect"])
-        pygame.draw.rect(screen, WHITE, key["rect"], 2)
-        font = pygame.font.Font(None, 36)
-        text = font.render(key["key"], True, WHITE)
-        text_rect = text.get_rect(center=key["rect"].center)
-        screen.blit(text, text_rect)
-
-# Pynput listener for key presses
-def on_press(key):
-    try:
-        pressed_keys.add(key.char.upper())
-    except AttributeError:
-        pass
+UNIT = 44           # размер обычной клавиши в пикселях
+GAP = 4
+MARGIN = 20
+STATUS_HEIGHT = 40
+MAX_FPS = 60        # чаще перерисовывать нет смысла, события копятся до следующего кадра
+EXIT_PRESSES = 3    # столько Esc подряд - выход
+
+UNTESTED, TESTED, PRESSED = range(3)
+STATE_COLORS = {UNTESTED: GRAY, TESTED: GREEN, PRESSED: BLUE}
+
+
+class KeyboardVisualizer:
+    """Отрисовка раскладки с кэшем плиток и перерисовкой только изменившихся клавиш"""
+
+    def __init__(self, coverage, unit=UNIT):
+        self.coverage = coverage
+        self.layout = coverage.layout
+        self.unit = unit
+        self.rects = [
+            pygame.Rect(MARGIN + round(k.x * unit), MARGIN + k.y * unit,
+                        round(k.width * unit) - GAP, unit - GAP)
+            for k in self.layout.keys
+        ]
+        width = max(r.right for r in self.rects) + MARGIN
+        height = max(r.bottom for r in self.rects) + MARGIN + STATUS_HEIGHT
+        self.size = (width, height)
+        self.status_rect = pygame.Rect(MARGIN, height - STATUS_HEIGHT, width - 2 * MARGIN, STATUS_HEIGHT - GAP)
+        self.screen = None
+        self.font = None
+        self.status_font = None
+        self.glyphs = {}
+        self.tiles = {}
+        self.held = set()
+        self.dirty = set()
+        self.status_dirty = True
+        self.message = ""
+
+    def open(self, screen=None):
+        pygame.init()
+        self.screen = screen or pygame.display.set_mode(self.size)
+        pygame.display.set_caption("Keyboard Layout")
+        self.font = pygame.font.Font(None, self.unit * 2 // 3)
+        self.status_font = pygame.font.Font(None, 28)
+
+    def glyph(self, label):
+        """Надпись рендерится один раз на все время работы"""
+        surface = self.glyphs.get(label)
+        if surface is None:
+            surface = self.glyphs[label] = self.font.render(label, True, WHITE)
+        return surface
 
-def on_release(key):
+    def state(self, index):
+        if index in self.held:
+            return PRESSED
+        return TESTED if self.coverage.is_tested(index) else UNTESTED
+
+    def tile(self, index, state):
+        """Готовая плитка клавиши в данном состоянии"""
+        key = (index, state)
+        surface = self.tiles.get(key)
+        if surface is None:
+            rect = self.rects[index]
+            surface = pygame.Surface(rect.size)
+            surface.fill(STATE_COLORS[state])
+            pygame.draw.rect(surface, WHITE, surface.get_rect(), 2)
+            glyph = self.glyph(self.layout.keys[index].label)
+            surface.blit(glyph, glyph.get_rect(center=surface.get_rect().center))
+            self.tiles[key] = surface
+        return surface
+
+    def draw_all(self):
+        """Полная перерисовка: первый кадр и после того, как окно было перекрыто"""
+        self.screen.fill(BLACK)
+        for index, rect in enumerate(self.rects):
+            self.screen.blit(self.tile(index, self.state(index)), rect)
+        self._draw_status()
+        self.dirty.clear()
+        self.status_dirty = False
+        pygame.display.flip()
+
+    def _draw_status(self):
+        self.screen.fill(BLACK, self.status_rect)
+        text = f"Проверено: {self.coverage.tested_count} из {len(self.layout)}"
+        if self.message:
+            text += f"   {self.message}"
+        self.screen.blit(self.status_font.render(text, True, WHITE), self.status_rect)
+        return self.status_rect
+
+    def key_event(self, usage, down):
+        """Событие клавиши по USB HID usage (event.scancode); возвращает номер клавиши или None"""
+        index = self.layout.find_usb(usage)
+        if index is None:
+            if down:
+                self.message = f"Клавиша вне раскладки: {usage}"
+                self.status_dirty = True
+            return None
+        # PrtSc присылает только отпускание, поэтому засчитываем и его
+        if self.coverage.press(index):
+            self.status_dirty = True
+        if down:
+            self.held.add(index)
+            self.message = self.layout.keys[index].name
+            self.status_dirty = True
+        else:
+            self.held.discard(index)
+        self.dirty.add(index)
+        return index
+
+    def render(self):
+        """Выводит только изменившиеся клавиши; возвращает число обновленных областей"""
+        rects = []
+        for index in self.dirty:
+            rect = self.rects[index]
+            self.screen.blit(self.tile(index, self.state(index)), rect)
+            rects.append(rect)
+        self.dirty.clear()
+        if self.status_dirty:
+            rects.append(self._draw_status())
+            self.status_dirty = False
+        if rects:
+            pygame.display.update(rects)
+        return len(rects)
+
+    def run(self):
+        clock = pygame.time.Clock()
+        esc_index = self.layout.find(0x01)
+        esc_in_row = 0
+        self.draw_all()
+        while True:
+            # Ждем первое событие, остальные забираем пачкой до следующего кадра
+            events = [pygame.event.wait()] + pygame.event.get()
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.draw_all()
+                elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                    index = self.key_event(event.scancode, event.type == pygame.KEYDOWN)
+                    if event.type == pygame.KEYDOWN and index is not None:
+                        esc_in_row = esc_in_row + 1 if index == esc_index else 0
+            self.render()
+            if esc_in_row >= EXIT_PRESSES or self.coverage.complete:
+                return
+            clock.tick(MAX_FPS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Тест клавиатуры в окне")
+    add_layout_arguments(parser)
+    args = parser.parse_args()
+
+    coverage = KeyCoverage(layout_from_args(args))
+    visualizer = KeyboardVisualizer(coverage)
+    visualizer.open()
     try:
-        pressed_keys.discard(key.char.upper())
-    except AttributeError:
-        pass
-
-# Start pynput listener
-listener = keyboard.Listener(on_press=on_press, on_release=on_release)
-listener.start()
-
-# Main loop
-running = True
-while running:
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    draw_keyboard()
-    pygame.display.flip()
-
-# Quit pygame
-pygame.quit()
-listener.stop()
\ No newline at end of file
+        visualizer.run()
+    finally:
+        pygame.quit()
+
+    report = coverage.report()
+    print(f"Проверено клавиш: {report['tested']} из {report['total']}")
+    print(f"Клавиатура: {format_untested(report['untested'])}")
+    if args.report:
+        atomic_write_json(args.report, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,54 +3,154 @@
 
 import os
 import sys
+import argparse
 import csv
 import subprocess
 import platform
-import psutil
 import time
 import json
 import shutil
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
+from hardware_inventory import InventoryCollector
+from smart_info import SmartPoller
+from scheduler import Scheduler, Task
+from results_db import CSV_FILE, DB_FILE, normalize_serial, open_store
+from session_journal import SessionJournal
+from carry_over import WINDOW_DAYS, candidates, fingerprint, record, step_results
+from tracing import Tracer
+from answers import Answers, load_answers_file, parse_answer_flags
+from key_coverage import format_untested
+from cpu_model import cpu_label
+from test_registry import registry, resolve
+
+# Неинтерактивные запросы, которые можно выполнить заранее в фоне
+AUDIO_DEVICES_CMD = 'powershell "Get-WmiObject -Class Win32_SoundDevice | Select-Object Name, Status"'
+CAMERA_DEVICES_CMD = 'powershell "Get-WmiObject -Class Win32_PnPEntity | Where-Object {$_.Name -like \'*camera*\' -or $_.Name -like \'*webcam*\'} | Select-Object Name, Status"'
+MIC_DEVICES_CMD = 'powershell "Get-WmiObject -Class Win32_SoundDevice | Where-Object {$_.Name -like \'*microphone*\' -or $_.Name -like \'*mic*\'} | Select-Object Name, Status"'
+TOUCH_DEVICES_CMD = 'powershell "Get-WmiObject -Class Win32_PnPEntity | Where-Object {$_.Name -like \'*touch*\' -or $_.Name -like \'*digitizer*\'} | Select-Object Name, Status"'
+POINTING_DEVICES_CMD = 'wmic path Win32_PointingDevice get Name,DeviceInterface,Status /format:table'
+# Матрицы по EDID (производитель, код модели, серийник): по ним видно замену матрицы
+MONITORS_CMD = 'powershell "Get-CimInstance -Namespace root\\wmi -ClassName WmiMonitorID | ForEach-Object { ($_.ManufacturerName, $_.ProductCodeID, $_.SerialNumberID | ForEach-Object { -join [char[]]($_ | Where-Object { $_ -ne 0 }) }) -join \' \' }"'
+DEVICE_ERRORS_CMD = 'powershell "Get-WmiObject -Class Win32_PnPEntity | Where-Object {$_.ConfigManagerErrorCode -ne 0} | Select-Object Name, ConfigManagerErrorCode"'
+# Сколько ждать фоновый сборщик, прежде чем шаг пойдет без его данных, с
+COLLECT_TIMEOUT = 120
+BATTERY_REPORT_FILE = 'battery_report.html'
+BATTERY_REPORT_XML = 'battery_report.xml'
+KEYBOARD_TESTER = os.path.join('auto', 'keyboard.py')
+KEYBOARD_REPORT_FILE = 'keyboard_report.json'
+KEYBOARD_LAYOUTS = {'1': 'ansi', '2': 'iso', '3': 'jis'}
+KEYBOARD_LABELS = {'1': 'en', '2': 'ru'}
+MOUSE_TESTER = 'mouse.py'
+MOUSE_REPORT_FILE = 'mouse_report.json'
+
+def mark(result):
+    """Результат ask_user_result для таблицы: + / - / пусто, если пропущен"""
+    if result is None:
+        return ''
+    return '+' if result is True else '-'
+
+
 class LaptopTester:
-    def __init__(self):
+    def __init__(self, inventory_backend=None, tracer=None, answers=None, collector=None, deterministic=False,
+                 carry_over_days=WINDOW_DAYS):
         self.results = {}
-        self.csv_file = "test_results.csv"
+        self.tracer = tracer or Tracer()
+        self.answers = answers or Answers()
+        self.journal = SessionJournal(None)
+        self.inventory_collector = InventoryCollector(inventory_backend)
+        self.inventory = None
+        self.smart_poller = SmartPoller()
+        self.scheduler = Scheduler(deterministic=deterministic)
+        self.csv_file = CSV_FILE
+        self.db_file = DB_FILE
         self.start_time = datetime.now()
-        self.setup_csv()
-        
-    def setup_csv(self):
-        """Создает CSV файл с заголовками если его нет"""
-        if not os.path.exists(self.csv_file):
-            headers = [
-                'Номер', 'Бренд', 'Модель', 'Серийный номер', 'CPU', 'RAM', 'SSD', 'LTE', 'Touchscreen',
-                'Проверил работоспособность:', 'Пароль BIOS:', 'Батарейка CMOS', 'Подключение АКБ:',
-                'Разъемы:', 'Звук (левый канал/правый канал):', 'Камера:', 
-                'SSD (категория/часы наработки/циклы включения):', 'Циклы АКБ (1):', 'Емкость АКБ (1):',
-                'Циклы АКБ (2):', 'Емкость АКБ (2):', 'Цвета:', 'Клавиатура:', 'Микрофон:',
-                'Сканер лица/пальца:', 'Драйверы:', 'Сброс срока действия пароля:', 'Тачскрин:',
-                'Кнопки трекпада:', 'Сенсор трекпада:', 'Комментарий'
-            ]
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(headers)
+        # Сервер сбора результатов (host, port); без него результаты остаются только локально
+        self.collector = collector
+        self.outbox = None
+        self.upload_thread = None
+        # Шаги прошлой проверки, которые оператор согласился перенести (carry_over.py)
+        self.carry_over_days = carry_over_days
+        self.carry_over = {}
+        self.carried = set()
+        self.setup_store()
+        
+    def setup_store(self):
+        """Открывает базу результатов (при первом запуске переносит в нее test_results.csv)"""
+        self.store = open_store(self.db_file, legacy_csv=self.csv_file)
     
     def run_command(self, command, capture_output=True, shell=True, encoding='cp866'):
         """Выполняет команду и возвращает результат"""
-        try:
-            if capture_output:
-                result = subprocess.run(command, shell=shell, capture_output=True, text=True, encoding=encoding)
-                return result.stdout.strip()
-            else:
-                subprocess.run(command, shell=shell)
-                return True
-        except Exception as e:
-            print(f"Ошибка выполнения команды: {e}")
+        with self.tracer.span(command, "subprocess"):
+            try:
+                if capture_output:
+                    result = subprocess.run(command, shell=shell, capture_output=True, text=True, encoding=encoding)
+                    return result.stdout.strip()
+                else:
+                    subprocess.run(command, shell=shell)
+                    return True
+            except Exception as e:
+                print(f"Ошибка выполнения команды: {e}")
+                return None
+    
+    def launch(self, app, shell=False):
+        """Запускает внешнюю программу, не дожидаясь ее завершения"""
+        if self.answers.headless:
+            print(f"Без оператора: {app} не запускаем")
             return None
+        with self.tracer.span(app, "tool"):
+            return subprocess.Popen(app, shell=shell)
     
-    def ask_user_result(self, test_name, details=""):
-        """Спрашивает пользователя о результате теста"""
+    def startfile(self, path):
+        """Открывает файл программой по умолчанию"""
+        if self.answers.headless:
+            print(f"Без оператора: {path} не открываем")
+            return
+        with self.tracer.span(path, "tool"):
+            os.startfile(path)
+    
+    def prompt(self, text, key=None, default=""):
+        """Спрашивает оператора (или берет ответ из файла ответов); время ожидания попадает в трассу"""
+        with self.tracer.span(text.strip(), "operator"):
+            return self.answers.ask(text, key=key, default=default)
+    
+    def collectors(self):
+        """Неинтерактивные сборщики данных: имя -> функция"""
+        return {
+            'inventory': self.inventory_collector.collect,
+            'smart': self.collect_smart,
+            'battery_report': self.collect_battery_report,
+            'audio_devices': lambda: self.run_command(AUDIO_DEVICES_CMD, encoding='utf-8'),
+            'cameras': lambda: self.run_command(CAMERA_DEVICES_CMD, encoding='utf-8'),
+            'microphones': lambda: self.run_command(MIC_DEVICES_CMD, encoding='utf-8'),
+            'touch_devices': lambda: self.run_command(TOUCH_DEVICES_CMD, encoding='utf-8'),
+            'pointing_devices': lambda: self.run_command(POINTING_DEVICES_CMD),
+            'device_errors': lambda: self.run_command(DEVICE_ERRORS_CMD, encoding='utf-8'),
+            # Пустой ответ - матрицу не опознать, поэтому None: шаг «Экран» тогда не переносится
+            'monitors': lambda: self.run_command(MONITORS_CMD, encoding='utf-8') or None,
+        }
+    
+    def start_prefetch(self):
+        """Запускает все неинтерактивные сборщики в фоне, пока оператор занят тестами"""
+        for name, func in self.collectors().items():
+            if not self.scheduler.has(name):
+                self.scheduler.add(Task(name, func, timeout=COLLECT_TIMEOUT))
+        self.scheduler.start()
+    
+    def collect(self, name):
+        """Результат сборщика: готовый из фона, иначе собирается прямо сейчас"""
+        if self.scheduler.has(name):
+            return self.scheduler.get(name)
+        return self.collectors()[name]()
+    
+    def ask_user_result(self, test_name, details="", key=None):
+        """Спрашивает пользователя о результате теста; key - имя ответа в файле ответов"""
+        with self.tracer.span(f"ask_user_result: {test_name}", "operator"):
+            return self._ask_user_result(test_name, details, key)
+    
+    def _ask_user_result(self, test_name, details="", key=None):
         print(f"\n{'='*50}")
         print(f"РЕЗУЛЬТАТ ТЕСТА: {test_name}")
         if details:
@@ -58,14 +158,20 @@ class LaptopTester:
         print(f"{'='*50}")
         
         while True:
-            result = input("Тест прошел успешно? [y/n/s] (y-да, n-нет, s-пропустить): ").lower().strip()
+            result = self.prompt("Тест прошел успешно? [y/n/s] (y-да, n-нет, s-пропустить): ",
+                                 key=key, default='s').lower().strip()
             if result in ['y', 'yes', 'да', 'д']:
                 return True
             elif result in ['n', 'no', 'нет', 'н']:
-                note = input("Опишите проблему (необязательно): ")
+                note = self.prompt("Опишите проблему (необязательно): ",
+                                   key=f"{key}_note" if key else None)
                 return (False, note) if note else False
             elif result in ['s', 'skip', 'пропустить', 'п']:
                 return None
+            elif key is not None and (self.answers.headless or key in self.answers.answers):
+                # Неверный ответ из файла не должен зацикливать проверку без оператора
+                print(f"Неизвестный ответ {result!r} для {key}, тест пропущен")
+                return None
             else:
                 print("Пожалуйста, введите y, n или s")
     
@@ -75,42 +181,15 @@ class LaptopTester:
         print("СБОР ИНФОРМАЦИИ О ЖЕЛЕЗЕ")
         print("="*50)
         
-        # Серийный номер и модель
+        import psutil
+
+        # Серийный номер, модель, CPU, видеокарты и диски - одним запросом
         try:
-            serial_cmd = "wmic csproduct get IdentifyingNumber /value"
-            model_cmd = "wmic csproduct get Name /value"
-            
-            serial_output = self.run_command(serial_cmd)
-            model_output = self.run_command(model_cmd)
-            
-            # Извлекаем значения из вывода wmic
-            serial = "Unknown"
-            model = "Unknown"
-            
-            for line in serial_output.split('\n'):
-                if 'IdentifyingNumber=' in line:
-                    serial = line.split('=', 1)[1].strip()
-                    break
-                    
-            for line in model_output.split('\n'):
-                if 'Name=' in line:
-                    model = line.split('=', 1)[1].strip()
-                    break
-        
-            print(f"Серийный номер: {serial}")
-            print(f"Модель: {model}")
+            inventory = self.collect('inventory')
             
-            # CPU через wmic вместо platform.processor()
-            cpu_cmd = "wmic cpu get Name /value"
-            cpu_output = self.run_command(cpu_cmd)
-            cpu_info = "Unknown"
-            if cpu_output:
-                for line in cpu_output.split('\n'):
-                    if 'Name=' in line:
-                        cpu_info = line.split('=', 1)[1].strip()
-                        break
-        
-            print(f"Процессор: {cpu_info}")
+            print(f"Серийный номер: {inventory.serial}")
+            print(f"Модель: {inventory.model}")
+            print(f"Процессор: {inventory.cpu}")
             
             # RAM через psutil с округлением до известных значений
             ram_gb = psutil.virtual_memory().total / (1024 ** 3)
@@ -131,46 +210,33 @@ class LaptopTester:
                     pass
             disk_str = ", ".join(disk_info)
             print(f"Диски: {disk_str}")
+            for disk in inventory.disks:
+                print(f"  {disk.model} ({disk.size_gb} GB) S/N: {disk.serial}")
             
-            # GPU через wmic
-            gpu_cmd = "wmic path win32_videocontroller get name /value"
-            gpu_output = self.run_command(gpu_cmd)
-            gpu = "Unknown"
-            for line in gpu_output.split('\n'):
-                if 'Name=' in line and line.split('=', 1)[1].strip():
-                    gpu = line.split('=', 1)[1].strip()
-                    break
-            print(f"Видеокарта: {gpu}")
+            print(f"Видеокарта: {inventory.gpu}")
+            print(f"Разрешение экрана: {inventory.resolution}")
             
-            # Разрешение экрана через wmic
-            resolution_cmd = "wmic path win32_VideoController get CurrentHorizontalResolution,CurrentVerticalResolution /value"
-            resolution_output = self.run_command(resolution_cmd)
-            width = height = "Unknown"
-            for line in resolution_output.split('\n'):
-                if 'CurrentHorizontalResolution=' in line:
-                    width = line.split('=', 1)[1].strip()
-                elif 'CurrentVerticalResolution=' in line:
-                    height = line.split('=', 1)[1].strip()
-            
-            resolution = f"{width}x{height}" if width != "Unknown" and height != "Unknown" else "Unknown"
-            print(f"Разрешение экрана: {resolution}")
+            inventory.ram_gb = ram_gb
+            inventory.disk_info = disk_str
+            self.inventory = inventory
             
             # Сохраняем в результаты
             self.results.update({
-                'serial_number': serial,
-                'model': model,
-                'cpu': cpu_info,
+                'serial_number': inventory.serial,
+                'model': inventory.model,
+                'cpu': inventory.cpu,
                 'ram_gb': ram_gb,
                 'disk_info': disk_str,
-                'gpu': gpu,
-                'screen_resolution': resolution
+                'gpu': inventory.gpu,
+                'screen_resolution': inventory.resolution
             })
             
         except Exception as e:
             print(f"Ошибка при сборе информации о железе: {e}")
             return False
         
-        return self.ask_user_result("Сбор информации о железе", "Проверьте правильность отображенной информации")
+        return self.ask_user_result("Сбор информации о железе", "Проверьте правильность отображенной информации",
+                                    key='hardware_ok')
     
     def test_hwinfo(self):
         """Тест HWiNFO64"""
@@ -178,15 +244,15 @@ class LaptopTester:
         print("HWINFO64 - ПОДРОБНАЯ ИНФОРМАЦИЯ")
         print("="*50)
         
-        choice = input("Запустить HWiNFO64 для подробной информации? [1-нет, 2-да]: ").strip()
+        choice = self.prompt("Запустить HWiNFO64 для подробной информации? [1-нет, 2-да]: ", key='hwinfo').strip()
         
         if choice == '2':
             hwinfo_path = "HWiNFO64\\HWiNFO64.exe"
             if os.path.exists(hwinfo_path):
                 print("Запускаем HWiNFO64...")
-                subprocess.Popen(hwinfo_path)
-                input("Нажмите Enter после просмотра информации в HWiNFO64...")
-                result = self.ask_user_result("HWiNFO64", "Проверьте информацию о железе в HWiNFO64")
+                self.launch(hwinfo_path)
+                self.prompt("Нажмите Enter после просмотра информации в HWiNFO64...")
+                result = self.ask_user_result("HWiNFO64", "Проверьте информацию о железе в HWiNFO64", key='hwinfo_ran')
                 self.results['hwinfo_ran'] = result
                 return result
             else:
@@ -205,10 +271,16 @@ class LaptopTester:
         
         # Показываем аудио устройства через PowerShell
         print("Доступные аудио устройства:")
-        audio_devices_cmd = 'powershell "Get-WmiObject -Class Win32_SoundDevice | Select-Object Name, Status"'
-        audio_devices = self.run_command(audio_devices_cmd, encoding='utf-8')
+        audio_devices = self.collect('audio_devices')
         print(audio_devices)
         
+        try:
+            from tones import ToneEngine
+        except ImportError as e:
+            print(f"Встроенные тестовые сигналы недоступны ({e}), нужен numpy")
+        else:
+            return self.test_audio_channels(ToneEngine())
+        
         # Проверяем наличие тестового файла
         audio_files = ["speaker_test.mp4", "speaker_test.wav"]
         audio_file = None
@@ -221,21 +293,51 @@ class LaptopTester:
         if audio_file:
             print(f"\nВоспроизводим тестовый файл: {audio_file}")
             try:
-                os.startfile(audio_file)
-                result = self.ask_user_result("Тест аудио", "Слышны ли звуки из динамиков?")
+                self.startfile(audio_file)
+                result = self.ask_user_result("Тест аудио", "Слышны ли звуки из динамиков?", key='audio_test_ok')
                 self.results['audio_test_ok'] = result
                 return result
             except Exception as e:
                 print(f"Ошибка воспроизведения: {e}")
-                result = self.ask_user_result("Тест аудио", f"Ошибка воспроизведения: {e}")
+                result = self.ask_user_result("Тест аудио", f"Ошибка воспроизведения: {e}", key='audio_test_ok')
                 self.results['audio_test_ok'] = result
                 return result
         else:
             print("Тестовые аудио файлы не найдены!")
-            result = self.ask_user_result("Тест аудио", "Тестовые файлы не найдены, проверьте аудио вручную")
+            result = self.ask_user_result("Тест аудио", "Тестовые файлы не найдены, проверьте аудио вручную", key='audio_test_ok')
             self.results['audio_test_ok'] = result
             return result
     
+    def test_audio_channels(self, engine):
+        """Левый и правый динамики по отдельности, затем свип на оба"""
+        checks = [
+            ('left', 'audio_left_ok', "Тест левого канала", "Сигнал слышен ТОЛЬКО из ЛЕВОГО динамика?"),
+            ('right', 'audio_right_ok', "Тест правого канала", "Сигнал слышен ТОЛЬКО из ПРАВОГО динамика?"),
+            ('sweep', 'audio_sweep_ok', "Свип 100 Гц - 10 кГц", "Звук чистый, без хрипа и дребезга?"),
+        ]
+        for signal, key, test_name, question in checks:
+            if self.answers.headless:
+                print(f"Без оператора: сигнал {signal} не проигрываем")
+            else:
+                print(f"\nИграет сигнал: {test_name}")
+                try:
+                    with self.tracer.span(f"tone {signal}", "tool"):
+                        engine.play(signal)
+                except Exception as e:
+                    print(f"Ошибка воспроизведения: {e}")
+            self.results[key] = self.ask_user_result(test_name, question, key=key)
+        
+        # Хрип на свипе - такой же брак динамиков, как молчащий канал
+        answers = [self.results[key] for _, key, _, _ in checks]
+        if all(ok is True for ok in answers):
+            result = True
+        elif any(ok is not None for ok in answers):
+            result = False
+        else:
+            result = None
+        self.results['audio_test_ok'] = result
+        return result
+    
     def test_camera(self):
         """Тест камеры"""
         print("\n" + "="*50)
@@ -244,10 +346,12 @@ class LaptopTester:
         
         # Показываем камеры через PowerShell
         print("Доступные камеры:")
-        camera_cmd = 'powershell "Get-WmiObject -Class Win32_PnPEntity | Where-Object {$_.Name -like \'*camera*\' -or $_.Name -like \'*webcam*\'} | Select-Object Name, Status"'
-        cameras = self.run_command(camera_cmd, encoding='utf-8')
+        cameras = self.collect('cameras')
         print(cameras)
         
+        # Сначала автоматическая проверка: пока она идет, камера занята
+        self.check_camera_quality()
+        
         # Пробуем запустить разные варианты камеры
         camera_apps = ["Camera.exe", "start ms-camera:"]
         
@@ -258,11 +362,11 @@ class LaptopTester:
             print(f"\nЗапускаем камеру: {app}")
             try:
                 if app.startswith("start"):
-                    subprocess.Popen(app, shell=True)
+                    self.launch(app, shell=True)
                 else:
-                    subprocess.Popen(app)
-                input("Нажмите Enter после проверки камеры...")
-                result = self.ask_user_result("Тест камеры", "Работает ли камера корректно?")
+                    self.launch(app)
+                self.prompt("Нажмите Enter после проверки камеры...")
+                result = self.ask_user_result("Тест камеры", "Работает ли камера корректно?", key='camera_ok')
                 self.results['camera_ok'] = result
                 return result
             except Exception as e:
@@ -270,75 +374,122 @@ class LaptopTester:
                 continue
         
         # Если ничего не сработало
-        result = self.ask_user_result("Тест камеры", "Не удалось запустить приложение камеры")
+        result = self.ask_user_result("Тест камеры", "Не удалось запустить приложение камеры", key='camera_ok')
         self.results['camera_ok'] = result
         return result
     
+    def check_camera_quality(self, seconds=5):
+        """fps, черные/застывшие кадры, фокус и битые пиксели по нескольким секундам съемки"""
+        if self.answers.headless:
+            # Без оператора перед камерой никого нет, а на стенде проверок камеры может не быть вовсе
+            print("Без оператора: автоматическую проверку камеры не выполняем")
+            return
+        try:
+            from camera_check import check_camera, print_report
+        except ImportError as e:
+            print(f"Автоматическая проверка камеры недоступна ({e}), нужны numpy и opencv-python")
+            return
+        print(f"\nАвтоматическая проверка камеры ({seconds} с), поводите рукой перед камерой...")
+        try:
+            with self.tracer.span("camera_check", "tool"):
+                report = check_camera(0, seconds)
+        except Exception as e:
+            print(f"Не удалось снять кадры с камеры: {e}")
+            self.results['camera_problems'] = ["нет изображения"]
+            return
+        print_report(report)
+        self.results['camera_check'] = report
+        self.results['camera_problems'] = report.problems()
+    
+    def collect_smart(self, on_done=None):
+        """Сканирует диски и опрашивает SMART без вывода на экран (можно в фоне)"""
+        if not os.path.exists(self.smart_poller.smartctl_path):
+            return None
+        return self.smart_poller.poll(self.smart_poller.scan(), on_done=on_done)
+    
     def get_disk_smart_info(self):
-        """Получает SMART информацию о дисках через smartctl"""
+        """Получает SMART информацию о дисках через smartctl (все диски параллельно)"""
         print("\n=== SMART ИНФОРМАЦИЯ (smartctl) ===")
-        smartctl_path = os.path.join("smartmontools", "bin", "smartctl.exe")
-        if not os.path.exists(smartctl_path):
+        try:
+            if self.scheduler.has('smart'):
+                smart_devices = self.collect('smart')
+                for info in (smart_devices or {}).values():
+                    self.print_smart_device(info)
+            else:
+                # Без фонового сбора выводим диски по мере готовности
+                smart_devices = self.collect_smart(on_done=self.print_smart_device)
+        except Exception as e:
+            print(f"Ошибка при сканировании дисков: {e}")
+            return
+        
+        if smart_devices is None:
             print("smartctl.exe не найден! Проверьте наличие smartmontools в smartmontools\\bin")
             return
-
-        # Сканируем доступные диски
-        scan_cmd = f'"{smartctl_path}" --scan'
-        found = False
+        if not smart_devices:
+            print("Не удалось найти диски")
+            return
+        self.results['smart_devices'] = smart_devices
         
+        from grading import format_drive, grade, load_rules, rules_id, snapshot
+
         try:
-            scan_output = self.run_command(scan_cmd, encoding='utf-8')
-            if not scan_output:
-                print("Не удалось найти диски")
-                return
-            
-            # Перебираем найденные диски
-            for line in scan_output.splitlines():
-                if not line.strip():
-                    continue
-                device = line.split()[0]  # Получаем путь устройства
-                
-                print(f"\n--- SMART для {device} ---")
-                cmd = f'"{smartctl_path}" -a {device}'
-                
-                try:
-                    output = self.run_command(cmd, encoding='utf-8')
-                    if output and ("SMART support is: Enabled" in output or "SMART/Health Information" in output):
-                        found = True
-                        power_cycles = ""
-                        power_hours = ""
-                        
-                        for line in output.splitlines():
-                            if "Power Cycles:" in line:
-                                power_cycles = line.split(":")[1].strip()
-                            if "Power On Hours:" in line:
-                                power_hours = line.split(":")[1].strip()
-                                
-                        # Сохраняем в формате "категория/часы/циклы"
-                        smart_info = f"A/{power_hours}/{power_cycles}"
-                        self.results['smart_info'] = smart_info
-                        
-                        # Ищем только нужные строки
-                        for line in output.splitlines():
-                            if any(key in line for key in [
-                                "Power Cycles:", 
-                                "Power On Hours:"
-                            ]):
-                                print(line.strip())
-                                
-                        # Проверяем наличие ошибок
-                        if "FAILED" in output or "Critical Warning: 0x01" in output:
-                            print("\n⚠ ВНИМАНИЕ: Обнаружены ошибки SMART!")
-                    else:
-                        print("Нет SMART-данных для этого диска")
-                except Exception as e:
-                    print(f"Ошибка при опросе {device}: {e}")
+            rules = load_rules()
+        except (ValueError, OSError) as e:
+            print(f"Ошибка в правилах категорий, используются правила по умолчанию: {e}")
+            rules = load_rules(None)
 
-            if not found:
-                print("Не удалось получить SMART-информацию ни по одному диску. Запустите скрипт от имени администратора!")
-            
-        except Exception as e:
-            print(f"Ошибка при сканировании дисков: {e}")
+        # Категория по правилам grading.py; формат "категория/часы/циклы", по диску через "; "
+        smart_info = []
+        snapshots = []
+        for device, info in smart_devices.items():
+            record = info.get('record')
+            if not info['ok'] or record is None:
+                continue
+            snap = snapshot(record)
+            info['grade'] = grade(snap, rules)
+            smart_info.append(format_drive(info['grade'], snap))
+            snap.update(device=device, drive_model=record.model, drive_serial=record.serial,
+                        grade=info['grade'], rules=rules_id(rules))
+            snapshots.append(snap)
+            print(f"{device}: категория {info['grade']}")
+        self.results['smart_snapshots'] = snapshots
+        if smart_info:
+            self.results['smart_info'] = "; ".join(smart_info)
+        else:
+            print("Не удалось получить SMART-информацию ни по одному диску. Запустите скрипт от имени администратора!")
+    
+    def print_smart_device(self, info):
+        """Выводит результат опроса одного диска, как только он готов"""
+        print(f"\n--- SMART для {info['device']} ---")
+        if not info['ok']:
+            print(f"Нет SMART-данных для этого диска ({info['error']})")
+            return
+        record = info['record']
+        kind = "SSD" if record.is_ssd else "HDD" if record.rotation_rpm else record.protocol
+        print(f"{record.model} ({kind}, {record.capacity_bytes // 1000 ** 3} GB), S/N {record.serial}")
+        if record.family:
+            print(f"Семейство: {record.family}")
+        if record.warning:
+            print(f"Предупреждение базы smartmontools: {record.warning}")
+        if info['power_hours']:
+            print(f"Power On Hours: {info['power_hours']}")
+        if info['power_cycles']:
+            print(f"Power Cycles: {info['power_cycles']}")
+        if record.temperature is not None:
+            print(f"Температура: {record.temperature} °C")
+        if record.wear_percent is not None:
+            print(f"Износ: {record.wear_percent}%")
+        if record.written_bytes is not None:
+            print(f"Записано: {record.written_bytes / 1000 ** 4:.1f} TB")
+        for label, value in (("Переназначенные секторы", record.reallocated_sectors),
+                             ("Ожидающие переназначения", record.pending_sectors),
+                             ("Неисправимые секторы", record.uncorrectable_sectors),
+                             ("Ошибки носителя", record.media_errors)):
+            if value:
+                print(f"{label}: {value}")
+        # Проверяем наличие ошибок
+        if info['smart_failed']:
+            print("\n⚠ ВНИМАНИЕ: Обнаружены ошибки SMART!")
     
     def test_ssd(self):
         """Тест SSD через SMART"""
@@ -350,11 +501,31 @@ class LaptopTester:
         print("\n=== SMART ИНФОРМАЦИЯ ===")
         self.get_disk_smart_info()
         
-        result = self.ask_user_result("Тест SSD/HDD", "Проверьте состояние дисков, часы работы и SMART показатели")
+        result = self.ask_user_result("Тест SSD/HDD", "Проверьте состояние дисков, часы работы и SMART показатели", key='ssd_tool_ok')
         self.results['ssd_tool_ok'] = result
         return result
     
 
+    def collect_battery_report(self):
+        """Создает отчеты powercfg о батарее и разбирает их (XML, иначе HTML)"""
+        # Удаляем отчеты от предыдущего ноутбука, чтобы не прочитать чужие данные
+        for path in (BATTERY_REPORT_XML, BATTERY_REPORT_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+        self.run_command(f'powercfg /batteryreport /xml /output {BATTERY_REPORT_XML}')
+        # HTML нужен для просмотра оператором и как запасной вариант разбора
+        self.run_command(f'powercfg /batteryreport /output {BATTERY_REPORT_FILE}')
+        
+        from battery_report import parse_battery_report
+
+        for path in (BATTERY_REPORT_XML, BATTERY_REPORT_FILE):
+            if os.path.exists(path):
+                try:
+                    return parse_battery_report(path)
+                except Exception as e:
+                    print(f"Ошибка при чтении отчета {path}: {e}")
+        return None
+    
     def test_battery(self):
         """Тест батареи - проверка здоровья и циклов зарядки"""
         print("\n" + "="*50)
@@ -362,39 +533,40 @@ class LaptopTester:
         print("="*50)
 
         print("\nСоздание отчета о батарее...")
-        self.run_command('powercfg /batteryreport /output battery_report.html')
+        report = self.collect('battery_report')
         
-        if os.path.exists('battery_report.html'):
-            try:
-                with open('battery_report.html', 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    cycles = ""
-                    health = ""
-                    
-                    if "<span class=\"label\">CYCLE COUNT</span></td><td>" in content:
-                        cycles = content[content.find("<span class=\"label\">CYCLE COUNT</span></td><td>") + 47:]
-                        cycles = cycles[:cycles.find("</td>")]
-                        self.results['battery_cycles'] = cycles
-                    
-                    # Расчет здоровья батареи
-                    if "<span class=\"label\">DESIGN CAPACITY</span></td><td>" in content:
-                        design = content[content.find("<span class=\"label\">DESIGN CAPACITY</span></td><td>") + 51:]
-                        design = int(float(design[:design.find(" mWh")].replace(',', '')))
-                        
-                        current = content[content.find("<span class=\"label\">FULL CHARGE CAPACITY</span></td><td>") + 56:]
-                        current = int(float(current[:current.find(" mWh")].replace(',', '')))
-                        
-                        health = round((current / design) * 100, 2)
-                        self.results['battery_health'] = f"{health}%"
-
-            except Exception as e:
-                print(f"Ошибка при чтении отчета: {e}")
+        if report is not None:
+            if not report.batteries:
+                print("В отчете не найдено ни одной батареи!")
             
-            choice = input("\nОткрыть полный отчет? [y/n]: ").lower().strip()
-            if choice in ['y', 'yes', 'да', 'д']:
-                os.startfile('battery_report.html')
+            # Циклы и здоровье по каждой батарее: (1), (2)...
+            for i, battery in enumerate(report.batteries, 1):
+                suffix = "" if i == 1 else f"_{i}"
+                health = battery.health
+                print(f"\nБатарея {i}: {battery.name} ({battery.manufacturer}, {battery.chemistry})")
+                print(f"  Емкость: {battery.full_charge_mwh} / {battery.design_mwh} mWh"
+                      + (f" ({health}%)" if health is not None else ""))
+                print(f"  Циклы: {battery.cycle_count if battery.cycle_count is not None else '-'}")
+                
+                if battery.cycle_count is not None:
+                    self.results['battery_cycles' + suffix] = str(battery.cycle_count)
+                if health is not None:
+                    self.results['battery_health' + suffix] = f"{health}%"
+            self.results['batteries'] = report.batteries
+            
+            if report.capacity_history:
+                first = report.capacity_history[0]
+                print(f"\nИстория емкости: {first.start} - {first.full_charge_mwh} mWh, "
+                      f"{len(report.capacity_history)} записей")
+            
+            if os.path.exists(BATTERY_REPORT_FILE):
+                choice = self.prompt("\nОткрыть полный отчет? [y/n]: ", key='battery_open_report').lower().strip()
+                if choice in ['y', 'yes', 'да', 'д']:
+                    self.startfile(BATTERY_REPORT_FILE)
+        else:
+            print("Не удалось создать отчет о батарее")
     
-        result = self.ask_user_result("Тест батареи", "Проверьте состояние батареи (циклы и здоровье)")
+        result = self.ask_user_result("Тест батареи", "Проверьте состояние батареи (циклы и здоровье)", key='battery_ok')
         self.results['battery_ok'] = result
         return result
     
@@ -406,24 +578,28 @@ class LaptopTester:
         
         # Показываем информацию об экране
         print("Информация об экране:")
-        monitor_cmd = 'wmic path Win32_VideoController get Name,VideoModeDescription,CurrentHorizontalResolution,CurrentVerticalResolution /format:table'
-        monitor_info = self.run_command(monitor_cmd)
-        print(monitor_info)
+        if self.inventory is None:
+            self.inventory = self.collect('inventory')
+        for gpu in self.inventory.gpus:
+            print(f"{gpu.name}: {gpu.resolution} {gpu.mode}")
+        monitors = self.collect('monitors')
+        if monitors:
+            print(f"Матрица (EDID): {monitors}")
         
         screen_exe = "IsMyLcdOK_x64.exe"
         if os.path.exists(screen_exe):
             print("Запускаем IsMyLcdOK...")
-            subprocess.Popen(screen_exe)
-            input("Нажмите Enter после проверки экрана...")
+            self.launch(screen_exe)
+            self.prompt("Нажмите Enter после проверки экрана...")
         else:
             print("IsMyLcdOK_x64.exe не найден!")
             print("Проверьте экран визуально на:")
             print("- Битые пиксели")
             print("- Равномерность подсветки") 
             print("- Артефакты изображения")
-            input("Нажмите Enter после визуальной проверки...")
+            self.prompt("Нажмите Enter после визуальной проверки...")
         
-        result = self.ask_user_result("Тест экрана", "Проверьте экран на битые пиксели и артефакты")
+        result = self.ask_user_result("Тест экрана", "Проверьте экран на битые пиксели и артефакты", key='screen_ok')
         self.results['screen_ok'] = result
         return result
     
@@ -434,20 +610,50 @@ class LaptopTester:
         print("="*50)
         
         keyboard_exe = "Keyboard.exe"
-        if os.path.exists(keyboard_exe):
+        if platform.system() == "Windows" and os.path.exists(KEYBOARD_TESTER) and not self.answers.headless:
+            self.run_keyboard_tester()
+        elif os.path.exists(keyboard_exe):
             print("Запускаем тест клавиатуры...")
-            subprocess.Popen(keyboard_exe)
-            input("Нажмите Enter после проверки всех клавиш...")
+            self.launch(keyboard_exe)
+            self.prompt("Нажмите Enter после проверки всех клавиш...")
         else:
             print("Keyboard.exe не найден!")
             print("Откройте блокнот и проверьте клавиши вручную...")
-            subprocess.Popen("notepad.exe")
-            input("Проверьте все клавиши в блокноте. Нажмите Enter когда закончите...")
+            self.launch("notepad.exe")
+            self.prompt("Проверьте все клавиши в блокноте. Нажмите Enter когда закончите...")
         
-        result = self.ask_user_result("Тест клавиатуры", "Работают ли все клавиши корректно?")
+        result = self.ask_user_result("Тест клавиатуры", "Работают ли все клавиши корректно?", key='keyboard_ok')
         self.results['keyboard_ok'] = result
         return result
     
+    def run_keyboard_tester(self):
+        """Тест по полной раскладке (auto/keyboard.py); непроверенные клавиши попадают в результаты"""
+        choice = self.prompt("Раскладка клавиатуры [1 - ANSI (по умолчанию), 2 - ISO (Г-образный Enter), 3 - JIS]: ",
+                             key='keyboard_layout').strip()
+        labels = self.prompt("Надписи на клавишах [1 - только латиница (по умолчанию), 2 - с кириллицей (RU)]: ",
+                             key='keyboard_labels').strip()
+        numpad = self.prompt("Есть цифровой блок (NumPad)? [y/n]: ", key='keyboard_numpad').lower().strip()
+        command = [sys.executable, KEYBOARD_TESTER, "--layout", KEYBOARD_LAYOUTS.get(choice, 'ansi'),
+                   "--labels", KEYBOARD_LABELS.get(labels, 'en'), "--report", KEYBOARD_REPORT_FILE]
+        if numpad not in ['y', 'yes', 'да', 'д']:
+            command.append("--no-numpad")
+        
+        if os.path.exists(KEYBOARD_REPORT_FILE):
+            os.remove(KEYBOARD_REPORT_FILE)
+        with self.tracer.span("keyboard", "tool"):
+            subprocess.call(command)
+        try:
+            with open(KEYBOARD_REPORT_FILE, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            print("Тест клавиатуры не сохранил отчет")
+            return
+        
+        self.results['keyboard_untested'] = report['untested']
+        print(f"Проверено клавиш: {report['tested']} из {report['total']}")
+        if report['untested']:
+            print(f"Не нажимались: {', '.join(report['untested'])}")
+    
     def test_mouse(self):
         """Тест мыши/тачпада"""
         print("\n" + "="*50)
@@ -456,8 +662,7 @@ class LaptopTester:
         
         # Показываем информацию о мыши
         print("Устройства ввода:")
-        mouse_cmd = 'wmic path Win32_PointingDevice get Name,DeviceInterface,Status /format:table'
-        mouse_info = self.run_command(mouse_cmd)
+        mouse_info = self.collect('pointing_devices')
         print(mouse_info)
         
         print("\nПроверьте следующие функции:")
@@ -467,9 +672,9 @@ class LaptopTester:
         print("- Колесо прокрутки")
         print("- Жесты тачпада (если есть)")
         
-        input("Проверьте все функции мыши/тачпада. Нажмите Enter когда закончите...")
+        self.prompt("Проверьте все функции мыши/тачпада. Нажмите Enter когда закончите...")
         
-        result = self.ask_user_result("Тест мыши/тачпада", "Работают ли все функции мыши/тачпада?")
+        result = self.ask_user_result("Тест мыши/тачпада", "Работают ли все функции мыши/тачпада?", key='mouse_test_ok')
         self.results['mouse_test_ok'] = result
         return result
     
@@ -481,41 +686,81 @@ class LaptopTester:
         
         # Показываем аудио устройства записи
         print("Устройства записи:")
-        mic_cmd = 'powershell "Get-WmiObject -Class Win32_SoundDevice | Where-Object {$_.Name -like \'*microphone*\' -or $_.Name -like \'*mic*\'} | Select-Object Name, Status"'
-        mic_info = self.run_command(mic_cmd, encoding='utf-8')
+        mic_info = self.collect('microphones')
         print(mic_info)
         
+        # Сначала автоматическая запись с индикатором уровня
+        report = self.check_microphone_level()
+        if report is not None:
+            self.results['microphone_ok'] = report.ok
+            return report.ok
+        
         # Открываем микшер звука
         print("\nОткрываем микшер звука...")
         try:
-            subprocess.Popen("sndvol.exe")
+            self.launch("sndvol.exe")
         except:
             pass
         
         # Пробуем открыть настройки звука
         print("Открываем настройки звука...")
         try:
-            subprocess.Popen("ms-settings:sound", shell=True)
+            self.launch("ms-settings:sound", shell=True)
         except:
             # Альтернативный способ через mmsys.cpl
             try:
-                subprocess.Popen("mmsys.cpl")
+                self.launch("mmsys.cpl")
             except:
                 pass
         
-        input("Говорите в микрофон и проверьте уровни в настройках звука. Нажмите Enter когда закончите...")
-        result = self.ask_user_result("Тест микрофона", "Работает ли микрофон? Видны ли уровни звука?")
+        self.prompt("Говорите в микрофон и проверьте уровни в настройках звука. Нажмите Enter когда закончите...")
+        result = self.ask_user_result("Тест микрофона", "Работает ли микрофон? Видны ли уровни звука?", key='microphone_ok')
         self.results['microphone_ok'] = result
         return result
     
+    def check_microphone_level(self, seconds=5):
+        """Запись с живым индикатором уровня; вердикт - по уровню, перегрузке и фону (mic_meter.py)"""
+        if self.answers.headless:
+            return None
+        try:
+            import sounddevice  # noqa: F401 - без PortAudio запись невозможна
+            from mic_meter import capture, print_report
+        except (ImportError, OSError) as e:
+            print(f"Автоматическая проверка микрофона недоступна ({e}), нужны numpy и sounddevice")
+            return None
+        self.prompt(f"Нажмите Enter и говорите в микрофон {seconds} с...")
+        try:
+            with self.tracer.span("microphone_check", "tool"):
+                report = capture(seconds)
+        except Exception as e:
+            # Проверку проведет оператор вручную (test_microphone), в таблицу идет его ответ
+            print(f"Не удалось записать звук с микрофона: {e}")
+            self.results.pop('microphone_problems', None)
+            return None
+        print_report(report)
+        self.results['microphone_check'] = report
+        self.results['microphone_problems'] = report.problems()
+        return report
+    
     def test_device_manager(self):
         """Проверка диспетчера устройств"""
         print("\n" + "="*50)
         print("ДИСПЕТЧЕР УСТРОЙСТВ")
         print("="*50)
         
+        try:
+            device_errors = self.collect('device_errors')
+        except Exception as e:
+            print(f"Не удалось получить список устройств с ошибками: {e}")
+        else:
+            if device_errors:
+                print("Устройства с ошибками (код ошибки диспетчера устройств):")
+                print(device_errors)
+            elif device_errors is not None:
+                print("Устройств с ошибками не найдено")
+        
         print("Открываем диспетчер устройств...")
-        subprocess.Popen("devmgmt.msc", shell=True)
+        self.launch("devmgmt.msc", shell=True)
         
         print("\nПроверьте следующее:")
         print("- Нет устройств с желтыми треугольниками (предупреждения)")
@@ -523,8 +768,8 @@ class LaptopTester:
         print("- Нет неизвестных устройств")
         print("- Все драйвера установлены")
         
-        input("Проверьте устройства в диспетчере. Нажмите Enter когда закончите...")
-        result = self.ask_user_result("Диспетчер устройств", "Есть ли проблемные устройства или ошибки?")
+        self.prompt("Проверьте устройства в диспетчере. Нажмите Enter когда закончите...")
+        result = self.ask_user_result("Диспетчер устройств", "Есть ли проблемные устройства или ошибки?", key='devicemanager_ok')
         self.results['devicemanager_ok'] = result
         return result
     
@@ -535,17 +780,18 @@ class LaptopTester:
         print("="*50)
         
         print("Текущие настройки учетных записей:")
-        subprocess.run("net accounts", shell=True)
+        self.run_command("net accounts", capture_output=False)
         
         print("\n1 - Сбросить пароль (установить максимальный срок действия: unlimited)")
         print("2 - Пропустить")
-        choice = input("Выберите действие [1/2]: ").strip()
+        choice = self.prompt("Выберите действие [1/2]: ", key='accounts').strip()
         
         if choice == '1':
             print("Сбрасываем настройки пароля...")
             try:
                 # Пробуем выполнить команду напрямую
-                result = subprocess.run("net accounts /maxpwage:unlimited", shell=True, capture_output=True, text=True)
+                with self.tracer.span("net accounts /maxpwage:unlimited", "subprocess"):
+                    result = subprocess.run("net accounts /maxpwage:unlimited", shell=True, capture_output=True, text=True)
                 if result.returncode == 0:
                     print("Настройки успешно изменены")
                     self.results['accounts_configured'] = True
@@ -560,7 +806,7 @@ class LaptopTester:
             print("Пропускаем настройки учетных записей")
             self.results['accounts_configured'] = False
         
-        input("Нажмите Enter для продолжения...")
+        self.prompt("Нажмите Enter для продолжения...")
         return self.results['accounts_configured']
     
     def test_touchscreen(self):
@@ -570,28 +816,27 @@ class LaptopTester:
         print("="*50)
         
         # Проверяем есть ли тачскрин
-        touch_cmd = 'powershell "Get-WmiObject -Class Win32_PnPEntity | Where-Object {$_.Name -like \'*touch*\' -or $_.Name -like \'*digitizer*\'} | Select-Object Name, Status"'
-        touch_devices = self.run_command(touch_cmd, encoding='utf-8')
+        touch_devices = self.collect('touch_devices')
         print("Устройства сенсорного ввода:")
         print(touch_devices)
         
         if "touch" in touch_devices.lower() or "digitizer" in touch_devices.lower():
-            choice = input("Обнаружен тачскрин. Нужно ли его протестировать? [1-нет, 2-да]: ").strip()
+            choice = self.prompt("Обнаружен тачскрин. Нужно ли его протестировать? [1-нет, 2-да]: ", key='touchscreen').strip()
         else:
-            choice = input("Тачскрин не обнаружен. Все равно протестировать? [1-нет, 2-да]: ").strip()
+            choice = self.prompt("Тачскрин не обнаружен. Все равно протестировать? [1-нет, 2-да]: ", key='touchscreen').strip()
         
         if choice == '2':
             touchscreen_exe = "IsMyTouchScreenOK_x64.exe"
             if os.path.exists(touchscreen_exe):
                 print("Запускаем тест тачскрина...")
-                subprocess.Popen(touchscreen_exe)
-                input("Нажмите Enter после проверки тачскрина...")
+                self.launch(touchscreen_exe)
+                self.prompt("Нажмите Enter после проверки тачскрина...")
             else:
                 print("IsMyTouchScreenOK_x64.exe не найден!")
                 print("Проверьте тачскрин вручную - касайтесь экрана и проверяйте реакцию")
-                input("Нажмите Enter после проверки...")
+                self.prompt("Нажмите Enter после проверки...")
             
-            result = self.ask_user_result("Тест тачскрина", "Работает ли тачскрин корректно?")
+            result = self.ask_user_result("Тест тачскрина", "Работает ли тачскрин корректно?", key='touchscreen_ok')
             self.results['touchscreen_ok'] = result
             return result
         else:
@@ -604,6 +849,14 @@ class LaptopTester:
         print("ПРОВЕРКА КНОПОК ТАЧПАДА")
         print("="*50)
         
+        if os.path.exists(MOUSE_TESTER) and not self.answers.headless:
+            report = self.run_mouse_tester()
+            if report is not None:
+                self.results['touchpad_buttons'] = report['summary']
+                result = all(report['buttons'][name] for name in report['required'])
+                self.results['touchpad_ok'] = result
+                return result
+        
         print("Проверьте следующие элементы тачпада:")
         print("- Левая кнопка тачпада")
         print("- Правая кнопка тачпада")
@@ -611,31 +864,73 @@ class LaptopTester:
         print("- Физические кнопки (если есть)")
         print("- Зоны нажатия на самом тачпаде")
         
-        input("Проверьте все кнопки и зоны тачпада. Нажмите Enter когда закончите...")
+        self.prompt("Проверьте все кнопки и зоны тачпада. Нажмите Enter когда закончите...")
         
-        result = self.ask_user_result("Кнопки тачпада", "Работают ли все кнопки и зоны тачпада?")
+        result = self.ask_user_result("Кнопки тачпада", "Работают ли все кнопки и зоны тачпада?", key='touchpad_ok')
         self.results['touchpad_ok'] = result
         return result
     
+    def run_mouse_tester(self):
+        """Окно проверки кнопок (mouse.py); возвращает его отчет или None, если отчета нет"""
+        print("Нажмите и отпустите каждую кнопку, прокрутите колесо/тачпад вверх и вниз. Esc - закончить.")
+        if os.path.exists(MOUSE_REPORT_FILE):
+            os.remove(MOUSE_REPORT_FILE)
+        with self.tracer.span("mouse", "tool"):
+            subprocess.call([sys.executable, MOUSE_TESTER, "--report", MOUSE_REPORT_FILE])
+        try:
+            with open(MOUSE_REPORT_FILE, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            print("Проверка кнопок не сохранила отчет, проверьте вручную")
+            return None
+        
+        for name, ok in report['buttons'].items():
+            print(f"  {report['labels'][name]}: {'+' if ok else '-'}")
+        latency = report.get('latency_ms')
+        if latency:
+            self.results['mouse_latency_ms'] = latency
+            print(f"Задержка события до экрана: p50 {latency['p50']} мс, p99 {latency['p99']} мс")
+        print(f"Кнопки трекпада: {report['summary']}")
+        return report
+    
     def save_results(self):
-        """Сохраняет результаты в CSV файл"""
+        """Сохраняет результаты в базу"""
         print("\n" + "="*50)
         print("СОХРАНЕНИЕ РЕЗУЛЬТАТОВ")
         print("="*50)
 
         # Запрашиваем обязательные поля
-        notebook_number = input("Введите номер ноутбука: ").strip()
-        comment = input("Комментарий (если есть): ").strip()
-        checker_name = input("Введите имя проверяющего: ").strip()
+        notebook_number = self.prompt("Введите номер ноутбука: ", key='notebook_number').strip()
+        comment = self.prompt("Комментарий (если есть): ", key='comment').strip()
+        checker_name = self.prompt("Введите имя проверяющего: ", key='checker').strip()
 
-        # Извлекаем модель процессора из полного названия
-        cpu_model = ""
-        if self.results.get('cpu'):
-            if "i5-" in self.results['cpu']:
-                cpu_model = "i5-" + self.results['cpu'].split("i5-")[1].split()[0]
-            elif "i7-" in self.results['cpu']:
-                cpu_model = "i7-" + self.results['cpu'].split("i7-")[1].split()[0]
+        # Модель процессора из полного названия: i5-8250U, Ryzen 5 3500U, Celeron N4020...
+        cpu_model = cpu_label(self.results.get('cpu'))
 
+        if self.results.get('keyboard_untested'):
+            keyboard = format_untested(self.results['keyboard_untested'])
+        else:
+            keyboard = '+' if self.results.get('keyboard_ok') else ''
+        
+        if 'audio_left_ok' in self.results or 'audio_right_ok' in self.results:
+            sound = f"{mark(self.results.get('audio_left_ok'))} / {mark(self.results.get('audio_right_ok'))}"
+            if self.results.get('audio_sweep_ok') is False:
+                sound += " (хрип на свипе)"
+        else:
+            sound = '+ / +' if self.results.get('audio_test_ok') else ''
+        # Ответ оператора главнее автоматической проверки: замечания проверки
+        # при этом сохраняются в скобках
+        camera_problems = "; ".join(self.results.get('camera_problems') or [])
+        if self.results.get('camera_ok'):
+            camera = f"+ (авто: {camera_problems})" if camera_problems else '+'
+        else:
+            camera = camera_problems
+        if self.results.get('microphone_problems'):
+            microphone = "; ".join(self.results['microphone_problems'])
+        else:
+            microphone = '+' if self.results.get('microphone_ok') else ''
+        touchpad = self.results.get('touchpad_buttons') or ('+' if self.results.get('touchpad_ok') else '')
+        
         # Формируем строку с данными
         row = {
             'Номер': notebook_number,
@@ -644,7 +939,7 @@ class LaptopTester:
             'Серийный номер': self.results.get('serial_number', ''),
             'CPU': cpu_model,
             'RAM': f"{int(self.results.get('ram_gb', 0))} GB DDR4",
-            'SSD': f"{int(self.results.get('disk_info', '').split()[1].replace('GB',''))} GB" if self.results.get('disk_info') else '',
+            'SSD': f"{int(self.results['disk_info'].split(', ')[0].split()[-1].replace('GB',''))} GB" if self.results.get('disk_info') else '',
             'LTE': '',
             'Touchscreen': '',
             'Проверил работоспособность:': checker_name,
@@ -652,35 +947,120 @@ class LaptopTester:
             'Батарейка CMOS': '',
             'Подключение АКБ:': 'Подключен',
             'Разъемы:': '+' if self.results.get('devicemanager_ok') else '',
-            'Звук (левый канал/правый канал):': '+ / +' if self.results.get('audio_test_ok') else '',
-            'Камера:': '+' if self.results.get('camera_ok') else '',
+            'Звук (левый канал/правый канал):': sound,
+            'Камера:': camera,
             'SSD (категория/часы наработки/циклы включения):': self.results.get('smart_info', ''),  # Из SMART
             'Циклы АКБ (1):': self.results.get('battery_cycles', ''),  # Из отчета батареи
             'Емкость АКБ (1):': self.results.get('battery_health', ''),  # Из отчета батареи
-            'Циклы АКБ (2):': '',
-            'Емкость АКБ (2):': '',
+            'Циклы АКБ (2):': self.results.get('battery_cycles_2', ''),
+            'Емкость АКБ (2):': self.results.get('battery_health_2', ''),
             'Цвета:': '+' if self.results.get('screen_ok') else '',
-            'Клавиатура:': '+' if self.results.get('keyboard_ok') else '',
-            'Микрофон:': '+' if self.results.get('microphone_ok') else '',
+            'Клавиатура:': keyboard,
+            'Микрофон:': microphone,
             'Сканер лица/пальца:': '+ / -',
             'Драйверы:': '+' if self.results.get('devicemanager_ok') else '',
             'Сброс срока действия пароля:': 'Сброшен' if self.results.get('accounts_configured') else '',
             'Тачскрин:': 'Его нет' if not self.results.get('touchscreen_ok') else '+',
-            'Кнопки трекпада:': '+' if self.results.get('touchpad_ok') else '',
+            'Кнопки трекпада:': touchpad,
             'Сенсор трекпада:': '+' if self.results.get('mouse_test_ok') else '',
             'Комментарий': comment
         }
 
-        # Читаем существующие заголовки из файла
-        with open(self.csv_file, 'r', encoding='utf-8') as f:
-            headers = next(csv.reader(f))
+        # Повторный тест того же ноутбука заменяет старую строку
+        self.store.upsert(row, tested_at=self.start_time, cpu_name=self.results.get('cpu'))
+        if 'smart_snapshots' in self.results:
+            self.store.save_smart(row['Серийный номер'], self.results['smart_snapshots'], tested_at=self.start_time)
+        if self.step_timings():
+            self.store.save_steps(row['Серийный номер'], self.step_timings())
+        # Всегда перезаписываем: шаг, не прошедший сейчас, не должен переноситься со старой проверки
+        self.store.save_passed_steps(row['Серийный номер'], self.results.get('passed_steps', {}))
+
+        print(f"Результаты сохранены в {self.db_file}")
+        self.upload_results(row)
+
+    def step_timings(self):
+        """Длительности шагов и фоновых сборщиков для базы: [{step, operator, status, duration}]"""
+        return [dict(timing, step=name) for name, timing in self.results.get('step_timings', {}).items()]
+
+    def upload_results(self, row):
+        """Ставит строку в очередь на сервер сбора и отправляет ее в фоне"""
+        if not self.collector:
+            return
+        from outbox import Outbox  # asyncio нужен только для отправки
+
+        self.outbox = Outbox()
+        self.outbox.put(row, tested_at=self.start_time, station=platform.node(),
+                        smart=self.results.get('smart_snapshots'), steps=self.step_timings(),
+                        cpu_name=self.results.get('cpu'),
+                        artifacts={BATTERY_REPORT_FILE: BATTERY_REPORT_FILE, BATTERY_REPORT_XML: BATTERY_REPORT_XML})
+        # Отправляются и результаты прошлых запусков, если тогда не было сети
+        print(f"Отправка на сервер сбора {self.collector[0]}:{self.collector[1]} (в очереди: {len(self.outbox.pending())})")
+        self.upload_thread = self.outbox.flush_in_background(*self.collector)
 
-        # Записываем новую строку
-        with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            writer.writerow(row)
+    def wait_upload(self, timeout=15):
+        """Дает фоновой отправке закончиться перед выходом; неотправленное уйдет в следующий раз"""
+        if self.upload_thread is None:
+            return
+        self.upload_thread.join(timeout)
+        pending = len(self.outbox.pending())
+        if pending:
+            print(f"Не отправлено на сервер сбора: {pending}, будет отправлено при следующем запуске")
+        else:
+            print("Результаты отправлены на сервер сбора")
+    
+    def open_journal(self):
+        """Открывает журнал сессии по серийному номеру; предлагает продолжить прерванную проверку.
 
-        print(f"Результаты сохранены в {self.csv_file}")
+        Возвращает множество уже пройденных шагов.
+        """
+        try:
+            serial = normalize_serial(self.collect('inventory').serial)
+        except Exception as e:
+            print(f"Не удалось определить серийный номер для журнала: {e}")
+            serial = None
+        self.journal = SessionJournal(serial)
+        if not self.journal.enabled:
+            print("Серийный номер не определен: журнал сессии не ведется, продолжить проверку после сбоя не получится")
+        
+        if self.journal.exists() and self.journal.load() and self.journal.completed_steps:
+            steps = self.journal.completed_steps
+            print(f"\nНайдена незавершенная проверка этого ноутбука ({self.journal.serial}),")
+            print(f"последнее сохранение: {self.journal.data.get('updated')}, пройдено шагов: {len(steps)}")
+            for step in steps:
+                print(f"  + {step}")
+            choice = self.prompt("Продолжить с первого непройденного шага? [y/n]: ", key='resume').lower().strip()
+            if choice in ['y', 'yes', 'да', 'д']:
+                self.results.update(self.journal.results)
+                return set(steps)
+            # Начинаем заново - старый журнал перезапишется первым же шагом
+            self.journal = SessionJournal(serial)
+        return set()
+    
+    def offer_carry_over(self, serial, completed):
+        """Предлагает перенести шаги, пройденные на недавней проверке этого ноутбука"""
+        passed, tested_at = self.store.passed_steps(serial)
+        fresh = candidates(passed, self.carry_over_days, exclude=completed)
+        if not fresh:
+            return
+        print(f"\nЭтот ноутбук уже проверялся ({tested_at}). Пройдено за последние {self.carry_over_days} дн.:")
+        for name, entry in fresh.items():
+            print(f"  + {name} ({entry['passed_at']})")
+        print("Шаг переносится, только если связанное с ним железо не менялось; остальные пройдут заново.")
+        choice = self.prompt("Перенести пройденные шаги? [y/n]: ", key='carry_over').lower().strip()
+        if choice in ['y', 'yes', 'да', 'д']:
+            self.carry_over = fresh
+    
+    def hardware_fingerprint(self, spec):
+        """Отпечаток железа шага по его входам-сборщикам; None - входов-сборщиков нет или
+        сборщик не сработал, такой шаг не переносится"""
+        collectors = self.collectors()
+        try:
+            values = {name: self.collect(name) for name in spec.inputs if name in collectors}
+        except Exception:
+            return None
+        if any(value is None for value in values.values()):
+            return None
+        return fingerprint(values)
     
     def run_all_tests(self):
         """Запускает все тесты по порядку"""
@@ -689,40 +1069,46 @@ class LaptopTester:
         print(f"Время начала: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print("="*60)
         
+        # Все, что не требует оператора, собираем в фоне заранее
+        self.start_prefetch()
+        completed = self.open_journal()
+        self.offer_carry_over(self.journal.serial, completed)
+        
         try:
-            # Последовательность тестов
-            tests = [
-                ("Сбор информации о железе", self.get_hardware_info),
-                ("HWiNFO64", self.test_hwinfo),
-                ("Аудио/Динамики", self.test_audio),
-                ("Камера", self.test_camera),
-                ("SSD/HDD", self.test_ssd),
-                ("Батарея", self.test_battery),
-                ("Экран", self.test_screen),
-                ("Клавиатура", self.test_keyboard),
-                ("Мышь/Тачпад", self.test_mouse),
-                ("Микрофон", self.test_microphone),
-                ("Диспетчер устройств", self.test_device_manager),
-                ("Настройки учетных записей", self.test_accounts),
-                ("Тачскрин", self.test_touchscreen),
-                ("Кнопки тачпада", self.test_touchpad_buttons)
-            ]
+            # Шаги из test_registry.py; порядок выбирает планировщик по готовности входов
+            tests = registry()
             
             print(f"\nВсего тестов для выполнения: {len(tests)}")
             
-            for i, (test_name, test_func) in enumerate(tests, 1):
-                print(f"\n[{i}/{len(tests)}] Выполняется: {test_name}")
-                try:
-                    test_func()
-                except KeyboardInterrupt:
-                    print(f"\nТест '{test_name}' прерван пользователем")
-                    break
-                except Exception as e:
-                    print(f"Ошибка в тесте '{test_name}': {e}")
-                    # Спрашиваем пользователя, продолжать ли
-                    continue_choice = input("Продолжить тестирование? [y/n]: ").lower().strip()
-                    if continue_choice not in ['y', 'yes', 'да', 'д']:
-                        break
+            for i, spec in enumerate(tests, 1):
+                if spec.name in completed:
+                    print(f"[{i}/{len(tests)}] Пройден ранее: {spec.name}")
+                self.scheduler.add(Task(spec.name, partial(self.run_step, i, len(tests), spec),
+                                        spec.inputs, spec.operator, spec.timeout))
+            
+            step_names = {spec.name for spec in tests}
+            
+            def on_done(task, result):
+                # Длительности попадают и в журнал: при продолжении сессии не теряются.
+                # Перенесенные шаги не выполнялись - их время исказило бы analytics.py
+                if task.name not in self.carried:
+                    self.results.setdefault('step_timings', {})[task.name] = {
+                        'operator': task.operator, 'status': result.status, 'duration': round(result.duration, 3)}
+                if result.status == 'ok' and task.name in step_names:
+                    self.journal.record_step(task.name, dict(self.results))
+                    completed.add(task.name)
+                elif result.status == 'interrupted':
+                    print(f"\nТест '{task.name}' прерван пользователем")
+                elif result.status in ('error', 'timeout'):
+                    where = "тесте" if task.name in step_names else "фоновом сборе"
+                    print(f"Ошибка в {where} '{task.name}': {result.error}")
+            
+            def on_error(task, result):
+                # Спрашиваем пользователя, продолжать ли
+                continue_choice = self.prompt("Продолжить тестирование? [y/n]: ", key='continue_after_error').lower().strip()
+                return continue_choice in ['y', 'yes', 'да', 'д']
+            
+            self.scheduler.run(skip=completed, on_done=on_done, on_error=on_error)
             
             # Финальное напоминание
             print("\n" + "!"*60)
@@ -731,12 +1117,19 @@ class LaptopTester:
             print("!"*60)
             
             # Сохраняем результаты
-            self.save_results()
+            with self.tracer.span("save_results"):
+                self.save_results()
+            
+            if all(spec.name in completed for spec in tests):
+                self.journal.finish()
+            elif self.journal.enabled:
+                print(f"Не все шаги пройдены, журнал сохранен для продолжения: {self.journal.path}")
             
             print("\n" + "="*60)
             print("ТЕСТИРОВАНИЕ ЗАВЕРШЕНО!")
             print(f"Время завершения: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"Результаты сохранены в: {self.csv_file}")
+            print(f"Результаты сохранены в: {self.db_file}")
+            print(f"Выгрузка в Excel: python convert_table.py (и в CSV: --csv)")
             print("="*60)
             
         except KeyboardInterrupt:
@@ -745,9 +1138,77 @@ class LaptopTester:
         except Exception as e:
             print(f"\nКритическая ошибка во время тестирования: {e}")
             self.save_results()
+        finally:
+            self.scheduler.shutdown()
+            trace_path = self.tracer.export()
+            if trace_path:
+                print(f"Трасса времени шагов: {trace_path}")
+            self.wait_upload()
+
+    def run_step(self, index, total, spec):
+        """Один шаг проверки; код шага подключается только здесь"""
+        print(f"\n[{index}/{total}] Выполняется: {spec.name}")
+        passed = self.results.setdefault('passed_steps', {})
+        hardware = self.hardware_fingerprint(spec)
+        entry = self.carry_over.get(spec.name)
+        if entry is not None:
+            if hardware is not None and entry.get('fingerprint') == hardware:
+                print(f"Перенесено с проверки {entry['passed_at']}: связанное железо не менялось")
+                self.results.update(entry['results'])
+                passed[spec.name] = entry
+                self.carried.add(spec.name)
+                return True
+            print("Железо шага изменилось с прошлой проверки - выполняем заново")
+        
+        with self.tracer.step(index, spec.name):
+            value = resolve(spec, self)()
+        if value is True and hardware is not None:
+            passed[spec.name] = record(hardware, step_results(self.results, spec.results))
+        else:
+            passed.pop(spec.name, None)
+        return value
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Тестирование ноутбука")
+    parser.add_argument("--trace", action="store_true",
+                        help="сохранить время каждого шага в traces/ (формат Chrome trace)")
+    parser.add_argument("--profile", action="store_true",
+                        help="то же, плюс cProfile и tracemalloc для каждого шага")
+    parser.add_argument("--answers", metavar="FILE",
+                        help="JSON-файл ответов {ключ: ответ}, например {\"camera_ok\": \"y\"}")
+    parser.add_argument("--answer", action="append", metavar="КЛЮЧ=ОТВЕТ", default=[],
+                        help="ответ на один вопрос; можно указать несколько раз")
+    parser.add_argument("--headless", action="store_true",
+                        help="без оператора: на вопросы без ответа берется ответ по умолчанию")
+    parser.add_argument("--prompt-timeout", type=float, metavar="СЕК",
+                        help="сколько ждать ответа оператора, потом ответ по умолчанию")
+    parser.add_argument("--collector", metavar="ХОСТ:ПОРТ",
+                        help="сервер сбора результатов (collector.py); без сети результаты ждут в outbox/")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="все шаги по очереди в одном потоке, без фонового сбора (для проверок и отладки)")
+    parser.add_argument("--carry-over-days", type=int, default=WINDOW_DAYS, metavar="ДНЕЙ",
+                        help=f"переносить шаги, пройденные на проверке этого ноутбука не раньше стольких "
+                             f"дней назад (по умолчанию {WINDOW_DAYS}; 0 - проверять все заново)")
+    return parser.parse_args(argv)
+
+def parse_collector(address):
+    """Адрес сервера сбора из --collector; outbox (и asyncio) грузится, только если он задан"""
+    if not address:
+        return None
+    from outbox import parse_address
+
+    return parse_address(address)
+
+def build_answers(args):
+    answers = {}
+    if args.answers:
+        answers.update(load_answers_file(args.answers))
+    answers.update(parse_answer_flags(args.answer))
+    return Answers(answers, headless=args.headless, timeout=args.prompt_timeout)
 
 def main():
     """Главная функция"""
+    args = parse_args()
     try:
         # Проверяем ОС
         if platform.system() != "Windows":
@@ -763,14 +1224,21 @@ def main():
         print("Добро пожаловать в систему тестирования ноутбуков!")
         print("Для получения наилучших результатов запустите скрипт от имени администратора.")
         
-        input("\nНажмите Enter для начала тестирования...")
+        tester = LaptopTester(tracer=Tracer(enabled=args.trace, profile=args.profile),
+                              answers=build_answers(args),
+                              collector=parse_collector(args.collector),
+                              deterministic=args.deterministic,
+                              carry_over_days=args.carry_over_days)
+        tester.start_prefetch()
+        
+        tester.prompt("\nНажмите Enter для начала тестирования...")
         
-        tester = LaptopTester()
         tester.run_all_tests()
         
     except Exception as e:
         print(f"Критическая ошибка: {e}")
-        input("Нажмите Enter для выхода...")
+        if not args.headless:
+            input("Нажмите Enter для выхода...")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка микрофона: потоковый индикатор уровня и автоматический вердикт.
+
+Блоки звука пишутся в кольцевой буфер фиксированного размера. По каждому блоку
+считаются RMS, пик, число перегруженных отсчетов и грубый спектр по полосам.
+Все массивы выделяются заранее, в цикле обработки новых массивов не создается.
+Вердикт: сигнал есть (речь заметно громче фона), нет перегрузки, микрофон не «мертвый»
+(цифровая тишина или постоянный уровень).
+
+    python mic_meter.py --seconds 5      # с микрофона (нужен sounddevice)
+    python mic_meter.py --wav voice.wav  # из файла, без звуковой карты
+"""
+
+import argparse
+import math
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+SAMPLE_RATE = 48000
+BLOCK_SIZE = 1024
+BAND_EDGES = (60, 150, 300, 600, 1200, 2400, 3400, 6000, 12000)   # Гц, границы полос спектра
+SPEECH_BANDS = (300, 3400)
+BINS_PER_BAND = 4
+
+MIN_DBFS = -100.0
+SIGNAL_DBFS = -45.0     # громкие блоки должны быть громче этого
+SIGNAL_ABOVE_NOISE = 10.0   # и громче фона хотя бы на столько дБ
+DEAD_DBFS = -80.0       # весь сигнал тише - микрофон мертв
+CLIP_LEVEL = 0.999
+CLIP_SHARE = 0.001      # доля перегруженных отсчетов, после которой запись испорчена
+METER_CHARS = " ▁▂▃▄▅▆▇█"
+
+
+def dbfs(value):
+    return 20 * math.log10(value) if value > 1e-5 else MIN_DBFS
+
+
+@dataclass
+class MicReport:
+    seconds: float
+    blocks: int
+    peak_dbfs: float
+    loud_dbfs: float        # громкость речи: 95-й процентиль RMS блоков
+    noise_dbfs: float       # фон: 10-й процентиль RMS блоков
+    clipped_share: float
+    speech_share: float     # доля энергии в полосе речи 300-3400 Гц у громких блоков
+    bands_db: list = field(default_factory=list)
+
+    def problems(self):
+        if not self.blocks:
+            return ["нет записи"]
+        if self.loud_dbfs <= DEAD_DBFS:
+            return ["микрофон не работает (тишина или постоянный уровень)"]
+        problems = []
+        if self.loud_dbfs < SIGNAL_DBFS or self.loud_dbfs - self.noise_dbfs < SIGNAL_ABOVE_NOISE:
+            problems.append(f"нет сигнала (громкость {self.loud_dbfs:.0f} дБ, фон {self.noise_dbfs:.0f} дБ)")
+        if self.clipped_share > CLIP_SHARE:
+            problems.append(f"перегрузка ({self.clipped_share * 100:.1f}% отсчетов)")
+        return problems
+
+    @property
+    def ok(self):
+        return not self.problems()
+
+
+class LevelMeter:
+    """Обработка блоков: кольцевой буфер, уровни и спектр по полосам без выделения памяти"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, seconds=10.0, ring_seconds=2.0):
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.ring = np.zeros(int(ring_seconds * sample_rate), dtype=np.float32)
+        self.ring_pos = 0
+
+        max_blocks = int(seconds * sample_rate / block_size) + 2
+        self.rms = np.zeros(max_blocks)
+        self.peak = np.zeros(max_blocks)
+        self.clipped = np.zeros(max_blocks, dtype=np.int64)
+        self.speech = np.zeros(max_blocks)
+        self.blocks = 0
+
+        # Грубый спектр: несколько частот на полосу через готовые матрицы косинусов/синусов
+        bands = list(zip(BAND_EDGES[:-1], BAND_EDGES[1:]))
+        freqs = np.concatenate([np.geomspace(low, high, BINS_PER_BAND, endpoint=False) for low, high in bands])
+        t = np.arange(block_size) / sample_rate
+        window = np.hanning(block_size)
+        self.cos = (np.cos(2 * np.pi * freqs[:, None] * t) * window).astype(np.float32)
+        self.sin = (np.sin(2 * np.pi * freqs[:, None] * t) * window).astype(np.float32)
+        self.band_matrix = np.kron(np.eye(len(bands)), np.ones(BINS_PER_BAND)).astype(np.float32)
+        speech = [i for i, (low, high) in enumerate(bands) if low >= SPEECH_BANDS[0] and high <= SPEECH_BANDS[1]]
+        self.speech_bands = slice(speech[0], speech[-1] + 1)     # полосы речи идут подряд
+        self.bands = np.zeros(len(bands), dtype=np.float32)
+        self.band_sum = np.zeros(len(bands))
+
+        # Рабочие массивы для одного блока
+        self._re = np.zeros(len(freqs), dtype=np.float32)
+        self._im = np.zeros(len(freqs), dtype=np.float32)
+        self._abs = np.zeros(block_size, dtype=np.float32)
+        self._over = np.zeros(block_size, dtype=bool)
+
+    def process(self, block):
+        """Один блок float32 (моно, значения -1..1) длиной не больше block_size"""
+        n = len(block)
+        if self.blocks >= len(self.rms) or not n:
+            return
+        end = self.ring_pos + n
+        if end <= len(self.ring):
+            self.ring[self.ring_pos:end] = block
+        else:
+            split = len(self.ring) - self.ring_pos
+            self.ring[self.ring_pos:] = block[:split]
+            self.ring[:n - split] = block[split:]
+        self.ring_pos = end % len(self.ring)
+
+        # RMS без постоянной составляющей: у «мертвого» микрофона бывает ровный сдвиг
+        mean = float(block.sum()) / n
+        energy = float(np.dot(block, block)) / n - mean * mean
+        absolute = self._abs[:n]
+        np.abs(block, out=absolute)
+        np.greater_equal(absolute, CLIP_LEVEL, out=self._over[:n])
+
+        i = self.blocks
+        self.rms[i] = math.sqrt(max(energy, 0.0))
+        self.peak[i] = float(absolute.max())
+        self.clipped[i] = np.count_nonzero(self._over[:n])
+
+        if n == self.block_size:
+            np.dot(self.cos, block, out=self._re)
+            np.dot(self.sin, block, out=self._im)
+            np.multiply(self._re, self._re, out=self._re)
+            np.multiply(self._im, self._im, out=self._im)
+            np.add(self._re, self._im, out=self._re)
+            np.dot(self.band_matrix, self._re, out=self.bands)
+            total = float(self.bands.sum())
+            self.speech[i] = float(self.bands[self.speech_bands].sum()) / total if total > 0 else 0.0
+            self.band_sum += self.bands
+        self.blocks += 1
+
+    @property
+    def level(self):
+        """(RMS, пик) последнего блока в дБ от полной шкалы"""
+        if not self.blocks:
+            return MIN_DBFS, MIN_DBFS
+        return dbfs(self.rms[self.blocks - 1]), dbfs(self.peak[self.blocks - 1])
+
+    def report(self):
+        count = self.blocks
+        if not count:
+            return MicReport(0.0, 0, MIN_DBFS, MIN_DBFS, MIN_DBFS, 0.0, 0.0)
+        rms = self.rms[:count]
+        loud = float(np.percentile(rms, 95))
+        loud_blocks = rms >= loud
+        bands = self.band_sum / count
+        return MicReport(
+            seconds=round(count * self.block_size / self.sample_rate, 2),
+            blocks=count,
+            peak_dbfs=round(dbfs(float(self.peak[:count].max())), 1),
+            loud_dbfs=round(dbfs(loud), 1),
+            noise_dbfs=round(dbfs(float(np.percentile(rms, 10))), 1),
+            clipped_share=round(float(self.clipped[:count].sum()) / (count * self.block_size), 5),
+            speech_share=round(float(self.speech[:count][loud_blocks].mean()), 3),
+            bands_db=[round(10 * math.log10(b), 1) if b > 1e-12 else MIN_DBFS for b in bands],
+        )
+
+
+def meter_line(meter, width=30):
+    """Строка индикатора: полоса громкости, числа и спектр по полосам"""
+    rms_db, peak_db = meter.level
+    filled = int(max(0.0, min(1.0, (rms_db - MIN_DBFS / 1.5) / (-MIN_DBFS / 1.5))) * width)
+    bands_db = 10 * np.log10(np.maximum(meter.bands, 1e-12))
+    levels = np.clip((bands_db + 60) / 60 * (len(METER_CHARS) - 1), 0, len(METER_CHARS) - 1).astype(int)
+    spectrum = "".join(METER_CHARS[level] for level in levels)
+    return f"[{'#' * filled}{'.' * (width - filled)}] {rms_db:6.1f} дБ  пик {peak_db:6.1f} дБ  |{spectrum}|"
+
+
+def analyze_wav(path, block_size=BLOCK_SIZE):
+    """Прогоняет WAV-файл (16 бит, берется левый канал) через индикатор"""
+    from tones import read_wav
+
+    frames, sample_rate = read_wav(path)
+    samples = frames[:, 0].astype(np.float32) / 32768
+    meter = LevelMeter(sample_rate, block_size, seconds=len(samples) / sample_rate)
+    for start in range(0, len(samples), block_size):
+        meter.process(samples[start:start + block_size])
+    return meter.report()
+
+
+def capture(seconds=5.0, sample_rate=SAMPLE_RATE, block_size=BLOCK_SIZE, device=None, show=True):
+    """Запись с микрофона с живым индикатором в консоли"""
+    import sounddevice
+
+    meter = LevelMeter(sample_rate, block_size, seconds)
+
+    def callback(indata, frames, time_info, status):
+        meter.process(indata[:, 0])
+
+    with sounddevice.InputStream(samplerate=sample_rate, blocksize=block_size, channels=1, dtype='float32',
+                                 latency='low', device=device, callback=callback):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if show:
+                sys.stdout.write("\r" + meter_line(meter))
+                sys.stdout.flush()
+            time.sleep(0.05)
+    if show:
+        sys.stdout.write("\n")
+    return meter.report()
+
+
+def print_report(report):
+    print(f"Записано {report.seconds} с: громкость {report.loud_dbfs} дБ, фон {report.noise_dbfs} дБ, "
+          f"пик {report.peak_dbfs} дБ, перегрузка {report.clipped_share * 100:.2f}%, "
+          f"доля речи {report.speech_share * 100:.0f}%")
+    problems = report.problems()
+    print("Микрофон в порядке" if not problems else "Проблемы: " + "; ".join(problems))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка микрофона")
+    parser.add_argument("--wav", metavar="FILE", help="взять звук из WAV-файла вместо микрофона")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--device", help="номер или имя устройства записи")
+    args = parser.parse_args()
+    if args.wav:
+        report = analyze_wav(args.wav)
+    else:
+        device = int(args.device) if args.device and args.device.isdigit() else args.device
+        report = capture(args.seconds, device=device)
+    print_report(report)
+    return 0 if report.ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
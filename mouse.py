@@ -1,61 +1,221 @@
-import pygame
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверка кнопок мыши/тачпада и колеса прокрутки.
+
+Кнопка засчитывается, когда пришли и нажатие, и отпускание; колесо - по событию
+прокрутки в каждую сторону. Окно спит, пока нет событий, и перерисовывает только
+изменившиеся кнопки. Задержка меряется от получения события программой до вывода
+кадра на экран (display.update вернул управление).
 
-# Initialize pygame
-pygame.init()
+    python mouse.py --report mouse_report.json
+"""
 
-# Screen dimensions
-WIDTH, HEIGHT = 400, 300
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Key and Mouse Press Squares")
+import argparse
+import statistics
+import time
+
+import pygame
+
+from session_journal import atomic_write_json
 
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
-RED = (255, 0, 0)
+GRAY = (90, 90, 90)
+GREEN = (40, 160, 60)
 BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
 YELLOW = (255, 255, 0)
 
-# Square positions and sizes
-square_size = 50
-left_square = pygame.Rect(100, 75, square_size, square_size)
-right_square = pygame.Rect(250, 75, square_size, square_size)
-left_mouse_square = pygame.Rect(100, 200, square_size, square_size)
-right_mouse_square = pygame.Rect(250, 200, square_size, square_size)
-
-# Track mouse button states
-mouse_buttons = {"left": False, "right": False}
-
-# Main loop
-running = True
-while running:
-    screen.fill(BLACK)
-
-    # Draw keyboard squares
-    pygame.draw.rect(screen, RED if pygame.key.get_pressed()[pygame.K_a] else WHITE, left_square)
-    pygame.draw.rect(screen, BLUE if pygame.key.get_pressed()[pygame.K_d] else WHITE, right_square)
-
-    # Draw mouse button squares
-    pygame.draw.rect(screen, GREEN if mouse_buttons["left"] else WHITE, left_mouse_square)
-    pygame.draw.rect(screen, YELLOW if mouse_buttons["right"] else WHITE, right_mouse_square)
-
-    # Event handling
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # Left mouse button
-                mouse_buttons["left"] = True
-            elif event.button == 3:  # Right mouse button
-                mouse_buttons["right"] = True
-        elif event.type == pygame.MOUSEBUTTONUP:
-            if event.button == 1:  # Left mouse button
-                mouse_buttons["left"] = False
-            elif event.button == 3:  # Right mouse button
-                mouse_buttons["right"] = False
-
-    # Update display
-    pygame.display.flip()
-
-# Quit pygame
-pygame.quit()
\ No newline at end of file
+WIDTH, HEIGHT = 420, 380
+TILE_W, TILE_H = 120, 60
+MAX_FPS = 60
+
+# имя -> (надпись, обязательна ли, место на экране)
+BUTTONS = {
+    'wheel_up': ("Колесо вверх", True, (150, 20)),
+    'left': ("Левая", True, (20, 100)),
+    'middle': ("Средняя", False, (150, 100)),
+    'right': ("Правая", True, (280, 100)),
+    'wheel_down': ("Колесо вниз", True, (150, 180)),
+    'back': ("Назад", False, (85, 260)),
+    'forward': ("Вперед", False, (215, 260)),
+}
+# номер кнопки в событиях pygame 2 (4/5 - старые события колеса, их заменяет MOUSEWHEEL)
+BUTTON_NUMBERS = {1: 'left', 2: 'middle', 3: 'right', 6: 'back', 7: 'forward'}
+
+UNTESTED, PRESSED, PASSED = range(3)
+STATE_COLORS = {UNTESTED: GRAY, PRESSED: BLUE, PASSED: GREEN}
+
+
+class MouseTester:
+    """Состояние кнопок, отрисовка по изменившимся плиткам и замер задержки"""
+
+    def __init__(self):
+        self.rects = {name: pygame.Rect(pos, (TILE_W, TILE_H)) for name, (_, _, pos) in BUTTONS.items()}
+        self.status_rect = pygame.Rect(10, HEIGHT - 36, WIDTH - 20, 30)
+        self.state = {name: UNTESTED for name in BUTTONS}
+        self.seen_down = set()
+        self.dirty = set()
+        self.status_dirty = True
+        self.latencies = []
+        self.screen = None
+        self.font = None
+        self.tiles = {}
+
+    def open(self, screen=None):
+        pygame.init()
+        self.screen = screen or pygame.display.set_mode((WIDTH, HEIGHT))
+        pygame.display.set_caption("Mouse / Touchpad Buttons")
+        self.font = pygame.font.Font(None, 26)
+
+    def tile(self, name, state):
+        key = (name, state)
+        surface = self.tiles.get(key)
+        if surface is None:
+            surface = pygame.Surface((TILE_W, TILE_H))
+            surface.fill(STATE_COLORS[state])
+            pygame.draw.rect(surface, WHITE, surface.get_rect(), 2)
+            text = self.font.render(BUTTONS[name][0], True, WHITE)
+            surface.blit(text, text.get_rect(center=surface.get_rect().center))
+            self.tiles[key] = surface
+        return surface
+
+    def _set(self, name, state):
+        if self.state[name] != state:
+            self.state[name] = state
+            self.dirty.add(name)
+            self.status_dirty = True
+
+    def handle(self, event):
+        """Обрабатывает событие; True, если оно касается проверяемых кнопок"""
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button in BUTTON_NUMBERS:
+            name = BUTTON_NUMBERS[event.button]
+            self.seen_down.add(name)
+            if self.state[name] != PASSED:
+                self._set(name, PRESSED)
+            return True
+        if event.type == pygame.MOUSEBUTTONUP and event.button in BUTTON_NUMBERS:
+            name = BUTTON_NUMBERS[event.button]
+            if name in self.seen_down:
+                self._set(name, PASSED)
+            return True
+        if event.type == pygame.MOUSEWHEEL and event.y:
+            self._set('wheel_up' if event.y > 0 else 'wheel_down', PASSED)
+            return True
+        return False
+
+    def draw_all(self):
+        self.screen.fill(BLACK)
+        for name, rect in self.rects.items():
+            self.screen.blit(self.tile(name, self.state[name]), rect)
+        self._draw_status()
+        self.dirty.clear()
+        self.status_dirty = False
+        pygame.display.flip()
+
+    def _draw_status(self):
+        self.screen.fill(BLACK, self.status_rect)
+        passed = sum(state == PASSED for state in self.state.values())
+        text = f"Проверено: {passed} из {len(BUTTONS)}   Esc - закончить"
+        if self.latencies:
+            text += f"   задержка {self.latencies[-1]:.1f} мс"
+        self.screen.blit(self.font.render(text, True, YELLOW), self.status_rect)
+        return self.status_rect
+
+    def render(self):
+        rects = [self.rects[name] for name in self.dirty]
+        for name in self.dirty:
+            self.screen.blit(self.tile(name, self.state[name]), self.rects[name])
+        self.dirty.clear()
+        if self.status_dirty:
+            rects.append(self._draw_status())
+            self.status_dirty = False
+        if rects:
+            pygame.display.update(rects)
+        return rects
+
+    @property
+    def complete(self):
+        return all(state == PASSED for state in self.state.values())
+
+    def run(self):
+        clock = pygame.time.Clock()
+        self.draw_all()
+        while True:
+            # Спим до первого события, остальные забираем пачкой
+            events = [pygame.event.wait()] + pygame.event.get()
+            received = time.perf_counter()
+            changed = False
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    return
+                if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+                    self.draw_all()
+                elif self.handle(event):
+                    changed = True
+            if changed:
+                # Задержка - до момента, когда кадр с изменившимися кнопками выведен
+                self.render()
+                self.latencies.append((time.perf_counter() - received) * 1000)
+                self.status_dirty = True
+                self.render()
+            if self.complete:
+                return
+            clock.tick(MAX_FPS)
+
+    def report(self):
+        buttons = {name: self.state[name] == PASSED for name in BUTTONS}
+        latency = {}
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            latency = {
+                'count': len(ordered),
+                'p50': round(statistics.median(ordered), 2),
+                'p99': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 2),
+                'max': round(ordered[-1], 2),
+            }
+        return {
+            'buttons': buttons,
+            'labels': {name: BUTTONS[name][0] for name in BUTTONS},
+            'required': [name for name, (_, required, _) in BUTTONS.items() if required],
+            'summary': format_buttons(buttons),
+            'latency_ms': latency,
+        }
+
+
+def format_buttons(buttons):
+    """Строка для колонки 'Кнопки трекпада:'"""
+    failed = [BUTTONS[name][0] for name, (_, required, _) in BUTTONS.items()
+              if required and not buttons.get(name)]
+    if failed:
+        return f"не работают: {', '.join(failed)}"
+    return "+"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка кнопок мыши/тачпада")
+    parser.add_argument("--report", metavar="FILE", help="сохранить результат по кнопкам в JSON")
+    args = parser.parse_args()
+
+    tester = MouseTester()
+    tester.open()
+    try:
+        tester.run()
+    finally:
+        pygame.quit()
+
+    report = tester.report()
+    for name, ok in report['buttons'].items():
+        print(f"{BUTTONS[name][0]}: {'+' if ok else '-'}")
+    if report['latency_ms']:
+        latency = report['latency_ms']
+        print(f"Задержка события до экрана: p50 {latency['p50']} мс, p99 {latency['p99']} мс, макс. {latency['max']} мс")
+    print(f"Кнопки трекпада: {report['summary']}")
+    if args.report:
+        atomic_write_json(args.report, report)
+
+
+if __name__ == "__main__":
+    main()
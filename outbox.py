@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Локальная очередь отправки результатов станции на сервер сбора (collector.py).
+
+Строка сначала надежно пишется в outbox/ (один JSON-файл на сообщение) и только потом
+отправляется; файл удаляется после подтверждения сервера. Пропавшая сеть не блокирует
+тест и не теряет результат: неотправленное уйдет при следующей попытке.
+
+    python outbox.py flush --collector 192.168.1.10:8765
+"""
+
+import argparse
+import asyncio
+import base64
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from collector import DEFAULT_PORT, MAX_MESSAGE_SIZE
+from session_journal import atomic_write_json
+
+OUTBOX_DIR = "outbox"
+
+
+def parse_address(address):
+    """'host:port' или 'host' -> (host, port)"""
+    host, sep, port = address.rpartition(':')
+    if not sep:
+        return address, DEFAULT_PORT
+    return host, int(port)
+
+
+class Outbox:
+    """Неотправленные сообщения станции"""
+
+    def __init__(self, directory=OUTBOX_DIR):
+        self.directory = directory
+        self._flush_lock = threading.Lock()
+
+    def put(self, row, tested_at=None, station=None, artifacts=None, smart=None, steps=None, cpu_name=None):
+        """Кладет строку таблицы в очередь; artifacts - {имя: путь к файлу}, smart - снимки SMART
+        для пересчета категорий на сервере, steps - длительности шагов, cpu_name - название
+        процессора из WMI для пересчета колонки CPU. Возвращает id сообщения"""
+        message = {
+            'id': uuid.uuid4().hex,
+            'station': station,
+            'tested_at': tested_at.isoformat(timespec='seconds') if isinstance(tested_at, datetime) else tested_at,
+            'row': row,
+            'smart': smart,
+            'steps': steps,
+            'cpu_name': cpu_name,
+            'artifacts': {},
+        }
+        for name, path in (artifacts or {}).items():
+            if path and os.path.exists(path):
+                with open(path, 'rb') as f:
+                    message['artifacts'][name] = base64.b64encode(f.read()).decode('ascii')
+        os.makedirs(self.directory, exist_ok=True)
+        # Время в имени файла сохраняет порядок отправки
+        path = os.path.join(self.directory, f"{time.time_ns()}-{message['id']}.json")
+        atomic_write_json(path, message)
+        return message['id']
+
+    def pending(self):
+        return sorted(glob.glob(os.path.join(self.directory, "*.json")))
+
+    async def flush_async(self, host, port=DEFAULT_PORT, timeout=10):
+        """Отправляет все сообщения одним соединением; возвращает число подтвержденных"""
+        paths = self.pending()
+        if not paths:
+            return 0
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, limit=MAX_MESSAGE_SIZE), timeout)
+        by_id = {}
+        sent = 0
+        try:
+            for path in paths:
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        message = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                by_id[str(message['id'])] = path
+                writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
+                await writer.drain()
+
+            while by_id:
+                line = await asyncio.wait_for(reader.readline(), timeout)
+                if not line:
+                    break
+                reply = json.loads(line)
+                path = by_id.pop(str(reply.get('ack')), None)
+                if path and reply.get('ok'):
+                    os.remove(path)
+                    sent += 1
+        finally:
+            writer.close()
+        return sent
+
+    def flush(self, host, port=DEFAULT_PORT, timeout=10):
+        with self._flush_lock:
+            return asyncio.run(self.flush_async(host, port, timeout))
+
+    def flush_with_retry(self, host, port=DEFAULT_PORT, attempts=5, delay=2.0, timeout=10):
+        """Отправляет с повторами (пауза растет вдвое); возвращает True, если очередь пуста"""
+        for attempt in range(attempts):
+            try:
+                self.flush(host, port, timeout)
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Сервер сбора {host}:{port} недоступен ({e}), попытка {attempt + 1}/{attempts}")
+            if not self.pending():
+                return True
+            if attempt + 1 < attempts:
+                time.sleep(delay * 2 ** attempt)
+        return False
+
+    def flush_in_background(self, host, port=DEFAULT_PORT, **kwargs):
+        """Отправка в фоновом потоке, чтобы тест не ждал сеть"""
+        thread = threading.Thread(target=self.flush_with_retry, args=(host, port), kwargs=kwargs, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Очередь отправки результатов на сервер сбора")
+    parser.add_argument("--dir", default=OUTBOX_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    flush = sub.add_parser("flush", help="отправить накопленные результаты")
+    flush.add_argument("--collector", required=True, metavar="ХОСТ:ПОРТ")
+    flush.add_argument("--attempts", type=int, default=5)
+    sub.add_parser("status", help="сколько сообщений ждут отправки")
+    args = parser.parse_args()
+
+    outbox = Outbox(args.dir)
+    if args.command == "status":
+        print(f"Ждут отправки: {len(outbox.pending())}")
+    elif args.command == "flush":
+        host, port = parse_address(args.collector)
+        ok = outbox.flush_with_retry(host, port, attempts=args.attempts)
+        print("Все результаты отправлены" if ok else f"Не отправлено: {len(outbox.pending())}")
+
+
+if __name__ == "__main__":
+    main()
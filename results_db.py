@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""База результатов тестирования (SQLite) с экспортом в CSV"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+DB_FILE = "test_results.db"
+CSV_FILE = "test_results.csv"
+
+# Формат таблицы, который ждут convert_table.py и общий Excel
+CSV_HEADERS = [
+    'Номер', 'Бренд', 'Модель', 'Серийный номер', 'CPU', 'RAM', 'SSD', 'LTE', 'Touchscreen',
+    'Проверил работоспособность:', 'Пароль BIOS:', 'Батарейка CMOS', 'Подключение АКБ:',
+    'Разъемы:', 'Звук (левый канал/правый канал):', 'Камера:',
+    'SSD (категория/часы наработки/циклы включения):', 'Циклы АКБ (1):', 'Емкость АКБ (1):',
+    'Циклы АКБ (2):', 'Емкость АКБ (2):', 'Цвета:', 'Клавиатура:', 'Микрофон:',
+    'Сканер лица/пальца:', 'Драйверы:', 'Сброс срока действия пароля:', 'Тачскрин:',
+    'Кнопки трекпада:', 'Сенсор трекпада:', 'Комментарий'
+]
+
+# Миграции схемы по порядку; номер версии = индекс + 1 (PRAGMA user_version)
+MIGRATIONS = [
+    """
+    CREATE TABLE results (
+        id INTEGER PRIMARY KEY,
+        serial_number TEXT UNIQUE,
+        number TEXT,
+        brand TEXT,
+        model TEXT,
+        checker TEXT,
+        tested_at TEXT,
+        updated_at TEXT NOT NULL,
+        row_json TEXT NOT NULL
+    );
+    CREATE INDEX idx_results_model ON results(model);
+    CREATE INDEX idx_results_checker ON results(checker);
+    CREATE INDEX idx_results_tested_at ON results(tested_at);
+    """,
+    # 2: строки, присланные станциями на сервер сбора (collector.py)
+    """
+    ALTER TABLE results ADD COLUMN station TEXT;
+    CREATE TABLE messages (
+        id TEXT PRIMARY KEY,
+        station TEXT,
+        received_at TEXT NOT NULL
+    );
+    """,
+    # 3: снимки SMART по дискам ноутбука - для пересчета категорий при смене правил (grading.py)
+    """
+    CREATE TABLE smart_snapshots (
+        id INTEGER PRIMARY KEY,
+        serial_number TEXT NOT NULL,
+        device TEXT,
+        drive_model TEXT,
+        drive_serial TEXT,
+        wear_percent INTEGER,
+        power_on_hours INTEGER,
+        power_cycles INTEGER,
+        reallocated_sectors INTEGER,
+        pending_sectors INTEGER,
+        uncorrectable_sectors INTEGER,
+        media_errors INTEGER,
+        failed INTEGER NOT NULL DEFAULT 0,
+        grade TEXT,
+        rules TEXT,
+        tested_at TEXT
+    );
+    CREATE INDEX idx_smart_serial ON smart_snapshots(serial_number);
+    """,
+    # 4: длительности шагов проверки для analytics.py: steps - JSON [[шаг, оператор, статус], ...],
+    # step_durations - JSON [секунды, ...] в том же порядке. Список шагов почти у всех ноутбуков
+    # одинаков, поэтому год данных разбирается по нескольким разным спискам и одному массиву чисел
+    """
+    ALTER TABLE results ADD COLUMN steps TEXT;
+    ALTER TABLE results ADD COLUMN step_durations TEXT;
+    """,
+    # 5: шаги, прошедшие успешно, для переноса при повторной проверке (carry_over.py):
+    # JSON {шаг: {passed_at, fingerprint, results}}
+    """
+    ALTER TABLE results ADD COLUMN passed_steps TEXT;
+    """,
+    # 6: исходное название процессора из WMI, чтобы колонку CPU можно было пересчитать (cpu_model.py)
+    """
+    ALTER TABLE results ADD COLUMN cpu_name TEXT;
+    """,
+    # 7: номер изменения строки (растет с каждой записью в row_json): по нему convert_table.py --append
+    # видит, что уже выгруженную строку заменили. updated_at для этого грубоват - секунды
+    """
+    ALTER TABLE results ADD COLUMN revision INTEGER NOT NULL DEFAULT 0;
+    CREATE INDEX idx_results_revision ON results(revision);
+    """,
+]
+
+# Следующий номер изменения (миграция 7); индекс делает MAX дешевым
+NEXT_REVISION = "(SELECT COALESCE(MAX(revision), 0) + 1 FROM results)"
+
+SMART_METRICS = ('wear_percent', 'power_on_hours', 'power_cycles', 'reallocated_sectors',
+                 'pending_sectors', 'uncorrectable_sectors', 'media_errors')
+
+UNKNOWN_SERIALS = {"", "unknown", "default string", "to be filled by o.e.m.", "system serial number"}
+
+
+def normalize_serial(serial):
+    """Пустой или заводской-заглушка серийник хранится как NULL, чтобы не склеивать разные ноутбуки"""
+    serial = (serial or "").strip()
+    return None if serial.lower() in UNKNOWN_SERIALS else serial
+
+
+def _json_path(header):
+    """Путь к колонке таблицы внутри row_json для json_extract/json_set"""
+    return '$."' + header.replace('"', '\\"') + '"'
+
+
+class ResultsStore:
+    """Результаты по одной строке на серийный номер"""
+
+    def __init__(self, path=DB_FILE):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.migrate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    @property
+    def schema_version(self):
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        version = self.schema_version
+        for number, script in enumerate(MIGRATIONS[version:], version + 1):
+            with self.conn:
+                self.conn.executescript(script)
+                self.conn.execute(f"PRAGMA user_version = {number}")
+
+    def upsert(self, row, tested_at=None, station=None, cpu_name=None):
+        """Сохраняет строку таблицы (словарь по CSV_HEADERS); повторный тест того же серийника ее заменяет.
+        cpu_name - название процессора из WMI. Возвращает False, если в базе более поздняя проверка"""
+        with self.conn:
+            return self._upsert(row, tested_at, station, cpu_name)
+
+    def upsert_batch(self, items):
+        """Сохраняет пачку сообщений станций одной транзакцией.
+
+        items - [(message_id, station, row, tested_at, smart, steps, cpu_name)], smart - снимки SMART,
+        steps - длительности шагов (или None); повторно присланные сообщения (станция не
+        получила подтверждение и отправила снова) пропускаются. Сообщение о более старой
+        проверке, чем уже сохраненная (пришло с опозданием), строку и ее SMART/шаги не
+        меняет. Возвращает число новых строк.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        added = 0
+        with self.conn:
+            for message_id, station, row, tested_at, smart, steps, cpu_name in items:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO messages (id, station, received_at) VALUES (?, ?, ?)",
+                    (message_id, station, now))
+                if cursor.rowcount and self._upsert(row, tested_at, station, cpu_name):
+                    if smart is not None:
+                        self._save_smart(row.get('Серийный номер'), smart, tested_at)
+                    if steps is not None:
+                        self._save_steps(row.get('Серийный номер'), steps)
+                    added += 1
+        return added
+
+    def _upsert(self, row, tested_at, station, cpu_name=None):
+        """False - строка не изменена: в базе уже более поздняя проверка этого ноутбука"""
+        now = datetime.now().isoformat(timespec='seconds')
+        values = {
+            'serial_number': normalize_serial(row.get('Серийный номер')),
+            'number': row.get('Номер', ''),
+            'brand': row.get('Бренд', ''),
+            'model': row.get('Модель', ''),
+            'checker': row.get('Проверил работоспособность:', ''),
+            'tested_at': tested_at.isoformat(timespec='seconds') if isinstance(tested_at, datetime) else tested_at,
+            'updated_at': now,
+            'station': station,
+            'cpu_name': cpu_name,
+            'row_json': json.dumps({h: row.get(h, '') for h in CSV_HEADERS}, ensure_ascii=False),
+        }
+        # Опоздавшее сообщение о более старой проверке новую строку не затирает;
+        # проверка без даты не заменяет датированную
+        cursor = self.conn.execute(f"""
+            INSERT INTO results (serial_number, number, brand, model, checker, tested_at, updated_at, station,
+                                 cpu_name, row_json, revision)
+            VALUES (:serial_number, :number, :brand, :model, :checker, :tested_at, :updated_at, :station,
+                    :cpu_name, :row_json, {NEXT_REVISION})
+            ON CONFLICT(serial_number) DO UPDATE SET
+                number=excluded.number, brand=excluded.brand, model=excluded.model,
+                checker=excluded.checker, tested_at=excluded.tested_at,
+                updated_at=excluded.updated_at, station=excluded.station,
+                cpu_name=COALESCE(excluded.cpu_name, cpu_name), row_json=excluded.row_json,
+                revision=excluded.revision
+            WHERE results.tested_at IS NULL OR excluded.tested_at >= results.tested_at
+        """, values)
+        return cursor.rowcount > 0
+
+    def save_smart(self, serial, snapshots, tested_at=None):
+        """Заменяет снимки SMART ноутбука; snapshots - [{device, drive_model, drive_serial,
+        показатели SMART_METRICS, failed, grade, rules}]"""
+        with self.conn:
+            self._save_smart(serial, snapshots, tested_at)
+
+    def _save_smart(self, serial, snapshots, tested_at):
+        serial = normalize_serial(serial)
+        if serial is None:
+            return
+        if isinstance(tested_at, datetime):
+            tested_at = tested_at.isoformat(timespec='seconds')
+        if tested_at is not None and self.conn.execute(
+                "SELECT 1 FROM smart_snapshots WHERE serial_number = ? AND tested_at > ? LIMIT 1",
+                (serial, tested_at)).fetchone():
+            return
+        columns = ('device', 'drive_model', 'drive_serial') + SMART_METRICS + ('failed', 'grade', 'rules')
+        self.conn.execute("DELETE FROM smart_snapshots WHERE serial_number = ?", (serial,))
+        self.conn.executemany(
+            f"INSERT INTO smart_snapshots (serial_number, tested_at, {', '.join(columns)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(columns))})",
+            [(serial, tested_at) + tuple(snap.get(c) for c in columns) for snap in snapshots])
+
+    def smart_columns(self, metrics=SMART_METRICS):
+        """Все снимки SMART по столбцам: (id, серийники ноутбуков, {показатель: список, 'failed': список}, категории)"""
+        rows = self.conn.execute(
+            f"SELECT id, serial_number, failed, grade, {', '.join(metrics)} FROM smart_snapshots ORDER BY id"
+        ).fetchall()
+        columns = {metric: [row[metric] for row in rows] for metric in metrics}
+        columns['failed'] = [bool(row['failed']) for row in rows]
+        return [row['id'] for row in rows], [row['serial_number'] for row in rows], columns, [row['grade'] for row in rows]
+
+    def set_smart_grades(self, items, rules):
+        """Новые категории items - [(категория, id снимка)]; все снимки помечаются отпечатком правил rules"""
+        with self.conn:
+            self.conn.execute("UPDATE smart_snapshots SET rules = ?", (rules,))
+            self.conn.executemany("UPDATE smart_snapshots SET grade = ? WHERE id = ?", items)
+
+    def update_field(self, header, values):
+        """Меняет одну колонку в строках ноутбуков: values - {серийный номер: новое значение}"""
+        if not values:
+            return
+        # JSON меняет сам SQLite: разбирать и собирать строки в Python в разы дольше
+        with self.conn:
+            self.conn.executemany(f"UPDATE results SET row_json = json_set(row_json, ?, ?), "
+                                  f"revision = {NEXT_REVISION} WHERE serial_number = ?",
+                                  [(_json_path(header), value, serial) for serial, value in values.items()])
+
+    def cpu_columns(self):
+        """Колонка CPU всех строк: (серийники, названия из WMI или None, текущие значения)"""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute("SELECT serial_number, cpu_name, COALESCE(json_extract(row_json, ?), '') FROM results "
+                              "WHERE serial_number IS NOT NULL", (_json_path('CPU'),)).fetchall()
+        if not rows:
+            return [], [], []
+        return tuple(list(column) for column in zip(*rows))
+
+    def save_steps(self, serial, steps):
+        """Длительности шагов ноутбука; steps - [{step, operator, status, duration}]"""
+        with self.conn:
+            self._save_steps(serial, steps)
+
+    def _save_steps(self, serial, steps):
+        serial = normalize_serial(serial)
+        if serial is None:
+            return
+        names = [[s['step'], int(s.get('operator', True)), s.get('status')] for s in steps]
+        self.conn.execute("UPDATE results SET steps = ?, step_durations = ? WHERE serial_number = ?",
+                          (json.dumps(names, ensure_ascii=False), json.dumps([s['duration'] for s in steps]), serial))
+
+    def save_passed_steps(self, serial, passed):
+        """Пройденные шаги ноутбука; passed - {шаг: {passed_at, fingerprint, results}}"""
+        serial = normalize_serial(serial)
+        if serial is None:
+            return
+        with self.conn:
+            self.conn.execute("UPDATE results SET passed_steps = ? WHERE serial_number = ?",
+                              (json.dumps(passed, ensure_ascii=False), serial))
+
+    def passed_steps(self, serial):
+        """Пройденные шаги прошлой проверки ноутбука и ее время: ({шаг: запись}, tested_at)"""
+        serial = normalize_serial(serial)
+        if serial is None:
+            return {}, None
+        record = self.conn.execute("SELECT passed_steps, tested_at FROM results WHERE serial_number = ?",
+                                   (serial,)).fetchone()
+        if record is None or not record['passed_steps']:
+            return {}, None
+        try:
+            return json.loads(record['passed_steps']), record['tested_at']
+        except ValueError:
+            return {}, None
+
+    def step_columns(self, date_from=None, date_to=None):
+        """Ноутбуки с длительностями шагов, по столбцам:
+        {serial_number, checker, model, tested_at, steps, step_durations (JSON): список}"""
+        names = ('serial_number', 'checker', 'model', 'tested_at', 'steps', 'step_durations')
+        where, params = ["steps IS NOT NULL"], []
+        if date_from:
+            where.append("tested_at >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("tested_at < ?")
+            params.append(date_to)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(f"SELECT {', '.join(names)} FROM results WHERE {' AND '.join(where)}", params).fetchall()
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+        return {name: list(values) for name, values in zip(names, columns)}
+
+    def find_by_serial(self, serial):
+        serial = normalize_serial(serial)
+        if serial is None:
+            return None
+        record = self.conn.execute("SELECT * FROM results WHERE serial_number = ?", (serial,)).fetchone()
+        return json.loads(record['row_json']) if record else None
+
+    def find(self, model=None, checker=None, date_from=None, date_to=None):
+        """Строки по модели/проверяющему/диапазону дат (даты в формате ISO)"""
+        where, params = [], []
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        if checker:
+            where.append("checker = ?")
+            params.append(checker)
+        if date_from:
+            where.append("tested_at >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("tested_at < ?")
+            params.append(date_to)
+        sql = "SELECT row_json FROM results"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id"
+        return [json.loads(r['row_json']) for r in self.conn.execute(sql, params)]
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def import_csv(self, path=CSV_FILE):
+        """Переносит строки из старого test_results.csv; возвращает их количество"""
+        imported = 0
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                self.upsert(row)
+                imported += 1
+        return imported
+
+    def iter_rows(self, after_id=0, up_to_id=None):
+        """Строки таблицы (словари по CSV_HEADERS) с after_id < id <= up_to_id в порядке добавления, по одной"""
+        up_to_id = self.export_marks()[0] if up_to_id is None else up_to_id
+        for record in self.conn.execute("SELECT row_json FROM results WHERE id > ? AND id <= ? ORDER BY id",
+                                        (after_id, up_to_id)):
+            yield json.loads(record['row_json'])
+
+    def export_marks(self):
+        """(id последней строки, номер последнего изменения) - отметка для выгрузки с дописыванием.
+
+        Повторная проверка id строки не меняет, а номер изменения увеличивает.
+        """
+        return tuple(self.conn.execute("SELECT COALESCE(MAX(id), 0), COALESCE(MAX(revision), 0) FROM results")
+                     .fetchone())
+
+    def changed_since(self, revision, up_to_id):
+        """Менялась ли после изменения revision хоть одна строка с id <= up_to_id"""
+        return self.conn.execute("SELECT 1 FROM results WHERE revision > ? AND id <= ? LIMIT 1",
+                                 (revision, up_to_id)).fetchone() is not None
+
+    def export_csv(self, path=CSV_FILE):
+        """Выгружает все строки в CSV с заголовками CSV_HEADERS"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_HEADERS)
+            writer.writeheader()
+            writer.writerows(self.iter_rows())
+
+
+def open_store(path=DB_FILE, legacy_csv=CSV_FILE):
+    """Открывает базу; при первом запуске переносит в нее старый CSV"""
+    first_run = not os.path.exists(path)
+    store = ResultsStore(path)
+    if first_run and legacy_csv and os.path.exists(legacy_csv):
+        count = store.import_csv(legacy_csv)
+        print(f"Перенесено строк из {legacy_csv}: {count}")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="База результатов тестирования")
+    parser.add_argument("--db", default=DB_FILE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("export", help="выгрузить в CSV").add_argument("csv", nargs="?", default=CSV_FILE)
+    sub.add_parser("import", help="загрузить CSV").add_argument("csv", nargs="?", default=CSV_FILE)
+    sub.add_parser("find", help="найти по серийному номеру").add_argument("serial")
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        if args.command == "export":
+            store.export_csv(args.csv)
+            print(f"Выгружено строк: {store.count()} в {args.csv}")
+        elif args.command == "import":
+            print(f"Загружено строк: {store.import_csv(args.csv)}")
+        elif args.command == "find":
+            row = store.find_by_serial(args.serial)
+            if row is None:
+                print("Не найдено")
+            else:
+                for key, value in row.items():
+                    print(f"{key} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Планировщик шагов проверки с учетом зависимостей.
+
+Задача объявляет входы (имена других задач) и нужен ли ей оператор. Задачи без
+оператора (сборщики данных, подключаемые фоновые шаги) выполняются параллельно в
+пуле потоков, как только готовы их входы; их вывод копится и печатается целиком
+между вопросами оператору. Шаги с оператором выполняются по одному в текущем
+потоке: сначала те, чьи входы уже готовы, в порядке объявления, - так оператор не
+ждет фоновый сбор, пока есть чем заняться.
+
+Ошибка или таймаут задачи записывается в ее результат и не останавливает
+остальные; зависимые задачи все равно запускаются (шаги сами обрабатывают
+отсутствие данных). В детерминированном режиме (для проверок и отладки) все
+выполняется по очереди в текущем потоке, без пула и таймаутов.
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple
+
+# Сколько ждать завершения фоновых задач между проверками таймаутов, с
+POLL_INTERVAL = 0.5
+
+
+@dataclass
+class Task:
+    name: str
+    func: Callable[[], Any]
+    inputs: Tuple[str, ...] = ()
+    operator: bool = False
+    timeout: Optional[float] = None     # только для фоновых задач
+
+
+@dataclass
+class TaskResult:
+    name: str
+    status: str                 # ok, error, timeout, interrupted, skipped
+    value: Any = None
+    error: str = ""
+    started: float = 0.0        # time.monotonic()
+    duration: float = 0.0
+    output: str = ""            # вывод фоновой задачи
+
+    @property
+    def finished(self):
+        return self.status != "running"
+
+
+class _ThreadOutput:
+    """sys.stdout на время работы пула: потоки задач пишут в свой буфер, остальные - в консоль"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Scheduler:
+    """Фоновые задачи запускаются start(), шаги с оператором - run()"""
+
+    def __init__(self, max_workers=6, deterministic=False):
+        self.max_workers = max_workers
+        self.deterministic = deterministic
+        self.tasks = {}
+        self.results = {}
+        self.futures = {}
+        self.executor = None
+        self.output = None
+        self.lock = threading.RLock()
+        self.printed = set()
+        self.closed = False
+
+    def add(self, task):
+        if task.name in self.tasks:
+            raise ValueError(f"задача {task.name!r} уже есть")
+        self.tasks[task.name] = task
+
+    def has(self, name):
+        return name in self.tasks
+
+    def validate(self):
+        """Все входы объявлены и нет циклов; иначе ValueError"""
+        for task in self.tasks.values():
+            unknown = [name for name in task.inputs if name not in self.tasks]
+            if unknown:
+                raise ValueError(f"задача {task.name!r}: неизвестные входы {', '.join(unknown)}")
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"цикл зависимостей: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for dependency in self.tasks[name].inputs:
+                visit(dependency, path + [name])
+            state[name] = "done"
+
+        for name in self.tasks:
+            visit(name, [])
+
+    def _ready(self, task):
+        return all(name in self.results and self.results[name].finished for name in task.inputs)
+
+    # --- фоновые задачи ---
+
+    def start(self):
+        """Запускает все фоновые задачи, чьи входы готовы; остальные запустятся по готовности входов"""
+        if self.deterministic or self.closed:
+            return
+        with self.lock:
+            for task in self.tasks.values():
+                if not task.operator and task.name not in self.results and self._ready(task):
+                    self._submit(task)
+
+    def _submit(self, task):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="task")
+            self.output = _ThreadOutput(sys.stdout)
+            sys.stdout = self.output
+        result = TaskResult(task.name, "running", started=time.monotonic())
+        self.results[task.name] = result
+        future = self.executor.submit(self._background, task, result, self.output)
+        self.futures[task.name] = future
+        future.add_done_callback(lambda _: self.start())
+
+    def _background(self, task, result, output):
+        output.local.buffer = buffer = []
+        try:
+            value, status, error = self._call(task)
+        finally:
+            output.local.buffer = None
+        with self.lock:
+            # Задача, снятая по таймауту, результат уже не меняет
+            if result.status == "running":
+                result.value, result.error, result.output = value, error, "".join(buffer)
+                result.duration = time.monotonic() - result.started
+                result.status = status
+
+    @staticmethod
+    def _call(task):
+        try:
+            return task.func(), "ok", ""
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            return None, "error", f"{type(e).__name__}: {e}"
+
+    def _check_timeouts(self):
+        now = time.monotonic()
+        with self.lock:
+            for name, result in self.results.items():
+                timeout = self.tasks[name].timeout
+                if result.status == "running" and timeout and now - result.started > timeout:
+                    result.status = "timeout"
+                    result.duration = now - result.started
+                    result.error = f"нет результата за {timeout:.0f} с"
+        self.start()
+
+    def _pending(self):
+        return [self.futures[name] for name, result in self.results.items()
+                if result.status == "running" and name in self.futures]
+
+    def _flush_output(self, on_done=None):
+        """Печатает вывод завершенных фоновых задач (в порядке объявления) и сообщает о них"""
+        for name, task in self.tasks.items():
+            result = self.results.get(name)
+            if name in self.printed or result is None or not result.finished or task.operator:
+                continue
+            self.printed.add(name)
+            if result.output:
+                print(result.output, end="" if result.output.endswith("\n") else "\n")
+            if on_done:
+                on_done(task, result)
+
+    def get(self, name):
+        """Результат задачи: ждет ее, если она еще выполняется; ошибку задачи пробрасывает"""
+        task = self.tasks[name]
+        if self.deterministic:
+            result = self._run_inline(task)
+        else:
+            self.start()
+            result = self.results.get(name)
+            if result is None:
+                # Входы еще не готовы - выполняем прямо сейчас, как раньше без фона
+                result = self._run_inline(task)
+            elif result.status == "running":
+                print(f"Ожидаем фоновый сбор данных ({name})...")
+                while result.status == "running":
+                    wait([self.futures[name]], timeout=POLL_INTERVAL)
+                    self._check_timeouts()
+        if result.status == "timeout":
+            raise TimeoutError(f"{name}: {result.error}")
+        if result.status == "error":
+            raise RuntimeError(f"{name}: {result.error}")
+        return result.value
+
+    def _run_inline(self, task):
+        with self.lock:
+            result = self.results.get(task.name)
+            if result is not None:
+                return result
+            result = self.results[task.name] = TaskResult(task.name, "running", started=time.monotonic())
+        result.value, result.status, result.error = self._call(task)
+        result.duration = time.monotonic() - result.started
+        return result
+
+    # --- шаги с оператором ---
+
+    def run(self, skip=(), on_done=None, on_error=None):
+        """Выполняет все задачи; skip - шаги, пройденные ранее.
+
+        on_done(task, result) вызывается в текущем потоке после каждой задачи;
+        on_error(task, result) -> продолжать ли после ошибки шага с оператором.
+        Возвращает {имя: TaskResult}.
+        """
+        self.validate()
+        for name in skip:
+            if name in self.tasks and name not in self.results:
+                self.results[name] = TaskResult(name, "skipped")
+        if self.deterministic:
+            for task in self.tasks.values():
+                if not self._run_deterministic(task, on_done, on_error):
+                    break
+            return self.results
+
+        self.start()
+        waiting_printed = False
+        while True:
+            self._check_timeouts()
+            self._flush_output(on_done)
+            queue = [task for task in self.tasks.values() if task.operator and task.name not in self.results]
+            ready = [task for task in queue if self._ready(task)]
+            pending = self._pending()
+            if queue and (ready or not pending):
+                waiting_printed = False
+                if not self._run_operator((ready or queue)[0], on_done, on_error):
+                    break
+                continue
+            if not pending:
+                break
+            if queue and not waiting_printed:
+                running = [name for name, result in self.results.items() if result.status == "running"]
+                print(f"Ожидаем фоновые задачи: {', '.join(running)}...")
+                waiting_printed = True
+            if pending:
+                wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+        self._flush_output(on_done)
+        return self.results
+
+    def _run_deterministic(self, task, on_done, on_error):
+        if task.name in self.results and self.results[task.name].status != "running":
+            return self.results[task.name].status != "interrupted"
+        for name in task.inputs:
+            if not self._run_deterministic(self.tasks[name], on_done, on_error):
+                return False
+        if not task.operator:
+            result = self._run_inline(task)
+            if on_done:
+                on_done(task, result)
+            return True
+        return self._run_operator(task, on_done, on_error)
+
+    def _run_operator(self, task, on_done, on_error):
+        """Шаг с оператором в текущем потоке; False - дальше не продолжать"""
+        result = self.results[task.name] = TaskResult(task.name, "running", started=time.monotonic())
+        try:
+            result.value, result.status, result.error = self._call(task)
+        except KeyboardInterrupt:
+            result.status = "interrupted"
+        result.duration = time.monotonic() - result.started
+        if on_done:
+            on_done(task, result)
+        if result.status == "interrupted":
+            return False
+        if result.status == "error" and on_error is not None:
+            return on_error(task, result)
+        return True
+
+    def shutdown(self, wait=False):
+        self.closed = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+            self.executor = None
+        if self.output is not None and sys.stdout is self.output:
+            sys.stdout = self.output.stream
+        self.output = None
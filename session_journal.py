@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Журнал сессии тестирования: пройденные шаги сохраняются на диск после каждого шага.
+
+В журнал попадают только результаты, которые переживают запись в JSON без потерь:
+строки, числа, списки и словари из них. Объекты шагов (отчеты батареи, SMART с
+сырым выводом smartctl, отчеты камеры и микрофона) нужны только для вывода внутри
+своего шага и в журнал не пишутся, поэтому после продолжения в результатах нет
+объектов, превращенных в словари или строки.
+"""
+
+import dataclasses
+import json
+import os
+import re
+from datetime import datetime
+
+SESSIONS_DIR = "sessions"
+
+
+def _json_default(value):
+    if dataclasses.is_dataclass(value):
+        return dataclasses.asdict(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def json_safe(value):
+    """True, если значение записывается в JSON и читается обратно тем же (кортеж - списком)"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(json_safe(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and json_safe(item) for key, item in value.items())
+    return False
+
+
+def journal_results(results):
+    """Результаты для журнала: ключи с объектами (dataclass и т.п.) пропускаются"""
+    return {key: value for key, value in results.items() if json_safe(value)}
+
+
+def atomic_write_json(path, data):
+    """Пишет JSON так, что на диске всегда либо старая, либо новая версия файла целиком"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=_json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if hasattr(os, 'O_DIRECTORY'):
+        # На Linux переименование становится надежным только после fsync каталога
+        fd = os.open(os.path.dirname(path) or ".", os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class SessionJournal:
+    """Журнал одного ноутбука (по серийному номеру).
+
+    Без серийного номера журнал не пишется на диск: ноутбуки с пустым или заводским-
+    заглушкой серийником делили бы один файл, и продолжение подставило бы чужие результаты.
+    """
+
+    def __init__(self, serial, directory=SESSIONS_DIR):
+        self.serial = serial or None
+        self.directory = directory
+        self.path = os.path.join(directory, re.sub(r'[^\w.-]', '_', serial) + ".json") if serial else None
+        self.data = {'serial': self.serial, 'started': datetime.now().isoformat(timespec='seconds'),
+                     'updated': None, 'completed_steps': [], 'results': {}}
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def exists(self):
+        return self.enabled and os.path.exists(self.path)
+
+    def load(self):
+        """Читает журнал с диска; поврежденный журнал считается отсутствующим"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self.data.update(data)
+        return self.data
+
+    @property
+    def completed_steps(self):
+        return list(self.data['completed_steps'])
+
+    @property
+    def results(self):
+        return dict(self.data['results'])
+
+    def record_step(self, step_name, results):
+        """Отмечает шаг пройденным вместе с результатами на этот момент (см. journal_results)"""
+        if step_name not in self.data['completed_steps']:
+            self.data['completed_steps'].append(step_name)
+        self.data['results'] = journal_results(results)
+        self.data['updated'] = datetime.now().isoformat(timespec='seconds')
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write_json(self.path, self.data)
+
+    def finish(self):
+        """Сессия сохранена в базу - журнал больше не нужен"""
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Параллельный опрос SMART всех дисков через smartctl.
+
+Вывод smartctl (JSON из 'smartctl -j', для старых версий - текст) разбирается в SmartRecord:
+паспорт диска, полная таблица атрибутов ATA или журнал здоровья NVMe и сводные показатели.
+"""
+
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from drivedb import shared_drivedb
+
+SMARTCTL_PATH = os.path.join("smartmontools", "bin", "smartctl.exe")
+
+
+def parse_scan(output):
+    """Разбирает 'smartctl --scan' в список аргументов устройства.
+
+    Строка вида '/dev/sda -d nvme # /dev/sda, NVMe device' -> ['/dev/sda', '-d', 'nvme']
+    """
+    devices = []
+    for line in (output or "").splitlines():
+        args = line.split('#', 1)[0].split()
+        if args:
+            devices.append(args)
+    return devices
+
+
+# Атрибуты ATA, нормализованное значение которых - оставшийся ресурс SSD в процентах
+ATA_LIFE_LEFT = ("SSD_Life_Left", "Percent_Lifetime_Remain", "Remaining_Lifetime_Perc",
+                 "Percent_Life_Remaining", "Media_Wearout_Indicator", "Wear_Leveling_Count")
+# Атрибуты записанного объема: имя -> байт на единицу
+ATA_WRITTEN = {"Total_LBAs_Written": 512, "Host_Writes_32MiB": 32 * 2 ** 20,
+               "Lifetime_Writes_GiB": 2 ** 30, "Host_Writes_GiB": 2 ** 30, "Total_Writes_GiB": 2 ** 30}
+NVME_DATA_UNIT = 512 * 1000
+
+_ATA_ROW = re.compile(r"^\s*(\d+)\s+(\S+)\s+(0x[0-9a-fA-F]+)\s+(\d+)\s+(\d+)\s+(\d+|---)\s+"
+                      r"(\S+)\s+(\S+)\s+(\S+)\s+(.*?)\s*$")
+_WHEN_FAILED = {"-": "", "FAILING_NOW": "now", "In_the_past": "past"}
+
+
+@dataclass
+class AtaAttribute:
+    id: int
+    name: str
+    value: int
+    worst: int
+    thresh: int
+    prefailure: bool
+    when_failed: str    # "" / "now" / "past", как в JSON smartctl
+    raw: Optional[int]  # первое число сырого значения ("36 (Min/Max 21/49)" -> 36)
+    raw_string: str
+
+
+@dataclass
+class NvmeHealth:
+    critical_warning: int = 0
+    temperature: Optional[int] = None
+    available_spare: Optional[int] = None
+    available_spare_threshold: Optional[int] = None
+    percentage_used: Optional[int] = None
+    data_units_read: Optional[int] = None
+    data_units_written: Optional[int] = None
+    power_cycles: Optional[int] = None
+    power_on_hours: Optional[int] = None
+    unsafe_shutdowns: Optional[int] = None
+    media_errors: Optional[int] = None
+    error_log_entries: Optional[int] = None
+
+
+@dataclass
+class SmartRecord:
+    """Один диск по данным smartctl: паспорт, сводные показатели и полные таблицы"""
+    protocol: str = ""          # "ATA" / "NVMe" / "" если данных нет
+    model: str = ""
+    family: str = ""            # семейство по базе smartmontools
+    serial: str = ""
+    firmware: str = ""
+    capacity_bytes: int = 0
+    rotation_rpm: Optional[int] = None  # 0 - SSD, None - неизвестно
+    smart_enabled: bool = False
+    passed: Optional[bool] = None       # итог самопроверки: PASSED / FAILED
+    power_on_hours: Optional[int] = None
+    power_cycles: Optional[int] = None
+    temperature: Optional[int] = None
+    wear_percent: Optional[int] = None  # израсходованный ресурс SSD, %
+    written_bytes: Optional[int] = None
+    reallocated_sectors: Optional[int] = None
+    pending_sectors: Optional[int] = None
+    uncorrectable_sectors: Optional[int] = None
+    media_errors: Optional[int] = None
+    attributes: List[AtaAttribute] = field(default_factory=list)
+    nvme: Optional[NvmeHealth] = None
+    warning: str = ""           # предупреждение из базы дисков (например, про ошибку прошивки)
+    error: str = ""
+
+    @property
+    def ok(self):
+        return bool(self.protocol) and not self.error
+
+    @property
+    def is_ssd(self):
+        return self.protocol == "NVMe" or self.rotation_rpm == 0
+
+    @property
+    def failed(self):
+        """Диск сам сообщает о неисправности: самопроверка, атрибут ниже порога или критическое предупреждение NVMe"""
+        if self.passed is False:
+            return True
+        if any(attr.when_failed == "now" for attr in self.attributes):
+            return True
+        return bool(self.nvme and self.nvme.critical_warning)
+
+    def attribute(self, *names_or_ids):
+        """Первый найденный атрибут в порядке names_or_ids (а не в порядке таблицы)"""
+        for key in names_or_ids:
+            for attr in self.attributes:
+                if key in (attr.id, attr.name):
+                    return attr
+        return None
+
+    def summary(self):
+        """Поля результата опроса в прежнем виде (строки для таблицы)"""
+        if not self.ok:
+            return {'ok': False, 'error': self.error or "нет SMART-данных"}
+        return {'ok': True, 'error': "",
+                'power_hours': "" if self.power_on_hours is None else str(self.power_on_hours),
+                'power_cycles': "" if self.power_cycles is None else str(self.power_cycles),
+                'smart_failed': self.failed}
+
+
+def leading_int(text):
+    """'16021 (84 23 0)' / '21,337' / '0/12' -> 16021 / 21337 / 0"""
+    match = re.match(r"\s*([\d,]+)", text or "")
+    if not match:
+        return None
+    digits = match.group(1).replace(",", "")
+    return int(digits) if digits else None
+
+
+def _fill_from_attributes(record):
+    """Сводные показатели ATA из таблицы атрибутов (если их не дал сам smartctl)"""
+    def raw(*keys):
+        attr = record.attribute(*keys)
+        return attr.raw if attr else None
+
+    if record.power_on_hours is None:
+        record.power_on_hours = raw(9)
+    if record.power_cycles is None:
+        record.power_cycles = raw(12)
+    if record.temperature is None:
+        # 194 - температура диска, 190 - воздуха у диска: она только запасная
+        record.temperature = raw(194, 190)
+    record.reallocated_sectors = raw(5)
+    record.pending_sectors = raw(197)
+    record.uncorrectable_sectors = raw(198)
+    record.media_errors = raw(187)
+    life = record.attribute(*ATA_LIFE_LEFT)
+    if life is not None:
+        record.wear_percent = max(0, 100 - life.value)
+    for attr in record.attributes:
+        if attr.name in ATA_WRITTEN and attr.raw is not None:
+            record.written_bytes = attr.raw * ATA_WRITTEN[attr.name]
+            break
+
+
+def _fill_from_nvme(record):
+    nvme = record.nvme
+    record.power_on_hours = nvme.power_on_hours
+    record.power_cycles = nvme.power_cycles
+    if record.temperature is None:
+        record.temperature = nvme.temperature
+    record.wear_percent = nvme.percentage_used
+    record.media_errors = nvme.media_errors
+    if nvme.data_units_written is not None:
+        record.written_bytes = nvme.data_units_written * NVME_DATA_UNIT
+
+
+def parse_smartctl_json(data):
+    """Разбирает вывод 'smartctl -j -a' (текст или уже загруженный dict) в SmartRecord"""
+    if isinstance(data, str):
+        data = json.loads(data)
+    record = SmartRecord()
+    messages = [m.get('string', "") for m in data.get('smartctl', {}).get('messages', [])
+                if m.get('severity') == 'error']
+    record.model = data.get('model_name', "")
+    record.family = data.get('model_family', "")
+    record.serial = data.get('serial_number', "")
+    record.firmware = data.get('firmware_version', "")
+    record.capacity_bytes = (data.get('user_capacity', {}).get('bytes')
+                             or data.get('nvme_total_capacity') or 0)
+    record.rotation_rpm = data.get('rotation_rate')
+    record.smart_enabled = bool(data.get('smart_support', {}).get('enabled'))
+    if 'smart_status' in data:
+        record.passed = bool(data['smart_status'].get('passed'))
+    record.power_on_hours = data.get('power_on_time', {}).get('hours')
+    record.power_cycles = data.get('power_cycle_count')
+    record.temperature = data.get('temperature', {}).get('current')
+
+    protocol = data.get('device', {}).get('protocol', "")
+    log = data.get('nvme_smart_health_information_log')
+    table = data.get('ata_smart_attributes', {}).get('table')
+    if log is not None:
+        record.protocol = "NVMe"
+        record.smart_enabled = True
+        record.rotation_rpm = None
+        record.nvme = NvmeHealth(
+            critical_warning=log.get('critical_warning', 0),
+            temperature=log.get('temperature'),
+            available_spare=log.get('available_spare'),
+            available_spare_threshold=log.get('available_spare_threshold'),
+            percentage_used=log.get('percentage_used'),
+            data_units_read=log.get('data_units_read'),
+            data_units_written=log.get('data_units_written'),
+            power_cycles=log.get('power_cycles'),
+            power_on_hours=log.get('power_on_hours'),
+            unsafe_shutdowns=log.get('unsafe_shutdowns'),
+            media_errors=log.get('media_errors'),
+            error_log_entries=log.get('num_err_log_entries'),
+        )
+        _fill_from_nvme(record)
+    elif table is not None:
+        record.protocol = protocol or "ATA"
+        record.attributes = [AtaAttribute(
+            id=row['id'], name=row.get('name', ""), value=row.get('value', 0), worst=row.get('worst', 0),
+            thresh=row.get('thresh', 0), prefailure=bool(row.get('flags', {}).get('prefailure')),
+            when_failed=row.get('when_failed', ""),
+            raw=leading_int(row.get('raw', {}).get('string', "")),
+            raw_string=row.get('raw', {}).get('string', ""),
+        ) for row in table]
+        _fill_from_attributes(record)
+    if not record.protocol or (messages and not record.smart_enabled):
+        record.protocol = ""
+        record.error = messages[0] if messages else "нет SMART-данных"
+    return record
+
+
+def parse_smartctl_text(output):
+    """Разбирает текстовый вывод 'smartctl -a' (запасной вариант для старых smartctl без -j)"""
+    record = SmartRecord()
+    fields = {}
+    attributes = []
+    nvme_log = False
+    for line in (output or "").splitlines():
+        row = _ATA_ROW.match(line)
+        if row:
+            raw_string = row.group(10)
+            attributes.append(AtaAttribute(
+                id=int(row.group(1)), name=row.group(2), value=int(row.group(4)), worst=int(row.group(5)),
+                thresh=0 if row.group(6) == "---" else int(row.group(6)),
+                prefailure=row.group(7) == "Pre-fail",
+                when_failed=_WHEN_FAILED.get(row.group(9), row.group(9)),
+                raw=leading_int(raw_string), raw_string=raw_string,
+            ))
+            continue
+        if line.startswith("SMART/Health Information (NVMe Log"):
+            nvme_log = True
+            continue
+        if "overall-health self-assessment test result:" in line:
+            record.passed = line.rsplit(":", 1)[1].strip().startswith("PASSED")
+            continue
+        key, sep, value = line.partition(":")
+        if sep and key and not key.startswith(" "):
+            # Первое вхождение: "SMART support is" встречается дважды, нужна вторая строка - ниже
+            fields.setdefault(key.strip(), value.strip())
+            if key.strip() == "SMART support is" and value.strip().startswith("Enabled"):
+                record.smart_enabled = True
+
+    record.model = fields.get("Device Model") or fields.get("Model Number", "")
+    record.family = fields.get("Model Family", "")
+    record.serial = fields.get("Serial Number", "")
+    record.firmware = fields.get("Firmware Version", "")
+    capacity = (fields.get("User Capacity") or fields.get("Total NVM Capacity")
+                or fields.get("Namespace 1 Size/Capacity", ""))
+    record.capacity_bytes = leading_int(capacity) or 0
+    rotation = fields.get("Rotation Rate", "")
+    if rotation:
+        record.rotation_rpm = 0 if rotation.startswith("Solid State") else leading_int(rotation)
+
+    if nvme_log:
+        record.protocol = "NVMe"
+        record.smart_enabled = True
+        warning = fields.get("Critical Warning", "0")
+        record.nvme = NvmeHealth(
+            critical_warning=int(warning, 16) if warning.startswith("0x") else leading_int(warning) or 0,
+            temperature=leading_int(fields.get("Temperature")),
+            available_spare=leading_int(fields.get("Available Spare")),
+            available_spare_threshold=leading_int(fields.get("Available Spare Threshold")),
+            percentage_used=leading_int(fields.get("Percentage Used")),
+            data_units_read=leading_int(fields.get("Data Units Read")),
+            data_units_written=leading_int(fields.get("Data Units Written")),
+            power_cycles=leading_int(fields.get("Power Cycles")),
+            power_on_hours=leading_int(fields.get("Power On Hours")),
+            unsafe_shutdowns=leading_int(fields.get("Unsafe Shutdowns")),
+            media_errors=leading_int(fields.get("Media and Data Integrity Errors")),
+            error_log_entries=leading_int(fields.get("Error Information Log Entries")),
+        )
+        _fill_from_nvme(record)
+    elif attributes or (record.smart_enabled and "ATA Version is" in fields):
+        record.protocol = "ATA"
+        record.attributes = attributes
+        _fill_from_attributes(record)
+    else:
+        record.error = "нет SMART-данных"
+    return record
+
+
+def parse_smartctl(output):
+    """JSON или текст smartctl -> SmartRecord"""
+    if output and output.lstrip().startswith("{"):
+        try:
+            return parse_smartctl_json(output)
+        except ValueError:
+            pass
+    return parse_smartctl_text(output)
+
+
+def apply_drivedb(record, db):
+    """Дополняет запись данными базы дисков: семейство, предупреждение и имена атрибутов.
+
+    smartctl сам подписывает атрибуты по своей базе, но старый smartctl или диск,
+    которого в его базе нет, дают Unknown_Attribute - тогда ресурс SSD не найти по имени.
+    """
+    if not record.ok or not record.model:
+        return record
+    entry = db.lookup(record.model, record.firmware)
+    if entry is not None:
+        record.family = record.family or entry.family
+        record.warning = entry.warning
+    if record.attributes:
+        names = db.attribute_names(entry)
+        renamed = False
+        for attr in record.attributes:
+            if attr.name == "Unknown_Attribute" and attr.id in names:
+                attr.name = names[attr.id]
+                renamed = True
+        if renamed:
+            _fill_from_attributes(record)
+    return record
+
+
+def parse_smart_output(output):
+    """Разбирает вывод smartctl одного диска в поля результата"""
+    return parse_smartctl(output).summary()
+
+
+class SmartPoller:
+    """Опрашивает диски в пуле потоков, каждый со своим таймаутом"""
+
+    def __init__(self, smartctl_path=SMARTCTL_PATH, timeout=30, max_workers=4, drivedb=None):
+        self.smartctl_path = smartctl_path
+        # База дисков лежит рядом с smartctl; индекс по ней открывается при первом диске
+        self.drivedb = drivedb or shared_drivedb(os.path.join(os.path.dirname(smartctl_path), "drivedb.h"))
+        self.timeout = timeout
+        self.max_workers = max_workers
+        # smartctl до 7.0 не знает -j; проверяется один раз до опроса дисков (json_support)
+        self.json_supported = None
+
+    def run(self, args, timeout=None):
+        result = subprocess.run([self.smartctl_path] + args, capture_output=True, text=True,
+                                encoding='utf-8', errors='replace', timeout=timeout or self.timeout)
+        return result.stdout.strip()
+
+    def scan(self):
+        return parse_scan(self.run(["--scan"]))
+
+    def json_support(self):
+        """Понимает ли smartctl -j: по ответу на -j --version, один раз на весь опрос.
+
+        Решение общее для всех дисков и принимается до пула потоков: ошибку одного
+        диска (например, USB-моста) за отсутствие -j принимать нельзя.
+        """
+        if self.json_supported is None:
+            try:
+                self.json_supported = self.run(["-j", "--version"]).startswith("{")
+            except (OSError, subprocess.SubprocessError):
+                self.json_supported = False
+        return self.json_supported
+
+    def query(self, device_args):
+        """Опрашивает один диск. Никогда не бросает исключений - ошибка попадает в результат"""
+        device = device_args[0]
+        info = {'device': device, 'ok': False, 'error': "", 'output': "",
+                'power_hours': "", 'power_cycles': "", 'smart_failed': False, 'record': None}
+        try:
+            output = ""
+            if self.json_support():
+                output = self.run(["-j", "-a"] + device_args[1:] + [device])
+                # Не JSON - ошибка именно этого диска: он один опрашивается текстом
+                if not output.startswith("{"):
+                    output = ""
+            if not output:
+                output = self.run(["-a"] + device_args[1:] + [device])
+        except subprocess.TimeoutExpired:
+            info['error'] = f"нет ответа за {self.timeout} с"
+            return info
+        except Exception as e:
+            info['error'] = str(e)
+            return info
+
+        record = parse_smartctl(output)
+        if self.drivedb is not None:
+            try:
+                apply_drivedb(record, self.drivedb)
+            except (OSError, ValueError) as e:
+                info['drivedb_error'] = str(e)
+        info['output'] = output
+        info['record'] = record
+        info.update(record.summary())
+        return info
+
+    def poll(self, devices, on_done=None):
+        """Опрашивает все диски параллельно, возвращает {устройство: результат}.
+
+        on_done(info) вызывается в основном потоке по мере готовности каждого диска.
+        """
+        results = {}
+        if not devices:
+            return results
+        self.json_support()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(devices))) as pool:
+            futures = {pool.submit(self.query, args): args[0] for args in devices}
+            for future in as_completed(futures):
+                info = future.result()
+                results[futures[future]] = info
+                if on_done:
+                    on_done(info)
+        # Порядок как в --scan, а не как завершились
+        return {args[0]: results[args[0]] for args in devices}
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Реестр шагов проверки ноутбука.
+
+Шаг описывается метаданными, а код подключается только при запуске шага: цель -
+имя метода LaptopTester или 'модуль:функция' (функция получает тестер). Тяжелые
+библиотеки (OpenCV, NumPy, PortAudio) импортируются внутри шагов, поэтому запуск
+тестера и первый вопрос оператору их не ждут; такие модули шаг перечисляет в
+requires, и bench/bench_startup.py проверяет, что до первого вопроса они не
+загружены. Входы шага - сборщики данных (LaptopTester.collectors) или другие шаги;
+по ним scheduler.py решает, когда шаг можно запускать.
+
+Дополнительные шаги можно подключить файлом test_plugins.json:
+
+    [{"name": "Отпечаток пальца", "target": "fingerprint:check", "after": "Камера",
+      "inputs": ["inventory"], "results": ["fingerprint_ok"]}]
+"""
+
+import importlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+PLUGINS_FILE = "test_plugins.json"
+
+
+@dataclass(frozen=True)
+class TestSpec:
+    __test__ = False                 # не тест pytest, хоть имя и начинается с Test
+
+    name: str                        # имя шага в журнале сессии, трассе и выводе
+    target: str                      # метод тестера или 'модуль:функция'
+    requires: Tuple[str, ...] = ()   # модули, которые шаг импортирует сам (не до первого вопроса)
+    operator: bool = True            # нужен ли оператор; без него шаг идет в фоне
+    inputs: Tuple[str, ...] = ()     # сборщики или шаги, результат которых нужен шагу
+    timeout: Optional[float] = None  # для фоновых шагов, с
+    after: Optional[str] = None      # для подключаемых шагов: после какого шага вставить
+    results: Tuple[str, ...] = ()    # ключи результатов, которые пишет шаг: их сохраняет и восстанавливает
+                                     # перенос шага (carry_over.py)
+
+
+TESTS = [
+    TestSpec("Сбор информации о железе", "get_hardware_info", inputs=("inventory",),
+             results=("serial_number", "model", "cpu", "ram_gb", "disk_info", "gpu", "screen_resolution")),
+    TestSpec("HWiNFO64", "test_hwinfo", results=("hwinfo_ran",)),
+    TestSpec("Аудио/Динамики", "test_audio", requires=("numpy", "sounddevice", "tones"), inputs=("audio_devices",),
+             results=("audio_test_ok", "audio_left_ok", "audio_right_ok", "audio_sweep_ok")),
+    TestSpec("Камера", "test_camera", requires=("cv2", "numpy", "camera_check"), inputs=("cameras",),
+             results=("camera_ok", "camera_problems")),
+    TestSpec("SSD/HDD", "test_ssd", requires=("grading",), inputs=("smart",),
+             results=("ssd_tool_ok", "smart_info", "smart_snapshots")),
+    TestSpec("Батарея", "test_battery", inputs=("battery_report",),
+             results=("battery_ok", "battery_cycles", "battery_health", "battery_cycles_2", "battery_health_2")),
+    TestSpec("Экран", "test_screen", inputs=("inventory", "monitors"), results=("screen_ok",)),
+    TestSpec("Клавиатура", "test_keyboard", results=("keyboard_ok", "keyboard_untested")),
+    TestSpec("Мышь/Тачпад", "test_mouse", inputs=("pointing_devices",), results=("mouse_test_ok",)),
+    TestSpec("Микрофон", "test_microphone", requires=("sounddevice", "numpy", "mic_meter"), inputs=("microphones",),
+             results=("microphone_ok", "microphone_problems")),
+    TestSpec("Диспетчер устройств", "test_device_manager", inputs=("device_errors",), results=("devicemanager_ok",)),
+    TestSpec("Настройки учетных записей", "test_accounts", results=("accounts_configured",)),
+    TestSpec("Тачскрин", "test_touchscreen", inputs=("touch_devices",), results=("touchscreen_ok",)),
+    TestSpec("Кнопки тачпада", "test_touchpad_buttons",
+             results=("touchpad_ok", "touchpad_buttons", "mouse_latency_ms")),
+]
+
+
+def load_plugins(path=PLUGINS_FILE):
+    """Подключаемые шаги из JSON-файла; нет файла - нет шагов"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    specs = []
+    for item in items:
+        if ':' not in item.get('target', ''):
+            raise ValueError(f"шаг {item.get('name')!r}: цель должна быть 'модуль:функция'")
+        specs.append(TestSpec(item['name'], item['target'], tuple(item.get('requires', ())),
+                              item.get('operator', True), tuple(item.get('inputs', ())),
+                              item.get('timeout'), item.get('after'), tuple(item.get('results', ()))))
+    return specs
+
+
+def registry(plugins=None):
+    """Шаги по порядку: встроенные, подключаемые - после указанного шага или в конце"""
+    specs = list(TESTS)
+    for spec in load_plugins() if plugins is None else plugins:
+        names = [s.name for s in specs]
+        if spec.name in names:
+            raise ValueError(f"шаг {spec.name!r} уже есть")
+        position = names.index(spec.after) + 1 if spec.after in names else len(specs)
+        specs.insert(position, spec)
+    return specs
+
+
+def resolve(spec, tester):
+    """Функция шага без аргументов; модуль подключаемого шага импортируется здесь"""
+    if ':' not in spec.target:
+        return getattr(tester, spec.target)
+    module_name, _, attr = spec.target.partition(':')
+    func = getattr(importlib.import_module(module_name), attr)
+    return lambda: func(tester)
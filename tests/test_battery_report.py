@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверки battery_report.py на сохраненных отчетах powercfg.
+
+Все отчеты - из bench/fixtures/powercfg: одна батарея HP EliteBook (копия
+battery_report.html - его тестер пересоздает при каждом запуске) и две батареи
+ThinkPad T480 в XML, в HTML и в HTML с русской локалью (другие заголовки, пробел
+как разделитель тысяч).
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from battery_report import (CapacityEntry, UsageEntry, parse_battery_report, parse_hms, parse_iso_duration,
+                            parse_mwh, split_period)
+
+POWERCFG = os.path.join(ROOT, "bench", "fixtures", "powercfg")
+REPORT_HTML = os.path.join(POWERCFG, "hp_elitebook_850_g5.html")
+DUAL_XML = os.path.join(POWERCFG, "thinkpad_t480_dual.xml")
+DUAL_HTML = os.path.join(POWERCFG, "thinkpad_t480_dual.html")
+DUAL_RU_HTML = os.path.join(POWERCFG, "thinkpad_t480_dual_ru.html")
+
+
+class ValueParsersTest(unittest.TestCase):
+    def test_mwh(self):
+        self.assertEqual(parse_mwh("56,018 mWh"), 56018)
+        self.assertEqual(parse_mwh("56 018 mWh"), 56018)
+        self.assertEqual(parse_mwh("-"), 0)
+
+    def test_durations(self):
+        self.assertEqual(parse_hms("27:23:58"), 27 * 3600 + 23 * 60 + 58)
+        self.assertIsNone(parse_hms("-"))
+        self.assertEqual(parse_iso_duration("PT16H22M29S"), 16 * 3600 + 22 * 60 + 29)
+        self.assertEqual(parse_iso_duration("P1DT1S"), 86401)
+        self.assertIsNone(parse_iso_duration("P"))
+
+    def test_period(self):
+        self.assertEqual(split_period("2024-06-24  -  2024-12-02"), ("2024-06-24", "2024-12-02"))
+        self.assertEqual(split_period("2025-07-23"), ("2025-07-23", ""))
+
+
+class SingleBatteryHtmlTest(unittest.TestCase):
+    """Одна батарея, HP EliteBook 850 G5 (английская локаль)"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.report = parse_battery_report(REPORT_HTML)
+
+    def test_battery(self):
+        self.assertEqual(len(self.report.batteries), 1)
+        battery = self.report.batteries[0]
+        self.assertEqual(battery.name, "Primary")
+        self.assertEqual(battery.design_mwh, 56018)
+        self.assertEqual(battery.full_charge_mwh, 41730)
+        self.assertEqual(battery.cycle_count, 222)
+        self.assertEqual(battery.health, 74.49)
+
+    def test_history(self):
+        self.assertEqual(len(self.report.capacity_history), 39)
+        self.assertEqual(self.report.capacity_history[0], CapacityEntry("2024-06-24", "2024-12-02", 39420, 56018))
+        # Последняя строка - текущий день, без конца периода
+        self.assertEqual(self.report.capacity_history[-1], CapacityEntry("2025-07-23", "", 41730, 56018))
+        self.assertEqual(len(self.report.usage_history), 39)
+        self.assertEqual(self.report.usage_history[0], UsageEntry("2024-06-24", "2024-12-02", 58949, None, 14701, None))
+
+
+class DualBatteryTest(unittest.TestCase):
+    """Две батареи ThinkPad: обе попадают в отчет, во всех форматах одинаково"""
+
+    def check_batteries(self, report):
+        self.assertEqual([b.name for b in report.batteries], ["01AV423", "01AV422"])
+        self.assertEqual([(b.design_mwh, b.full_charge_mwh, b.cycle_count) for b in report.batteries],
+                         [(24050, 19870, 412), (23480, 15120, 388)])
+        self.assertEqual([b.health for b in report.batteries], [82.62, 64.4])
+
+    def test_xml(self):
+        report = parse_battery_report(DUAL_XML)
+        self.check_batteries(report)
+        battery = report.batteries[0]
+        self.assertEqual((battery.manufacturer, battery.serial, battery.chemistry), ("SMP", "1337", "LiP"))
+        self.assertEqual(len(report.capacity_history), 3)
+        self.assertEqual(report.capacity_history[-1], CapacityEntry("2024-12-15", "2024-12-22", 34990, 47530))
+        self.assertEqual(report.usage_history[0], UsageEntry("2024-12-01", "2024-12-08", 24662, 0, 75857, 0))
+
+    def test_html(self):
+        report = parse_battery_report(DUAL_HTML)
+        self.check_batteries(report)
+        self.assertEqual(len(report.capacity_history), 39)
+
+    def test_html_russian_locale(self):
+        report = parse_battery_report(DUAL_RU_HTML)
+        self.check_batteries(report)
+        english = parse_battery_report(DUAL_HTML)
+        self.assertEqual(report.capacity_history, english.capacity_history)
+        self.assertEqual(report.usage_history, english.usage_history)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Проверки session_journal.py: что пишется в журнал и что восстанавливается.
+
+    python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from battery_report import Battery
+from session_journal import SessionJournal, journal_results
+
+
+class JournalResultsTest(unittest.TestCase):
+    def setUp(self):
+        battery = Battery(name="Primary", manufacturer="SMP", serial="1337", chemistry="LiP",
+                          design_mwh=56018, full_charge_mwh=41730, cycle_count=222)
+        self.results = {
+            'serial_number': "PF1ABCDE",
+            'battery_cycles': "222",
+            'smart_snapshots': [{'device': "/dev/sda", 'power_on_hours': 1200, 'failed': False}],
+            'step_timings': {"Батарея": {'operator': True, 'status': 'ok', 'duration': 1.5}},
+            'batteries': [battery],
+            'smart_devices': {"/dev/sda": {'ok': True, 'record': battery, 'output': "smartctl ..."}},
+        }
+
+    def test_objects_are_not_journaled(self):
+        kept = journal_results(self.results)
+        self.assertEqual(set(kept), {'serial_number', 'battery_cycles', 'smart_snapshots', 'step_timings'})
+
+    def test_resume_restores_plain_values(self):
+        with tempfile.TemporaryDirectory() as directory:
+            SessionJournal("PF1ABCDE", directory).record_step("Батарея", self.results)
+            journal = SessionJournal("PF1ABCDE", directory)
+            self.assertIsNotNone(journal.load())
+        self.assertEqual(journal.completed_steps, ["Батарея"])
+        self.assertEqual(journal.results, journal_results(self.results))
+        self.assertNotIn('batteries', journal.results)
+
+
+if __name__ == "__main__":
+    unittest.main()
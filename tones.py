@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Тестовые сигналы для динамиков: тон только слева, только справа и свип.
+
+Сигналы генерируются в памяти (NumPy, 16 бит, стерео) и кэшируются: в памяти на время
+работы и в audio_cache/ в виде WAV между запусками. Воспроизведение - через
+sounddevice (PortAudio, WASAPI) с низкой задержкой, без него - winsound из памяти.
+
+    python tones.py --write-wav out/    # записать WAV и проверить каналы на любой ОС
+    python tones.py --play left
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 48000
+AUDIO_CACHE_DIR = "audio_cache"
+AMPLITUDE = 0.5
+FADE_SECONDS = 0.01     # плавное начало/конец каждого звука, чтобы не щелкало
+
+
+def _fade(signal, sample_rate):
+    n = min(int(FADE_SECONDS * sample_rate), len(signal) // 2)
+    if n:
+        ramp = np.linspace(0.0, 1.0, n)
+        signal[:n] *= ramp
+        signal[-n:] *= ramp[::-1]
+    return signal
+
+
+def beeps(sample_rate, frequency, count=4, on=0.3, off=0.15):
+    """Серия коротких гудков - их легче заметить и отличить от шума, чем ровный тон"""
+    t = np.arange(int(on * sample_rate)) / sample_rate
+    beep = _fade(np.sin(2 * np.pi * frequency * t), sample_rate)
+    pause = np.zeros(int(off * sample_rate))
+    return np.tile(np.concatenate([beep, pause]), count)
+
+
+def sweep(sample_rate, start=100.0, end=10000.0, seconds=4.0):
+    """Логарифмический свип: дребезг динамика слышен на определенной частоте"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    k = np.log(end / start)
+    phase = 2 * np.pi * start * seconds / k * (np.exp(t * k / seconds) - 1)
+    return _fade(np.sin(phase), sample_rate)
+
+
+# имя -> (генератор моно-сигнала, параметры, в какие каналы (левый, правый))
+SIGNALS = {
+    'left': (beeps, {'frequency': 440.0}, (1.0, 0.0)),
+    'right': (beeps, {'frequency': 660.0}, (0.0, 1.0)),
+    'sweep': (sweep, {}, (1.0, 1.0)),
+}
+
+
+def to_stereo(mono, gains):
+    """Моно-сигнал в int16 стерео (кадры x 2) с усилением по каналам"""
+    stereo = np.empty((len(mono), 2), dtype=np.int16)
+    for channel, gain in enumerate(gains):
+        stereo[:, channel] = np.round(mono * gain * AMPLITUDE * 32767)
+    return stereo
+
+
+def write_wav(path, frames, sample_rate):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(frames.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(frames.astype('<i2').tobytes())
+
+
+def read_wav(path):
+    """WAV 16 бит -> (кадры x каналы int16, частота)"""
+    with wave.open(path, 'rb') as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{path}: поддерживается только 16-битный WAV")
+        data = np.frombuffer(f.readframes(f.getnframes()), dtype='<i2')
+        return data.reshape(-1, f.getnchannels()), f.getframerate()
+
+
+class ToneEngine:
+    """Готовые буферы сигналов и их воспроизведение"""
+
+    def __init__(self, sample_rate=SAMPLE_RATE, cache_dir=AUDIO_CACHE_DIR):
+        self.sample_rate = sample_rate
+        self.cache_dir = cache_dir
+        self.buffers = {}
+
+    def cache_path(self, name):
+        generator, params, gains = SIGNALS[name]
+        # Изменили параметры сигнала - у файла другое имя, старый кэш не подхватится
+        key = repr((generator.__name__, sorted(params.items()), gains, AMPLITUDE, self.sample_rate))
+        digest = hashlib.sha1(key.encode()).hexdigest()[:10]
+        return os.path.join(self.cache_dir, f"{name}-{self.sample_rate}-{digest}.wav")
+
+    def buffer(self, name):
+        """int16 стерео-буфер сигнала: из памяти, из кэша на диске или сгенерированный"""
+        frames = self.buffers.get(name)
+        if frames is not None:
+            return frames
+        path = self.cache_path(name) if self.cache_dir else None
+        if path and os.path.exists(path):
+            try:
+                frames, _ = read_wav(path)
+            except (OSError, EOFError, ValueError, wave.Error):
+                frames = None
+        if frames is None:
+            generator, params, gains = SIGNALS[name]
+            frames = to_stereo(generator(self.sample_rate, **params), gains)
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                write_wav(path + ".tmp", frames, self.sample_rate)
+                os.replace(path + ".tmp", path)
+        self.buffers[name] = frames
+        return frames
+
+    def wav_bytes(self, name):
+        out = io.BytesIO()
+        write_wav(out, self.buffer(name), self.sample_rate)
+        return out.getvalue()
+
+    def play(self, name):
+        """Проигрывает сигнал и ждет окончания"""
+        frames = self.buffer(name)
+        try:
+            import sounddevice
+        except (ImportError, OSError):
+            sounddevice = None
+        if sounddevice is not None:
+            sounddevice.play(frames, self.sample_rate, latency='low')
+            sounddevice.wait()
+            return
+        try:
+            import winsound
+        except ImportError:
+            raise RuntimeError("нет ни sounddevice, ни winsound для воспроизведения")
+        winsound.PlaySound(self.wav_bytes(name), winsound.SND_MEMORY)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Тестовые сигналы для динамиков")
+    parser.add_argument("--play", choices=list(SIGNALS), action="append", default=[])
+    parser.add_argument("--write-wav", metavar="DIR", help="записать все сигналы в WAV")
+    args = parser.parse_args()
+
+    engine = ToneEngine()
+    if args.write_wav:
+        os.makedirs(args.write_wav, exist_ok=True)
+        for name in SIGNALS:
+            path = os.path.join(args.write_wav, f"{name}.wav")
+            write_wav(path, engine.buffer(name), engine.sample_rate)
+            print(f"Записан {path}")
+    for name in args.play:
+        print(f"Играет: {name}")
+        engine.play(name)
+
+
+if __name__ == "__main__":
+    main()
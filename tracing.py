@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Замер времени шагов тестирования в формате Chrome trace (chrome://tracing, Perfetto)"""
+
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+TRACE_DIR = "traces"
+
+
+class Tracer:
+    """Собирает интервалы (spans); выключенный трассировщик ничего не делает"""
+
+    def __init__(self, enabled=False, profile=False, out_dir=TRACE_DIR):
+        self.enabled = enabled or profile
+        self.profile = profile
+        self.out_dir = out_dir
+        self.events = []
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.session = time.strftime('%Y%m%d_%H%M%S')
+
+    def _now_us(self):
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def span(self, name, cat="step", **args):
+        """Контекстный менеджер: все, что внутри, попадает в трассу одним интервалом"""
+        if not self.enabled:
+            return nullcontext(args)
+        return self._span(name, cat, args)
+
+    @contextmanager
+    def _span(self, name, cat, args):
+        start = self._now_us()
+        try:
+            yield args
+        finally:
+            event = {
+                'name': name, 'cat': cat, 'ph': 'X',
+                'ts': round(start, 1), 'dur': round(self._now_us() - start, 1),
+                'pid': self.pid, 'tid': threading.get_ident(), 'args': args,
+            }
+            with self.lock:
+                self.events.append(event)
+
+    @contextmanager
+    def step(self, index, name):
+        """Интервал шага теста; в режиме profile еще и cProfile + tracemalloc"""
+        with self.span(name, "step", index=index) as args:
+            if not self.profile:
+                yield
+                return
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                after = tracemalloc.take_snapshot()
+                os.makedirs(self.out_dir, exist_ok=True)
+                prof_path = os.path.join(self.out_dir, f"{self.session}_step{index:02d}.prof")
+                profiler.dump_stats(prof_path)
+                args['profile'] = prof_path
+                args['top_allocations'] = [str(stat) for stat in after.compare_to(before, 'lineno')[:10]]
+
+    def export(self, path=None):
+        """Сохраняет трассу в JSON; возвращает путь или None, если трассировка выключена"""
+        if not self.enabled:
+            return None
+        if path is None:
+            os.makedirs(self.out_dir, exist_ok=True)
+            path = os.path.join(self.out_dir, f"trace_{self.session}.json")
+        with self.lock:
+            events = list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return path